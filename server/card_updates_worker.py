@@ -0,0 +1,57 @@
+"""
+Applies queued card parameter updates in the background.
+See `modules.sequencer.card_updates`.
+
+    python3 card_updates_worker.py
+
+Warns when observations fail and move to the dead letter list.
+Once the cause is fixed, move them back onto the queue:
+
+    python3 card_updates_worker.py --requeue-dead
+"""
+# flake8: noqa
+
+from config import config
+import framework.index as framework
+framework.update_config(config)
+
+from argparse import ArgumentParser
+from time import sleep
+from framework.database import make_db_connection, close_db_connection
+from modules.sequencer.card_updates import flush_card_updates, \
+    count_dead_card_updates, requeue_dead_card_updates
+
+# How many seconds to wait between batches
+cadence = config.get('card_updates_cadence', 5)
+
+# How many observations to apply per batch
+batch_size = config.get('card_updates_batch_size', 1000)
+
+parser = ArgumentParser(description='Apply queued card updates.')
+parser.add_argument('--requeue-dead', action='store_true',
+                    help='Move the dead letter list back onto the queue, '
+                         'and exit.')
+args = parser.parse_args()
+
+if args.requeue_dead:
+    print('Requeued {num} dead card updates.'.format(
+        num=requeue_dead_card_updates()))
+    raise SystemExit
+
+num_dead = count_dead_card_updates()
+if num_dead:
+    print('Warning: {num} dead card updates.'.format(num=num_dead))
+
+while True:
+    db_conn = make_db_connection()
+    # Keep going without waiting while the queue is backed up
+    while flush_card_updates(db_conn, limit=batch_size) == batch_size:
+        pass
+    close_db_connection(db_conn)
+    # The card parameters drift while observations sit in the dead letters
+    prev_dead, num_dead = num_dead, count_dead_card_updates()
+    if num_dead > prev_dead:
+        print('Warning: {num} more dead card updates, {total} in all. '
+              'Run with --requeue-dead once fixed.'.format(
+                  num=num_dead - prev_dead, total=num_dead))
+    sleep(cadence)
@@ -8,4 +8,6 @@ config = {
     'rdb_host': 'localhost',
     'rdb_port': 28015,
     'rdb_db': 'sagefy',
+    'card_updates_cadence': 5,
+    'card_updates_batch_size': 1000,
 }
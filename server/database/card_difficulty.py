@@ -0,0 +1,159 @@
+import json
+from framework.redis import redis
+from modules.sequencer.formulas import calculate_difficulty
+
+"""
+Keep each unit's assessment cards in a Redis sorted set,
+ordered by difficulty, so the card chooser can find cards in a
+correctness band with a range lookup instead of sampling.
+
+Alongside the sorted set, a hash keeps the guess and slip values per card,
+so the chooser can check the exact p(correct) of each candidate,
+and another hash keeps the count of cards and the sums of their guess
+and slip, so the unit's averages are one lookup.
+"""
+
+# Move the card within the index, keeping the sums up to date,
+# only if the index exists, in one step.
+index_script = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local previous = redis.call('HGET', KEYS[2], ARGV[1])
+if previous then
+    previous = cjson.decode(previous)
+    redis.call('HINCRBYFLOAT', KEYS[3], 'guess', -previous['guess'])
+    redis.call('HINCRBYFLOAT', KEYS[3], 'slip', -previous['slip'])
+else
+    redis.call('HINCRBY', KEYS[3], 'count', 1)
+end
+redis.call('HINCRBYFLOAT', KEYS[3], 'guess', ARGV[3])
+redis.call('HINCRBYFLOAT', KEYS[3], 'slip', ARGV[4])
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[5])
+return 1
+""")
+
+# Remove the card from the index and from the sums, in one step.
+remove_script = redis.register_script("""
+local previous = redis.call('HGET', KEYS[2], ARGV[1])
+if not previous then
+    return 0
+end
+previous = cjson.decode(previous)
+redis.call('HINCRBY', KEYS[3], 'count', -1)
+redis.call('HINCRBYFLOAT', KEYS[3], 'guess', -previous['guess'])
+redis.call('HINCRBYFLOAT', KEYS[3], 'slip', -previous['slip'])
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+return 1
+""")
+
+
+def get_card_difficulty_keys(unit_id):
+    """
+    Get the Redis keys for the sorted set, and the hashes of values
+    and sums, of the unit.
+    """
+
+    return (
+        'unit_cards_difficulty_{id}'.format(id=unit_id),
+        'unit_cards_parameters_{id}'.format(id=unit_id),
+        'unit_cards_sums_{id}'.format(id=unit_id),
+    )
+
+
+def has_card_difficulty_index(unit_id):
+    """
+    Has the index for the unit been built yet?
+    """
+
+    zkey, _, _ = get_card_difficulty_keys(unit_id)
+    return bool(redis.exists(zkey))
+
+
+def index_card_difficulty(unit_id, card_id, guess, slip):
+    """
+    Add or move a card in the unit's index.
+    Only applies once the unit's index has been built;
+    otherwise, the card will be included when the index is built.
+    """
+
+    index_script(keys=get_card_difficulty_keys(unit_id),
+                 args=[card_id, calculate_difficulty(guess, slip),
+                       repr(float(guess)), repr(float(slip)),
+                       json.dumps({'guess': guess, 'slip': slip})])
+
+
+def build_card_difficulty_index(unit_id, cards_values):
+    """
+    Replace the unit's index, given a list of dicts of
+    `entity_id`, `guess`, and `slip`.
+    """
+
+    zkey, hkey, skey = get_card_difficulty_keys(unit_id)
+    pipe = redis.pipeline()
+    pipe.delete(zkey, hkey, skey)
+    pipe.hmset(skey, {
+        'count': len(cards_values),
+        'guess': sum(values['guess'] for values in cards_values),
+        'slip': sum(values['slip'] for values in cards_values),
+    })
+    for values in cards_values:
+        pipe.zadd(zkey,
+                  calculate_difficulty(values['guess'], values['slip']),
+                  values['entity_id'])
+        pipe.hset(hkey, values['entity_id'], json.dumps({
+            'guess': values['guess'],
+            'slip': values['slip'],
+        }))
+    pipe.execute()
+
+
+def remove_card_difficulty(unit_id, card_id):
+    """
+    Remove a card from the unit's index, such as when it moved units.
+    """
+
+    remove_script(keys=get_card_difficulty_keys(unit_id), args=[card_id])
+
+
+def list_cards_by_difficulty(unit_id, min_difficulty, max_difficulty):
+    """
+    Get the cards of the unit with difficulty within the range, inclusive,
+    from least to most difficulty. Returns a list of dicts of
+    `entity_id`, `guess`, and `slip`.
+    """
+
+    zkey, hkey, _ = get_card_difficulty_keys(unit_id)
+    card_ids = [card_id.decode() for card_id in
+                redis.zrangebyscore(zkey, min_difficulty, max_difficulty)]
+    if not card_ids:
+        return []
+    output = []
+    for card_id, values in zip(card_ids, redis.hmget(hkey, card_ids)):
+        if values is None:
+            continue
+        values = json.loads(values.decode())
+        values['entity_id'] = card_id
+        output.append(values)
+    return output
+
+
+def list_card_difficulty_averages(unit_ids):
+    """
+    Get the average guess and slip of the cards in each unit's index,
+    in one round trip. Return a dict of unit ID: (guess, slip),
+    leaving out units without cards or without an index.
+    """
+
+    pipe = redis.pipeline()
+    for unit_id in unit_ids:
+        pipe.hmget(get_card_difficulty_keys(unit_id)[2],
+                   'count', 'guess', 'slip')
+    output = {}
+    for unit_id, (count, guess, slip) in zip(unit_ids, pipe.execute()):
+        if count and int(count) > 0:
+            output[unit_id] = (float(guess) / int(count),
+                               float(slip) / int(count))
+    return output
@@ -1,8 +1,10 @@
 from schemas.card_parameters import schema as card_parameters_schema
-from modules.sequencer.pmf import init_pmf, \
-    get_guess_pmf_value, \
-    get_slip_pmf_value
+from modules.sequencer.pmf_array import init_pmf_array, \
+    init_pmf_array_around, regrid_pmf_array, \
+    get_guess_pmf_array_value, \
+    get_slip_pmf_array_value
 from database.util import insert_document, update_document, get_document
+import rethinkdb as r
 from modules.sequencer.params import init_guess, init_slip, precision, \
     init_transit
 
@@ -15,6 +17,20 @@ def get_card_parameters(params, db_conn):
     return get_document(tablename, params, db_conn)
 
 
+def list_card_parameters(entity_ids, db_conn):
+    """
+    Get the parameters documents for a list of card entity IDs.
+    Cards without parameters are left out.
+    """
+
+    if not entity_ids:
+        return []
+    tablename = card_parameters_schema['tablename']
+    query = (r.table(tablename)
+              .get_all(*entity_ids, index='entity_id'))
+    return list(query.run(db_conn))
+
+
 def insert_card_parameters(data, db_conn):
     """
     """
@@ -33,40 +49,43 @@ def update_card_parameters(prev_data, data, db_conn):
 
 def get_distribution(card_parameters, kind):
     """
-    Parse own distribution hypotheses,
-    changing the keys back into numbers.
+    Read the distribution into an array PMF,
+    or start a new one if the card doesn't have one yet.
     """
 
     key = '{kind}_distribution'.format(kind=kind)
     if key in card_parameters:
-        distribution = card_parameters[key]
-        distribution = deliver_distribution(distribution)
-    else:
-        init = init_guess if kind == 'guess' else init_slip
-        distribution = {
-            h: 1 - (init - h) ** 2
-            for h in [h / precision for h in range(1, precision)]
-        }
-        card_parameters[key] = distribution
-    if kind == 'guess':
-        return init_pmf(distribution)
-    if kind == 'slip':
-        return init_pmf(distribution)
+        return deliver_distribution(card_parameters[key],
+                                    card_parameters.get('precision'))
+    init = init_guess if kind == 'guess' else init_slip
+    return init_pmf_array_around(init)
 
 
-def deliver_distribution(hypotheses):
+def deliver_distribution(distribution, stored_precision=None):
     """
-    Prepare the distribution for code use / JSON output.
+    Prepare the distribution for code use.
+    Distributions are stored as a list of probabilities over the grid
+    described by `precision`. Older documents store a dict of
+    stringified hypotheses instead.
     """
-    return {float(k): v for k, v in hypotheses.items()}
+
+    if isinstance(distribution, dict):
+        distribution = [v for k, v in sorted(distribution.items(),
+                                             key=lambda kv: float(kv[0]))]
+        stored_precision = len(distribution) + 1
+    probabilities = init_pmf_array(distribution)
+    return regrid_pmf_array(probabilities,
+                            stored_precision or precision,
+                            precision)
 
 
-def bundle_distribution(hypotheses):
+def bundle_distribution(probabilities):
     """
     Prepare for saving the distribution to the database.
+    Store alongside `precision`, which describes the grid.
     """
 
-    return {str(k): v for k, v in hypotheses.items()}
+    return probabilities.tolist()
 
 
 def get_guess(card_parameters):
@@ -75,7 +94,7 @@ def get_guess(card_parameters):
     """
 
     guess_distribution = get_distribution(card_parameters, 'guess')
-    return get_guess_pmf_value(guess_distribution)
+    return get_guess_pmf_array_value(guess_distribution)
 
 
 def get_slip(card_parameters):
@@ -84,7 +103,7 @@ def get_slip(card_parameters):
     """
 
     slip_distribution = get_distribution(card_parameters, 'slip')
-    return get_slip_pmf_value(slip_distribution)
+    return get_slip_pmf_array_value(slip_distribution)
 
 
 def get_transit():
@@ -96,13 +115,13 @@ def get_transit():
     return init_transit
 
 
-def get_num_learners():
+def get_num_learners(card_parameters):
     """
-    Gets the number of learners who interact with the card.
-    TODO-3 calculate based on the responses table.
+    Gets the number of learners who interact with the card,
+    as last counted by the card updates worker.
     """
 
-    return 0
+    return card_parameters.get('num_learners', 0)
 
 
 def get_card_parameters_values(card_parameters):
@@ -114,5 +133,5 @@ def get_card_parameters_values(card_parameters):
         'guess': get_guess(card_parameters),
         'slip': get_slip(card_parameters),
         'transit': get_transit(),
-        'num_learners': get_num_learners(),
+        'num_learners': get_num_learners(card_parameters),
     }
@@ -1,9 +1,8 @@
 from schemas.notice import schema as notice_schema
-from database.util import insert_document, update_document, deliver_fields, \
-    get_document
+from database.util import insert_document, update_document, get_document
 import rethinkdb as r
 from modules.content import get as c
-from copy import deepcopy
+from modules.compiled_schema import get_compiled_schema, copy_document
 
 # done-- implement create_topic notice
 # done-- implement create_proposal notice
@@ -11,7 +10,7 @@ from copy import deepcopy
 # TODO-2 implement decline_proposal notice
 # done-- implement accept_proposal notice
 # TODO-2 implement create_post notice
-# TODO-2 implement come_back notice
+# done-- implement come_back notice
 
 
 """
@@ -101,6 +100,6 @@ def deliver_notice(notice, access=None):
     """
 
     schema = notice_schema
-    notice = deepcopy(notice)
+    notice = copy_document(notice)
     notice['body'] = get_notice_body(notice)
-    return deliver_fields(schema, notice, access)
+    return get_compiled_schema(schema['fields'])['deliver'](notice, access)
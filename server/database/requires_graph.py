@@ -0,0 +1,97 @@
+"""
+Keep the require edges of the latest accepted cards and units in a Redis
+hash per table, entity ID: list of required entity IDs, so checking
+requires and looking for cycles needs no database queries.
+
+The hash builds from the database on first use, and each version
+updates its entity's edges once accepted.
+"""
+
+import json
+from framework.redis import redis
+
+graph_time = 24 * 60 * 60
+
+# Set the edges only if the graph exists, in one step, so a graph that
+# expired in between doesn't come back partial and without a TTL.
+index_script = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+""")
+
+
+def get_requires_graph_key(tablename):
+    """
+    Get the Redis key for the table's hash of require edges.
+    """
+
+    return 'requires_graph_{tablename}'.format(tablename=tablename)
+
+
+def has_requires_graph(tablename):
+    """
+    Has the table's graph been built yet?
+    """
+
+    return bool(redis.exists(get_requires_graph_key(tablename)))
+
+
+def build_requires_graph(tablename, edges):
+    """
+    Replace the table's graph, given a dict of entity ID: require IDs.
+    """
+
+    key = get_requires_graph_key(tablename)
+    pipe = redis.pipeline()
+    pipe.delete(key)
+    if edges:
+        pipe.hmset(key, {entity_id: json.dumps(require_ids or [])
+                         for entity_id, require_ids in edges.items()})
+        pipe.expire(key, graph_time)
+    pipe.execute()
+
+
+def index_requires(tablename, entity_id, require_ids):
+    """
+    Set the require edges of one entity.
+    Only applies once the table's graph has been built;
+    otherwise, the entity will be included when the graph is built.
+    """
+
+    index_script(keys=[get_requires_graph_key(tablename)],
+                 args=[entity_id, json.dumps(require_ids or [])])
+
+
+def get_requires_graph(tablename):
+    """
+    Get the table's graph as a dict of entity ID: require IDs,
+    or None if it hasn't been built yet.
+    """
+
+    data = redis.hgetall(get_requires_graph_key(tablename))
+    if not data:
+        return None
+    return {entity_id.decode(): json.loads(require_ids.decode())
+            for entity_id, require_ids in data.items()}
+
+
+def has_requires_path(graph, from_ids, to_id):
+    """
+    Can we get from any of the entities to the given entity,
+    following the requires? Visits each entity and edge once.
+    """
+
+    seen = set()
+    stack = list(from_ids)
+    while stack:
+        entity_id = stack.pop()
+        if entity_id == to_id:
+            return True
+        if entity_id in seen:
+            continue
+        seen.add(entity_id)
+        stack.extend(graph.get(entity_id, ()))
+    return False
@@ -1,5 +1,7 @@
 from schemas.response import schema as response_schema
-from database.util import insert_document, deliver_fields
+from database.util import insert_document, deliver_fields, \
+    save_documents
+from modules.util import omit
 import rethinkdb as r
 
 
@@ -12,20 +14,56 @@ def insert_response(data, db_conn):
     return insert_document(schema, data, db_conn)
 
 
+def insert_responses(data, db_conn):
+    """
+    Create many responses in one query, in the given order.
+    Return the responses, and a list of errors, if any, named by index.
+    """
+
+    schema = response_schema
+    data = [omit(datum, ('id', 'modified')) for datum in data]
+    return save_documents(schema, data, db_conn)
+
+
+def latest_response_query(user_id, unit_id):
+    """
+    Query the latest response given a user ID and a unit ID,
+    through the `user_id_unit_id_created` index, as a list of one or none.
+    """
+
+    index = 'user_id_unit_id_created'
+    return (r.table(response_schema['tablename'])
+             .between([user_id, unit_id, r.minval],
+                      [user_id, unit_id, r.maxval],
+                      index=index)
+             .order_by(index=r.desc(index))
+             .limit(1)
+             .coerce_to('array'))
+
+
 def get_latest_response(user_id, unit_id, db_conn):
     """
     Get the latest response given a user ID and a unit ID.
     """
 
-    tablename = response_schema['tablename']
-    query = (r.table(tablename)
-              .filter(r.row['user_id'].eq(user_id))
-              .filter(r.row['unit_id'].eq(unit_id))
-              .max('created')
-              .default(None))
-    document = query.run(db_conn)
-    if document:
-        return document
+    responses = latest_response_query(user_id, unit_id).run(db_conn)
+    if responses:
+        return responses[0]
+
+
+def list_latest_responses(user_id, unit_ids, db_conn):
+    """
+    Get the latest response per unit, given a user ID and unit IDs,
+    in one query. Return a dict of unit ID: response.
+    """
+
+    if not unit_ids:
+        return {}
+    query = r.expr({unit_id: latest_response_query(user_id, unit_id)
+                    for unit_id in set(unit_ids)})
+    return {unit_id: responses[0]
+            for unit_id, responses in query.run(db_conn).items()
+            if responses}
 
 
 def deliver_response(data, access=None):
@@ -0,0 +1,193 @@
+from time import time
+from framework.redis import redis
+from models.set import Set
+from modules.sequencer.formulas import calculate_review_time
+from modules.sequencer.params import max_learned
+
+"""
+Keep when each learned unit will need review, per user,
+in a Redis sorted set of unit ID by due time,
+so finding the units to review is a range lookup
+instead of a belief calculation per unit.
+
+A second sorted set keeps each user's earliest due time,
+so we can find all users with units to review in one lookup.
+
+Per user, a sorted set per set keeps the due times of the set's units,
+and another keeps each set's earliest due time,
+so ordering the user's sets by review is one lookup.
+"""
+
+review_users_key = 'review_due_users'
+
+# Set each set's earliest due time to the first of its units,
+# or take the set out when it has none.
+first_due_script = redis.register_script("""
+for i = 2, #KEYS do
+    local first = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+    if first[2] then
+        redis.call('ZADD', KEYS[1], first[2], ARGV[i - 1])
+    else
+        redis.call('ZREM', KEYS[1], ARGV[i - 1])
+    end
+end
+return 1
+""")
+
+
+def get_review_key(user_id):
+    """
+    Get the Redis key for the user's sorted set.
+    """
+
+    return 'user_reviews_{id}'.format(id=user_id)
+
+
+def get_set_reviews_key(user_id):
+    """
+    Get the Redis key for the user's sorted set of sets by earliest due time.
+    """
+
+    return 'user_set_reviews_{id}'.format(id=user_id)
+
+
+def get_set_units_reviews_key(user_id, set_id):
+    """
+    Get the Redis key for the due times of the user's units in the set.
+    """
+
+    return 'user_set_units_reviews_{user_id}_{set_id}'.format(
+        user_id=user_id, set_id=set_id)
+
+
+def get_review_due(learned, created):
+    """
+    Given learned and when it was recorded, in seconds,
+    when does the unit need review? None if the unit isn't learned yet.
+    """
+
+    if learned < max_learned:
+        return None
+    return created + calculate_review_time(learned)
+
+
+def schedule_reviews(user_id, reviews, db_conn=None):
+    """
+    Update the due times of the user's units, given a list of
+    `(unit_id, learned, created)`, with created in seconds.
+    Units not learned yet come off the schedule.
+    Given `db_conn`, also update the sets containing the units,
+    see `schedule_set_reviews`.
+    """
+
+    if not reviews:
+        return
+    key = get_review_key(user_id)
+    dues = {unit_id: get_review_due(learned, created)
+            for unit_id, learned, created in reviews}
+    pipe = redis.pipeline()
+    for unit_id, due in dues.items():
+        if due is None:
+            pipe.zrem(key, unit_id)
+        else:
+            pipe.zadd(key, due, unit_id)
+    pipe.zrange(key, 0, 0, withscores=True)
+    earliest = pipe.execute()[-1]
+    if earliest:
+        redis.zadd(review_users_key, earliest[0][1], user_id)
+    else:
+        redis.zrem(review_users_key, user_id)
+    if db_conn:
+        schedule_set_reviews(db_conn, user_id, dues)
+
+
+def schedule_set_reviews(db_conn, user_id, dues):
+    """
+    Update the earliest due time of each of the user's sets containing
+    the units, at any depth, given a dict of unit ID: due time,
+    or None for units not learned yet.
+    Finds the sets with the set members graph.
+    """
+
+    set_ids = set()
+    pipe = redis.pipeline()
+    for unit_id, due in dues.items():
+        for set_id in Set.list_ids_by_unit_id(db_conn, unit_id):
+            set_ids.add(set_id)
+            key = get_set_units_reviews_key(user_id, set_id)
+            if due is None:
+                pipe.zrem(key, unit_id)
+            else:
+                pipe.zadd(key, due, unit_id)
+    if not set_ids:
+        return
+    pipe.execute()
+    set_ids = sorted(set_ids)
+    first_due_script(
+        keys=[get_set_reviews_key(user_id)] +
+        [get_set_units_reviews_key(user_id, set_id) for set_id in set_ids],
+        args=set_ids)
+
+
+def get_set_review_dues(user_id):
+    """
+    Get the earliest due time of each of the user's sets with learned
+    units, as a dict of set ID: due time.
+    """
+
+    return {set_id.decode(): due
+            for set_id, due in redis.zrange(get_set_reviews_key(user_id),
+                                            0, -1, withscores=True)}
+
+
+def get_review_dues(user_id, unit_ids=None):
+    """
+    Get the due time of each of the user's scheduled units,
+    or of only the given units, as a dict of unit ID: due time.
+    """
+
+    key = get_review_key(user_id)
+    if unit_ids is None:
+        return {unit_id.decode(): due
+                for unit_id, due in redis.zrange(key, 0, -1,
+                                                 withscores=True)}
+    unit_ids = list(unit_ids)
+    pipe = redis.pipeline()
+    for unit_id in unit_ids:
+        pipe.zscore(key, unit_id)
+    return {unit_id: due
+            for unit_id, due in zip(unit_ids, pipe.execute())
+            if due is not None}
+
+
+def list_due_units(user_id, now=None):
+    """
+    List the IDs of the user's units that need review now,
+    most overdue first.
+    """
+
+    now = now or time()
+    return [unit_id.decode()
+            for unit_id in redis.zrangebyscore(get_review_key(user_id),
+                                               '-inf', now)]
+
+
+def list_due_users(now=None):
+    """
+    List the IDs of the users with any units that need review now.
+    """
+
+    now = now or time()
+    return [user_id.decode()
+            for user_id in redis.zrangebyscore(review_users_key,
+                                               '-inf', now)]
+
+
+def remove_due_users(user_ids):
+    """
+    Take users out of the due users until their schedule next changes,
+    such as after sending them a notice.
+    """
+
+    if user_ids:
+        redis.zrem(review_users_key, *user_ids)
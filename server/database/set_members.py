@@ -0,0 +1,180 @@
+"""
+Keep the members of the latest accepted sets in a Redis hash,
+set entity ID: list of member entity IDs, and the reverse in another,
+member entity ID: list of set entity IDs, so finding the sets containing
+a unit, at any depth, and looking for membership cycles,
+needs no database queries.
+
+The hashes build from the database on first use, and each set version
+updates its members once accepted.
+"""
+
+import json
+from framework.redis import redis
+
+members_key = 'set_members_graph'
+parents_key = 'set_parents_graph'
+graph_time = 24 * 60 * 60
+
+# Replace the members of one set, and move the set in the members'
+# lists of parents, only if the graph exists, in one step, so a graph that
+# expired in between doesn't come back partial and without a TTL.
+index_script = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local previous = redis.call('HGET', KEYS[1], ARGV[1])
+if previous then
+    for _, member_id in ipairs(cjson.decode(previous)) do
+        local parents = redis.call('HGET', KEYS[2], member_id)
+        if parents then
+            local kept = {}
+            for _, set_id in ipairs(cjson.decode(parents)) do
+                if set_id ~= ARGV[1] then
+                    table.insert(kept, set_id)
+                end
+            end
+            if #kept > 0 then
+                redis.call('HSET', KEYS[2], member_id, cjson.encode(kept))
+            else
+                redis.call('HDEL', KEYS[2], member_id)
+            end
+        end
+    end
+end
+for _, member_id in ipairs(cjson.decode(ARGV[2])) do
+    local parents = redis.call('HGET', KEYS[2], member_id)
+    parents = parents and cjson.decode(parents) or {}
+    local found = false
+    for _, set_id in ipairs(parents) do
+        found = found or set_id == ARGV[1]
+    end
+    if not found then
+        table.insert(parents, ARGV[1])
+        redis.call('HSET', KEYS[2], member_id, cjson.encode(parents))
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl > 0 then
+    redis.call('PEXPIRE', KEYS[2], ttl)
+end
+return 1
+""")
+
+# Walk up the parents, one level at a time, nearest first.
+# Returns nil if the graph hasn't been built yet.
+ancestors_script = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local seen, found, level = {[ARGV[1]] = true}, {}, {ARGV[1]}
+while #level > 0 do
+    local next_level = {}
+    for _, id in ipairs(level) do
+        local parents = redis.call('HGET', KEYS[2], id)
+        if parents then
+            parents = cjson.decode(parents)
+            table.sort(parents)
+            for _, set_id in ipairs(parents) do
+                if not seen[set_id] then
+                    seen[set_id] = true
+                    table.insert(found, set_id)
+                    table.insert(next_level, set_id)
+                end
+            end
+        end
+    end
+    level = next_level
+end
+return found
+""")
+
+
+def has_set_members():
+    """
+    Has the graph been built yet?
+    """
+
+    return bool(redis.exists(members_key))
+
+
+def build_set_members(members):
+    """
+    Replace the graph, given a dict of set ID: member IDs.
+    """
+
+    parents = {}
+    for set_id, member_ids in members.items():
+        for member_id in member_ids:
+            set_ids = parents.setdefault(member_id, [])
+            if set_id not in set_ids:
+                set_ids.append(set_id)
+    pipe = redis.pipeline()
+    pipe.delete(members_key, parents_key)
+    if members:
+        pipe.hmset(members_key, {set_id: json.dumps(member_ids)
+                                 for set_id, member_ids in members.items()})
+        pipe.expire(members_key, graph_time)
+    if parents:
+        pipe.hmset(parents_key, {member_id: json.dumps(set_ids)
+                                 for member_id, set_ids in parents.items()})
+        pipe.expire(parents_key, graph_time)
+    pipe.execute()
+
+
+def index_set_members(set_id, member_ids):
+    """
+    Set the members of one set.
+    Only applies once the graph has been built;
+    otherwise, the set will be included when the graph is built.
+    """
+
+    index_script(keys=[members_key, parents_key],
+                 args=[set_id, json.dumps(member_ids)])
+
+
+def get_set_members():
+    """
+    Get the graph as a dict of set ID: member IDs,
+    or None if it hasn't been built yet.
+    """
+
+    data = redis.hgetall(members_key)
+    if not data:
+        return None
+    return {set_id.decode(): json.loads(member_ids.decode())
+            for set_id, member_ids in data.items()}
+
+
+def list_ancestor_set_ids(member_id):
+    """
+    Get the IDs of the sets containing the member, directly
+    or through other sets, in order of nearness,
+    or None if the graph hasn't been built yet.
+    """
+
+    set_ids = ancestors_script(keys=[members_key, parents_key],
+                               args=[member_id])
+    if set_ids is None:
+        return None
+    return [set_id.decode() for set_id in set_ids]
+
+
+def has_member_path(members, from_ids, to_id):
+    """
+    Can we get from any of the entities to the given set,
+    following the members? Visits each set and member once.
+    """
+
+    seen = set()
+    stack = list(from_ids)
+    while stack:
+        id_ = stack.pop()
+        if id_ == to_id:
+            return True
+        if id_ in seen:
+            continue
+        seen.add(id_)
+        stack.extend(members.get(id_, ()))
+    return False
@@ -3,7 +3,7 @@ from modules.util import json_prep
 from framework.elasticsearch import es
 from schemas.topic import schema as topic_schema
 from database.util import insert_document, update_document, deliver_fields, \
-    get_document, prepare_document
+    get_document, prepare_document, pluck_fields, stream_documents
 
 
 def insert_topic(data, db_conn):
@@ -49,14 +49,25 @@ def get_topic(params, db_conn):
     return get_document(tablename, params, db_conn)
 
 
-def list_topics(params, db_conn):
+def list_topics(params, db_conn, fields=None):
     """
     Get a list of topics in Sagefy.
+    Given `fields`, only get those fields of each topic.
     """
 
     schema = topic_schema
     query = r.table(schema['tablename'])
-    return list(query.run(db_conn))
+    return list(pluck_fields(query, fields).run(db_conn))
+
+
+def stream_topics(params, db_conn, fields=None, batch_size=1000):
+    """
+    Iterate over the topics of Sagefy, `batch_size` at a time.
+    Given `fields`, only get those fields of each topic.
+    """
+
+    tablename = topic_schema['tablename']
+    return stream_documents(tablename, params, db_conn, fields, batch_size)
 
 
 def deliver_topic(data, access=None):
@@ -3,7 +3,7 @@ import urllib
 import hashlib
 from passlib.hash import bcrypt
 from database.util import insert_document, update_document, \
-    get_document, deliver_fields
+    get_document, deliver_fields, pluck_fields, stream_documents
 from framework.elasticsearch import es
 import json
 from framework.redis import redis
@@ -66,23 +66,35 @@ def add_user_to_es(user):
     )
 
 
-def get_user(params, db_conn):
+def get_user(params, db_conn, fields=None):
     """
     Get the user matching the parameters.
+    Given `fields`, only get those fields of the user.
     """
 
     tablename = user_schema['tablename']
-    return get_document(tablename, params, db_conn)
+    return get_document(tablename, params, db_conn, fields)
 
 
-def list_users(params, db_conn):
+def list_users(params, db_conn, fields=None):
     """
     Get a list of users of Sagefy.
+    Given `fields`, only get those fields of each user.
     """
 
     schema = user_schema
     query = r.table(schema['tablename'])
-    return list(query.run(db_conn))
+    return list(pluck_fields(query, fields).run(db_conn))
+
+
+def stream_users(params, db_conn, fields=None, batch_size=1000):
+    """
+    Iterate over the users of Sagefy, `batch_size` at a time.
+    Given `fields`, only get those fields of each user.
+    """
+
+    tablename = user_schema['tablename']
+    return stream_documents(tablename, params, db_conn, fields, batch_size)
 
 # def delete_user(doc_id, db_conn):
 #     """
@@ -163,6 +175,37 @@ def set_learning_context(user, **d):
     return context
 
 
+def get_precomputed_cards(user, card_id):
+    """
+    Get the next cards chosen while the learner viewed the card,
+    as a dict of learned bucket: card data, or None if not ready.
+    See `modules.sequencer.session.precompute_next_cards_later`.
+    """
+
+    key = 'precomputed_cards_{id}'.format(id=user['id'])
+    data = redis.get(key)
+    if not data:
+        return None
+    data = json.loads(data.decode())
+    if data.get('card_id') != card_id:
+        return None
+    return data.get('cards')
+
+
+def set_precomputed_cards(user, card_id, cards):
+    """
+    Store the next cards chosen while the learner viewed the card.
+    Kept apart from the learning context, as a background thread
+    writes them while the learner's requests update the context.
+    """
+
+    key = 'precomputed_cards_{id}'.format(id=user['id'])
+    redis.setex(key, 10 * 60, json.dumps({
+        'card_id': card_id,
+        'cards': cards,
+    }, default=json_serial))
+
+
 def get_email_token(user, send_email=True):
     """
     Create an email token for the user to reset their password.
@@ -1,6 +1,7 @@
 from models.set import Set
 from schemas.user_sets import schema as user_sets_schema
 from database.util import insert_document, update_document, get_document
+from database.review_schedule import get_set_review_dues
 from copy import deepcopy
 
 """
@@ -58,8 +59,19 @@ def list_user_sets_entity(user_id, params, db_conn):
     """
 
     # TODO-2 each set -- needs review?
-    # TODO-2 order by last reviewed time
     uset = get_user_sets(user_id, db_conn)
     # TODO-3 limit = params.get('limit') or 10
     # TODO-3 skip = params.get('skip') or 0
-    return Set.list_by_entity_ids(db_conn, uset['set_ids'])
+    sets = Set.list_by_entity_ids(db_conn, uset['set_ids'])
+    return order_sets_by_review(user_id, sets)
+
+
+def order_sets_by_review(user_id, sets):
+    """
+    Order the sets by when their first unit needs review, soonest first.
+    Sets without learned units go last, in the same order as before.
+    """
+
+    dues = get_set_review_dues(user_id)
+    return sorted(sets, key=lambda set_: dues.get(set_['entity_id'],
+                                                  float('inf')))
@@ -1,6 +1,6 @@
 import rethinkdb as r
-from modules.util import omit, extend, pick
-from copy import deepcopy
+from modules.util import omit, extend
+from modules.compiled_schema import get_compiled_schema, copy_document
 from modules.content import get as c
 
 
@@ -37,41 +37,123 @@ def save_document(schema, data, db_conn):
     data, errors = prepare_document(schema, data, db_conn)
     if errors:
         return None, errors
-    data = bundle_fields(schema, data)
-    r.table(schema['tablename']).insert(data, conflict='update').run(db_conn)
-    data = r.table(schema['tablename']).get(data['id']).run(db_conn)
-    return data, errors
+    data = get_compiled_schema(schema['fields'])['bundle'](data)
+    result = (r.table(schema['tablename'])
+               .insert(data, conflict='update', return_changes='always')
+               .run(db_conn))
+    return result['changes'][0]['new_val'], errors
+
+
+def insert_documents(schema, data, db_conn):
+    """
+    Create many documents in one query, in the given order.
+    Return the documents, and a list of errors, if any, named by index.
+    If any document is invalid, none are saved.
+    """
+
+    data = [omit(datum, ('id', 'created', 'modified')) for datum in data]
+    return save_documents(schema, data, db_conn)
+
 
+def save_documents(schema, data, db_conn):
+    """
+    NOTICE: You should use `insert_documents` instead.
+    Insert many documents in one query, in the given order.
+    Return the documents, and a list of errors, if any, named by index.
+    """
 
-def get_document(tablename, params, db_conn):
+    compiled = get_compiled_schema(schema['fields'])
+    documents = [compiled['defaults'](compiled['tidy'](datum))
+                 for datum in data]
+    unique_errors = validate_unique_documents(schema, documents, db_conn)
+    errors = []
+    for i, document in enumerate(documents):
+        errors += [extend({}, error, {'name': '%i.%s' % (i, error['name'])})
+                   for error in (compiled['validate'](document)
+                                 + unique_errors[i])]
+        compiled['bundle'](document)
+    if errors or not documents:
+        return [], errors
+    result = (r.table(schema['tablename'])
+               .insert(documents, conflict='update', return_changes='always')
+               .run(db_conn))
+    saved = {change['new_val']['id']: change['new_val']
+             for change in result['changes']}
+    return [saved[document['id']] for document in documents], []
+
+
+def get_document(tablename, params, db_conn, fields=None):
     """
     Get one document which matches the provided keyword arguments.
     Return None when there's no matching document.
+    Given `fields`, only get those fields of the document.
     """
 
     data = None
     if params.get('id'):
-        data = (r.table(tablename)
-                 .get(params.get('id'))
-                 .run(db_conn))
+        query = r.table(tablename).get(params.get('id'))
+        if fields:
+            query = query.do(lambda document: r.branch(
+                document, document.pluck(*fields), None))
+        data = query.run(db_conn)
     else:
-        data = list(r.table(tablename)
-                     .filter(params)
-                     .limit(1)
-                     .run(db_conn))
+        query = (r.table(tablename)
+                  .filter(params)
+                  .limit(1))
+        data = list(pluck_fields(query, fields).run(db_conn))
         data = data[0] if len(data) > 0 else None
     return data
 
 
-def list_documents(tablename, params, db_conn):
+def list_documents(tablename, params, db_conn, fields=None):
     """
     Get a list of documents matching the provided keyword arguments.
     Return empty array when no documents match.
+    Given `fields`, only get those fields of each document.
     """
 
-    return (r.table(tablename)
-             .filter(params)
-             .run(db_conn))
+    query = (r.table(tablename)
+              .filter(params))
+    return pluck_fields(query, fields).run(db_conn)
+
+
+def pluck_fields(query, fields=None):
+    """
+    Limit the documents of the query to the given fields, if any,
+    so the database only sends what we need.
+    """
+
+    if fields:
+        return query.pluck(*fields)
+    return query
+
+
+def stream_documents(tablename, params, db_conn, fields=None,
+                     batch_size=1000):
+    """
+    Iterate over the documents matching the provided keyword arguments,
+    as `list_documents` would, but in batches of up to `batch_size`.
+    """
+
+    query = (r.table(tablename)
+              .filter(params))
+    return stream_query(pluck_fields(query, fields), db_conn, batch_size)
+
+
+def stream_query(query, db_conn, batch_size=1000):
+    """
+    Iterate over the documents of the query, fetching them from the
+    database in batches of up to `batch_size`, so only one batch at a time
+    is in memory. Closes the cursor if we stop early.
+    """
+
+    cursor = query.run(db_conn, max_batch_rows=batch_size)
+    try:
+        for document in cursor:
+            yield document
+    finally:
+        if hasattr(cursor, 'close'):
+            cursor.close()
 
 
 def delete_document(tablename, doc_id, db_conn):
@@ -86,31 +168,16 @@ def delete_document(tablename, doc_id, db_conn):
 ###############################################################################
 
 
-def recurse_embeds(fn, data, schema, prefix=''):
-    for field_name, field_schema in schema.items():
-        fn(data, field_name, field_schema, prefix)
-
-        if 'embed' in field_schema:
-            data[field_name] = data.get(field_name) or {}
-            recurse_embeds(fn, data[field_name], field_schema['embed'],
-                           '%s%s.' % (prefix, field_name))
-
-        elif 'embed_many' in field_schema:
-            data[field_name] = data.get(field_name) or []
-            for i, d in enumerate(data[field_name]):
-                recurse_embeds(fn, d, field_schema['embed_many'],
-                               '%s%s.%i.' % (prefix, field_name, i))
-
-
 def prepare_document(schema, data, db_conn):
     """
     Prepare a document to be saved.
     """
 
-    data = tidy_fields(schema, data)
-    data = add_default_fields(schema, data)
+    compiled = get_compiled_schema(schema['fields'])
+    data = compiled['tidy'](data)
+    data = compiled['defaults'](data)
     # NOTA BENE: add_default_fields must come before validate_unique_fields
-    errors = (validate_fields(schema, data)
+    errors = (compiled['validate'](data)
               + validate_unique_fields(schema, data, db_conn))
     return data, errors
 
@@ -122,18 +189,7 @@ def tidy_fields(schema, data):
     Later, we might want an option to throw errors instead.
     """
 
-    data = deepcopy(data)
-
-    def _(data, schema):
-        for name, field_schema in schema.items():
-            if 'embed' in field_schema and name in data:
-                data[name] = _(data[name], field_schema['embed'])
-            elif 'embed_many' in field_schema and name in data:
-                for i, d in enumerate(data[name]):
-                    data[name][i] = _(d, field_schema['embed_many'])
-        return pick(data, schema.keys())
-
-    return _(data, schema['fields'])
+    return get_compiled_schema(schema['fields'])['tidy'](data)
 
 
 def add_default_fields(schema, data):
@@ -141,17 +197,8 @@ def add_default_fields(schema, data):
     Set up defaults for data if not applied.
     """
 
-    data = deepcopy(data)
-
-    def _(data, field_name, field_schema, prefix):
-        if 'default' in field_schema and data.get(field_name) is None:
-            if hasattr(field_schema['default'], '__call__'):
-                data[field_name] = field_schema['default']()
-            else:
-                data[field_name] = field_schema['default']
-
-    recurse_embeds(_, data, schema['fields'])
-    return data
+    data = copy_document(data)
+    return get_compiled_schema(schema['fields'])['defaults'](data)
 
 
 def validate_fields(schema, data):
@@ -159,25 +206,7 @@ def validate_fields(schema, data):
     Iterate over the schema, ensuring that everything matches up.
     """
 
-    errors = []
-
-    def _(data, field_name, field_schema, prefix):
-        if 'validate' not in field_schema:
-            return
-        error = None
-        for fn in field_schema['validate']:
-            if isinstance(fn, (list, tuple)):
-                error = fn[0](data.get(field_name), *fn[1:])
-            else:
-                error = fn(data.get(field_name))
-            if error:
-                errors.append({
-                    'name': prefix + field_name,
-                    'message': error,
-                })
-                break
-    recurse_embeds(_, data, schema['fields'])
-    return errors
+    return get_compiled_schema(schema['fields'])['validate'](data)
 
 
 def validate_unique_fields(schema, data, db_conn):
@@ -185,21 +214,61 @@ def validate_unique_fields(schema, data, db_conn):
     Test all top-level fields marked as unique.
     """
 
-    errors = []
+    return validate_unique_documents(schema, [data], db_conn)[0]
+
 
-    def _(data, field_name, field_schema, prefix):
-        if ('unique' not in field_schema or
-                data.get(field_name) is None):
-            return
-        query = (r.table(schema['tablename'])
-                  .filter(r.row[field_name] == data.get(field_name))
-                  .filter(r.row['id'] != data['id']))
-        if len(list(query.run(db_conn))) > 0:
-            errors.append({
-                'name': prefix + field_name,
-                'message': c('unique'),
-            })
-    recurse_embeds(_, data, schema['fields'])
+def validate_unique_documents(schema, data, db_conn):
+    """
+    Test the unique fields of many documents at once,
+    against the table and each other.
+    Return a list of errors for each document.
+    """
+
+    return find_unique_errors(r.table(schema['tablename']),
+                              get_compiled_schema(schema['fields'])['unique'],
+                              data, db_conn)
+
+
+def find_unique_errors(table, names, data, db_conn):
+    """
+    Find which of the documents take values of the unique fields
+    another document already has, in the table or earlier in the list.
+    Each unique field has a secondary index of the same name,
+    so one query gets every document sharing any of the values.
+    Return a list of errors for each document.
+    """
+
+    errors = [[] for datum in data]
+    values = {}
+    for name in names:
+        field_values = {datum[name] for datum in data
+                        if datum.get(name) is not None}
+        if field_values:
+            values[name] = list(field_values)
+    if not values:
+        return errors
+    query = {}
+    for name, field_values in values.items():
+        query[name] = (table.get_all(*field_values, index=name)
+                            .pluck('id', name)
+                            .coerce_to('array'))
+    taken = r.expr(query).run(db_conn)
+    for name in names:
+        if name not in values:
+            continue
+        owners = {}
+        for document in taken[name]:
+            owners.setdefault(document[name], set()).add(document['id'])
+        for datum, datum_errors in zip(data, errors):
+            if datum.get(name) is None:
+                continue
+            ids = owners.setdefault(datum[name], set())
+            if ids - {datum.get('id')}:
+                datum_errors.append({
+                    'name': name,
+                    'message': c('unique'),
+                })
+            ids.add(datum.get('id'))
     return errors
 
 
@@ -210,13 +279,8 @@ def bundle_fields(schema, data):
     in the schema if present.
     """
 
-    def _(data, field_name, field_schema, prefix):
-        if 'bundle' in field_schema and data.get(field_name):
-            data[field_name] = field_schema['bundle'](data[field_name])
-
-    data = deepcopy(data)
-    recurse_embeds(_, data, schema['fields'])
-    return data
+    data = copy_document(data)
+    return get_compiled_schema(schema['fields'])['bundle'](data)
 
 
 def deliver_fields(schema, data, access=None):
@@ -226,15 +290,5 @@ def deliver_fields(schema, data, access=None):
     in the schema if present.
     """
 
-    def _(data, field_name, field_schema, prefix):
-        if ('access' in field_schema and
-                data.get(field_name) is not None and
-                access not in field_schema['access']):
-            del data[field_name]
-
-        elif 'deliver' in field_schema and data.get(field_name):
-            data[field_name] = field_schema['deliver'](data[field_name])
-
-    data = deepcopy(data)
-    recurse_embeds(_, data, schema['fields'])
-    return data
+    data = copy_document(data)
+    return get_compiled_schema(schema['fields'])['deliver'](data, access)
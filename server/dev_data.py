@@ -497,27 +497,29 @@ es.indices.delete(index='entity', ignore=[400, 404])
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'plus-choice-a',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'plus-choice-b-params',
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'plus-choice-b',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'minus-video-a-params',
         'created': r.time(2014, 1, 1, 'Z'),
@@ -528,27 +530,29 @@ es.indices.delete(index='entity', ignore=[400, 404])
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'minus-choice-a',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'minus-choice-b-params',
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'minus-choice-b',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'times-video-a-params',
         'created': r.time(2014, 1, 1, 'Z'),
@@ -559,27 +563,29 @@ es.indices.delete(index='entity', ignore=[400, 404])
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'times-choice-a',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'times-choice-b-params',
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'times-choice-b',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'slash-video-a-params',
         'created': r.time(2014, 1, 1, 'Z'),
@@ -590,27 +596,29 @@ es.indices.delete(index='entity', ignore=[400, 404])
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'slash-choice-a',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }, {
         'id': 'slash-choice-b-params',
         'created': r.time(2014, 1, 1, 'Z'),
         'modified': r.time(2014, 1, 1, 'Z'),
         'entity_id': 'slash-choice-b',
-        'guess_distribution': {
-            str(h): 1 - (0.5 - h) ** 2
+        'precision': precision,
+        'guess_distribution': [
+            1 - (0.5 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        },
-        'slip_distribution': {
-            str(h): 1 - (0.25 - h) ** 2
+        ],
+        'slip_distribution': [
+            1 - (0.25 - h) ** 2
             for h in [h / precision for h in range(1, precision)]
-        }
+        ]
     }])
     .run(db_conn))
 
@@ -1,9 +1,13 @@
-import rethinkdb as r
 from framework.database import setup_db, make_db_connection, \
     close_db_connection
 from framework.elasticsearch import es
 from modules.util import json_prep, pick
-from database.user import get_avatar
+from database.util import stream_documents
+from database.user import get_avatar, get_user, stream_users
+from database.topic import get_topic, stream_topics
+from models.unit import Unit
+from models.card import Card
+from models.set import Set
 
 setup_db()
 db_conn = make_db_connection()
@@ -12,8 +16,7 @@ db_conn = make_db_connection()
 es.indices.delete(index='entity', ignore=[400, 404])
 
 # Add users
-users = r.table('users').run(db_conn)
-for user in users:
+for user in stream_users({}, db_conn, fields=('id', 'name', 'email')):
     data = pick(json_prep(user), ('id', 'name'))
     data['avatar'] = get_avatar(user['email'])
     es.index(
@@ -24,60 +27,34 @@ for user in users:
     )
 
 # Add units
-units = (r.table('units')
-          .filter(r.row['status'].eq('accepted'))
-          .group('entity_id')
-          .max('created')
-          .default(None)
-          .ungroup()
-          .map(r.row['reduction'])
-          .run(db_conn))
-
-for unit in units:
+for unit in Unit.stream_accepted(db_conn):
     es.index(
         index='entity',
         doc_type='unit',
-        body=json_prep(unit),
+        body=json_prep(unit.data),
         id=unit['entity_id'],
     )
 
 # Add cards
-cards = (r.table('cards')
-          .filter(r.row['status'].eq('accepted'))
-          .group('entity_id')
-          .max('created')
-          .default(None)
-          .ungroup()
-          .map(r.row['reduction'])
-          .run(db_conn))
-for card in cards:
+for card in Card.stream_accepted(db_conn):
     es.index(
         index='entity',
         doc_type='card',
-        body=json_prep(card),
+        body=json_prep(card.data),
         id=card['entity_id'],
     )
 
 # Add sets
-sets = (r.table('sets')
-         .filter(r.row['status'].eq('accepted'))
-         .group('entity_id')
-         .max('created')
-         .default(None)
-         .ungroup()
-         .map(r.row['reduction'])
-         .run(db_conn))
-for set_ in sets:
+for set_ in Set.stream_accepted(db_conn):
     es.index(
         index='entity',
         doc_type='set',
-        body=json_prep(set_),
+        body=json_prep(set_.data),
         id=set_['entity_id'],
     )
 
 # Add topics
-topics = r.table('topics').run(db_conn)
-for topic in topics:
+for topic in stream_topics({}, db_conn):
     es.index(
         index='entity',
         doc_type='topic',
@@ -86,17 +63,12 @@ for topic in topics:
     )
 
 # Add posts
-posts = r.table('posts').run(db_conn)
-for post in posts:
+for post in stream_documents('posts', {}, db_conn):
     data = json_prep(post)
-    topic = (r.table('topics')
-             .get(data['topic_id'])
-             .run(db_conn))
-    user = (r.table('users')
-             .get(data['user_id'])
-             .run(db_conn))
+    topic = get_topic({'id': data['topic_id']}, db_conn)
+    user = get_user({'id': data['user_id']}, db_conn, fields=('id', 'name'))
     data['topic'] = json_prep(topic)
-    data['user'] = pick(json_prep(user), ('id', 'name'))
+    data['user'] = json_prep(user)
     es.index(
         index='entity',
         doc_type='post',
@@ -33,6 +33,25 @@ def close_db_connection(db_conn):
     db_conn.close()
 
 
+def create_index(db_conn, tablename, index):
+    """
+    Create a secondary index, given a tuple of the name,
+    then optionally the function, and options such as `multi` as a dict.
+    """
+
+    args, options = index, {}
+    if isinstance(index[-1], dict):
+        args, options = index[:-1], index[-1]
+    (r.db(config['rdb_db'])
+      .table(tablename)
+      .index_create(*args, **options)
+      .run(db_conn))
+    (r.db(config['rdb_db'])
+      .table(tablename)
+      .index_wait(args[0])
+      .run(db_conn))
+
+
 def setup_db():
     """
     Set up the database.
@@ -73,9 +92,7 @@ def setup_db():
         indexes = getattr(model_cls, 'indexes', [])
         for index in indexes:
             if index[0] not in existant_indexes:
-                (r.db(config['rdb_db'])
-                  .index_create(*index)
-                  .run(db_conn))
+                create_index(db_conn, tablename, index)
 
     from schemas.user import schema as user_schema
     from schemas.notice import schema as notice_schema
@@ -95,4 +112,12 @@ def setup_db():
               .run(db_conn))
             tables.append(tablename)
 
+        existant_indexes = (r.db(config['rdb_db'])
+                             .table(tablename)
+                             .index_list()
+                             .run(db_conn))
+        for index in schema.get('indexes', ()):
+            if index[0] not in existant_indexes:
+                create_index(db_conn, tablename, index)
+
     close_db_connection(db_conn)
@@ -0,0 +1,45 @@
+"""
+Convert `cards_parameters` documents that store distributions as dicts of
+stringified hypotheses into the list + `precision` format.
+Safe to run more than once; converted documents are skipped.
+"""
+
+import json
+import rethinkdb as r
+from framework.database import setup_db, make_db_connection, \
+    close_db_connection
+from schemas.card_parameters import schema as card_parameters_schema
+from database.card_parameters import deliver_distribution, \
+    bundle_distribution
+from modules.sequencer.params import precision
+
+setup_db()
+db_conn = make_db_connection()
+
+tablename = card_parameters_schema['tablename']
+documents = (r.table(tablename)
+              .filter(r.row['guess_distribution'].type_of().eq('OBJECT') |
+                      r.row['slip_distribution'].type_of().eq('OBJECT'))
+              .run(db_conn))
+
+count, size_before, size_after = 0, 0, 0
+
+for document in documents:
+    data = {'precision': precision}
+    for key in ('guess_distribution', 'slip_distribution'):
+        distribution = document[key]
+        data[key] = bundle_distribution(
+            deliver_distribution(distribution, document.get('precision')))
+        size_before += len(json.dumps(distribution))
+        size_after += len(json.dumps(data[key]))
+    (r.table(tablename)
+      .get(document['id'])
+      .update(data)
+      .run(db_conn))
+    count += 1
+
+print('converted', count)
+print('distribution bytes before', size_before)
+print('distribution bytes after', size_after)
+
+close_db_connection(db_conn)
@@ -1,6 +1,10 @@
 from modules.model import Model
 from modules.validations import is_required, is_list, is_string, is_one_of
 from models.mixins.entity import EntityMixin
+from database.card_parameters import get_card_parameters, \
+    get_card_parameters_values
+from database.card_difficulty import index_card_difficulty, \
+    remove_card_difficulty
 import rethinkdb as r
 
 
@@ -32,6 +36,26 @@ class Card(EntityMixin, Model):
         }
     })
 
+    indexes = EntityMixin.indexes + (
+        ('unit_id',),
+    )
+
+    @classmethod
+    def unit_accepted_query(cls, unit_id):
+        """
+        Get the latest accepted version of each card in the unit,
+        finding the cards through the `unit_id` index.
+        Leaves out cards whose latest version moved to another unit.
+        """
+
+        entity_ids = (cls.table
+                         .get_all(unit_id, index='unit_id')
+                         .filter(r.row['status'].eq('accepted'))
+                         .get_field('entity_id')
+                         .distinct())
+        return (cls.list_latest_accepted_query(entity_ids)
+                   .filter(r.row['unit_id'].eq(unit_id)))
+
     def validate(self, db_conn):
         """
 
@@ -46,6 +70,41 @@ class Card(EntityMixin, Model):
             errors += self.ensure_no_cycles(db_conn)
         return errors
 
+    def index_accepted(self, db_conn):
+        """
+        Also add accepted assessment cards to the unit's difficulty index,
+        and take the card out of its previous unit's index if it moved.
+        """
+
+        super().index_accepted(db_conn)
+        previous_unit_id = self.get_previous_unit_id(db_conn)
+        if previous_unit_id and previous_unit_id != self['unit_id']:
+            remove_card_difficulty(previous_unit_id, self['entity_id'])
+        if self.has_assessment():
+            params = get_card_parameters({'entity_id': self['entity_id']},
+                                         db_conn) or {}
+            values = get_card_parameters_values(params)
+            index_card_difficulty(self['unit_id'], self['entity_id'],
+                                  values['guess'], values['slip'])
+
+    def get_previous_unit_id(self, db_conn):
+        """
+        Get the unit ID of the latest accepted version
+        other than this one, or None.
+        """
+
+        query = (self.table
+                     .between([self['entity_id'], r.minval],
+                              [self['entity_id'], r.maxval],
+                              index='entity_id_created')
+                     .order_by(index=r.desc('entity_id_created'))
+                     .filter(r.row['status'].eq('accepted') &
+                             r.row['id'].ne(self['id']))
+                     .nth(0)
+                     .default(None))
+        previous = query.run(db_conn)
+        return previous and previous['unit_id']
+
     def is_valid_unit(self, db_conn):
         """
 
@@ -65,8 +124,7 @@ class Card(EntityMixin, Model):
 
         """
 
-        cards = Card.list_by_entity_ids(db_conn, self['require_ids'])
-        if len(self['require_ids']) != len(cards):
+        if not self.find_requires(db_conn):
             return [{'message': 'Didn\'t find all requires.'}]
         return []
 
@@ -6,6 +6,49 @@ from modules.util import uniqid
 from framework.elasticsearch import es
 from modules.util import json_prep
 from modules.util import omit, pick
+from database.util import pluck_fields, stream_query
+from database.requires_graph import get_requires_graph, \
+    build_requires_graph, index_requires, has_requires_path
+
+
+def get_before_bound(before):
+    """
+    Get the upper bound on `created` for a page, given the `created`
+    of the last item of the previous page, as ISO 8601 or a datetime.
+    """
+
+    if not before:
+        return r.maxval
+    if isinstance(before, str):
+        return r.iso8601(before)
+    return r.expr(before)
+
+
+def page_by_created(query, limit=10, before=None):
+    """
+    Order the query newest first, and take the page
+    of entities created before `before`.
+    """
+
+    if before:
+        query = query.filter(r.row['created'] < get_before_bound(before))
+    return query.order_by(r.desc('created')).limit(int(limit))
+
+
+def get_paging_errors(params):
+    """
+    Pages go by `before`, not `skip`.
+    Return errors if the params ask for `skip`,
+    rather than quietly serving the first page again.
+    """
+
+    if 'skip' in params:
+        return [{
+            'name': 'skip',
+            'message': 'Not supported. '
+                       'Pass the `created` of the last item as `before`.',
+        }]
+    return []
 
 
 class EntityMixin(object):
@@ -47,6 +90,12 @@ class EntityMixin(object):
         },
     })
 
+    indexes = (
+        ('entity_id',),
+        ('entity_id_created', [r.row['entity_id'], r.row['created']]),
+        ('require_ids', {'multi': True}),
+    )
+
     def __repr__(self):
         """
         View an easy to read format when debugging.
@@ -58,21 +107,75 @@ class EntityMixin(object):
         )
 
     @classmethod
-    def start_accepted_query(cls):
+    def start_accepted_query(cls, fields=None):
         """
         Begins the query by reducing the table down
         to the latest accepted versions for each.
+        Given `fields`, only keep those fields of each version.
         """
 
         # TODO-2 this query should have an index in card, unit, set
         # TODO-2 is there a way to avoid the cost of this query?
+        query = cls.table.filter(r.row['status'].eq('accepted'))
+        if fields:
+            query = query.pluck('entity_id', 'created', *fields)
+        query = (query.group('entity_id')
+                      .max('created')
+                      .default(None)
+                      .ungroup()
+                      .map(r.row['reduction']))
+        return pluck_fields(query, fields)
+
+    @classmethod
+    def stream_accepted(cls, db_conn, fields=None, batch_size=1000):
+        """
+        Iterate over the latest accepted version of each entity,
+        as `start_accepted_query` would, but fetching `batch_size` versions
+        at a time. Reads the versions in `entity_id_created` order,
+        so the first accepted version of each entity is the latest.
+        Given `fields`, yield only those fields of each version, as dicts.
+        """
+
+        query = (cls.table
+                    .order_by(index=r.desc('entity_id_created'))
+                    .filter(r.row['status'].eq('accepted')))
+        if fields:
+            query = query.pluck('entity_id', *fields)
+        entity_id = None
+        for data in stream_query(query, db_conn, batch_size):
+            if data['entity_id'] == entity_id:
+                continue
+            entity_id = data['entity_id']
+            yield pick(data, fields) if fields else cls(data)
+
+    @classmethod
+    def latest_accepted_query(cls, entity_id):
+        """
+        Get the latest accepted version of the entity, or None,
+        reading only the entity's versions, newest first,
+        from the `entity_id_created` index.
+        """
+
         return (cls.table
+                   .between([entity_id, r.minval], [entity_id, r.maxval],
+                            index='entity_id_created')
+                   .order_by(index=r.desc('entity_id_created'))
                    .filter(r.row['status'].eq('accepted'))
-                   .group('entity_id')
-                   .max('created')
-                   .default(None)
-                   .ungroup()
-                   .map(r.row['reduction']))
+                   .nth(0)
+                   .default(None))
+
+    @classmethod
+    def list_latest_accepted_query(cls, entity_ids, fields=None):
+        """
+        Get the latest accepted version of each entity,
+        leaving out entities without one.
+        Given `fields`, only keep those fields of each version.
+        """
+
+        query = (r.expr(entity_ids)
+                  .map(cls.latest_accepted_query)
+                  .filter(r.row.ne(None)))
+        return pluck_fields(query, fields)
 
     @classmethod
     def get_latest_accepted(cls, db_conn, entity_id):
@@ -83,88 +186,93 @@ class EntityMixin(object):
         if not entity_id:
             return
 
-        # TODO-2 this query should have an index in card, unit, set
-        query = (cls.start_accepted_query()
-                    .filter(r.row['entity_id'] == entity_id)
-                    .limit(1))
+        document = cls.latest_accepted_query(entity_id).run(db_conn)
 
-        documents = list(query.run(db_conn))
-
-        if len(documents) > 0:
-            return cls(documents[0])
+        if document:
+            return cls(document)
 
     @classmethod
-    def list_by_entity_ids(cls, db_conn, entity_ids):
+    def list_by_entity_ids(cls, db_conn, entity_ids, fields=None):
         """
         Get a list of entities by a list of entity IDs.
+        Given `fields`, get only those fields of each entity,
+        as dicts rather than models.
         """
 
         if not entity_ids:
             return []
 
-        query = (cls.start_accepted_query()
-                    .filter(lambda entity:
-                            r.expr(entity_ids)
-                            .contains(entity['entity_id'])))
-
-        docs = query.run(db_conn)
-        return [cls(fields) for fields in docs]
-        # TODO-2 index in unit and set
+        query = cls.list_latest_accepted_query(list(set(entity_ids)), fields)
+        if fields:
+            return list(query.run(db_conn))
+        return [cls(data) for data in query.run(db_conn)]
 
     @classmethod
-    def get_versions(cls, db_conn, entity_id, limit=10, skip=0, **params):
+    def get_versions(cls, db_conn, entity_id, limit=10, before=None,
+                     **params):
         """
-        Get the latest accepted version of the card.
+        Get the versions of the entity, newest first.
+        To get the next page, pass the `created` of the last version
+        as `before`.
+        Routes check for `skip` with `get_paging_errors`.
         """
 
         if not entity_id:
             return []
 
-        # TODO-2 this query should have an index in card, unit, set
         query = (cls.table
-                    .filter(r.row['entity_id'] == entity_id)
-                    .order_by(r.desc('created'))
-                    .skip(skip)
-                    .limit(limit))
+                    .between([entity_id, r.minval],
+                             [entity_id, get_before_bound(before)],
+                             index='entity_id_created')
+                    .order_by(index=r.desc('entity_id_created'))
+                    .limit(int(limit)))
 
         return [cls(fields) for fields in query.run(db_conn)]
 
     @classmethod
-    def list_requires(cls, db_conn, entity_id, limit=10, skip=0, **params):
+    def list_requires(cls, db_conn, entity_id, limit=10, before=None,
+                      **params):
         """
-        Get the same kind of entity that this one requires.
+        Get the same kind of entity that this one requires,
+        newest first. Paginates as `get_versions` does.
         """
 
         if not entity_id:
             return []
 
         entity = cls.get_latest_accepted(db_conn, entity_id=entity_id)
+        if not entity or not entity['require_ids']:
+            return []
 
-        # TODO-2 this query should have an index in card and unit
-        query = (cls.start_accepted_query()
-                    .filter(lambda _: r.expr(entity['requires'])
-                                       .contains(_['entity_id']))
-                    .order_by(r.desc('created'))
-                    .skip(skip)
-                    .limit(limit))
+        query = page_by_created(
+            cls.list_latest_accepted_query(entity['require_ids']),
+            limit, before)
 
         return [cls(fields) for fields in query.run(db_conn)]
 
     @classmethod
-    def list_required_by(cls, db_conn, entity_id, limit=10, skip=0, **params):
+    def list_required_by(cls, db_conn, entity_id, limit=10, before=None,
+                         **params):
         """
-        Get the same kind of entity that requires this one.
+        Get the same kind of entity that requires this one,
+        newest first. Paginates as `get_versions` does.
+        Only counts entities whose latest accepted version
+        still requires this one.
         """
 
         if not entity_id:
             return []
 
-        # TODO-2 this query should have an index in card and unit
-        query = (cls.start_accepted_query()
-                    .filter(r.row['requires'].contains(entity_id))
-                    .order_by(r.desc('created'))
-                    .skip(skip)
-                    .limit(limit))
+        entity_ids = (cls.table
+                         .get_all(entity_id, index='require_ids')
+                         .filter(r.row['status'].eq('accepted'))
+                         .get_field('entity_id')
+                         .distinct())
+        query = page_by_created(
+            cls.list_latest_accepted_query(entity_ids)
+               .filter(r.row['require_ids'].default([])
+                                           .contains(entity_id)),
+            limit, before)
 
         return [cls(fields) for fields in query.run(db_conn)]
 
@@ -212,29 +320,51 @@ class EntityMixin(object):
                 body=json_prep(self.deliver()),
                 id=self['entity_id'],
             )
-        return super().save(db_conn)
+        instance, errors = super().save(db_conn)
+        if not errors and self['status'] == 'accepted':
+            self.index_accepted(db_conn)
+        return instance, errors
 
-    def find_requires_cycle(self, db_conn):
+    def index_accepted(self, db_conn):
         """
-        Inspect own requires to see if a cycle is formed.
+        Update the cached graphs and indexes with this accepted version.
+        Anything that accepts a version without `save` must call this too.
         """
 
-        seen = set()
-        main_id = self['entity_id']
-        found = {'cycle': False}
+        if 'require_ids' in self.schema:
+            index_requires(self.tablename, self['entity_id'],
+                           self['require_ids'])
 
-        def _(require_ids):
-            if found['cycle']:
-                return
-            entities = self.__class__.list_by_entity_ids(db_conn, require_ids)
-            for entity in entities:
-                if entity['entity_id'] == main_id:
-                    found['cycle'] = True
-                    break
-                if entity['entity_id'] not in seen:
-                    seen.add(entity['entity_id'])
-                    _(entity['require_ids'])
+    @classmethod
+    def get_requires_graph(cls, db_conn):
+        """
+        Get the require edges of every latest accepted entity,
+        as a dict of entity ID: require IDs.
+        Builds the graph with one query the first time.
+        """
 
-        _(self['require_ids'])
+        graph = get_requires_graph(cls.tablename)
+        if graph is not None:
+            return graph
+        query = cls.start_accepted_query(fields=('entity_id', 'require_ids'))
+        graph = {document['entity_id']: document.get('require_ids') or []
+                 for document in query.run(db_conn)}
+        build_requires_graph(cls.tablename, graph)
+        return graph
+
+    def find_requires(self, db_conn):
+        """
+        Are all own requires accepted entities?
+        """
+
+        graph = self.get_requires_graph(db_conn)
+        return all(require_id in graph for require_id in self['require_ids'])
+
+    def find_requires_cycle(self, db_conn):
+        """
+        Inspect own requires to see if a cycle is formed.
+        """
 
-        return found['cycle']
+        graph = self.get_requires_graph(db_conn)
+        return has_requires_path(graph, self['require_ids'],
+                                 self['entity_id'])
@@ -5,6 +5,8 @@ from models.unit import Unit
 from modules.validations import is_required, is_string, is_list, is_one_of, \
     has_min_length
 from modules.memoize_redis import memoize_redis
+from database.set_members import get_set_members, build_set_members, \
+    index_set_members, list_ancestor_set_ids, has_member_path
 
 
 class Set(EntityMixin, Model):
@@ -44,55 +46,71 @@ class Set(EntityMixin, Model):
 
     def is_valid_members(self, db_conn):
         """
-
+        Ensure every member is an accepted unit or set.
+        Looks up the members with one query per kind,
+        and reports every invalid member.
         """
 
-        # TODO-3 this is going to be slow
-        for member_desc in self['members']:
-            query = (r.table(member_desc['kind'] + 's')
+        ids_by_kind = {}
+        for member in self['members']:
+            ids_by_kind.setdefault(member['kind'], set()).add(member['id'])
+
+        found_ids = set()
+        for kind, ids in ids_by_kind.items():
+            query = (r.table(kind + 's')
+                      .get_all(*ids, index='entity_id')
                       .filter(r.row['status'].eq('accepted'))
-                      .filter(r.row['entity_id'] == member_desc['id']))
-            vs = [e for e in query.run(db_conn)]
-            if not vs:
-                return [{
-                    'message': 'Not a valid entity.',
-                    'value': member_desc['id'],
-                }]
+                      .pluck('entity_id'))
+            found_ids.update((kind, document['entity_id'])
+                             for document in query.run(db_conn))
 
-        return []
+        return [{
+            'name': 'members.%i.id' % i,
+            'message': 'Not a valid entity.',
+            'value': member['id'],
+        } for i, member in enumerate(self['members'])
+            if (member['kind'], member['id']) not in found_ids]
 
     def ensure_no_cycles(self, db_conn):
         """
         Ensure no membership cycles form.
         """
-        seen = set()
-        main_id = self['entity_id']
-        found = {'cycle': False}
-
-        def _(members):
-            if found['cycle']:
-                return
-            entity_ids = [
-                member['id']
-                for member in members
-                if member['kind'] == 'set'
-            ]
-            entities = Set.list_by_entity_ids(db_conn, entity_ids)
-            for entity in entities:
-                if entity['entity_id'] == main_id:
-                    found['cycle'] = True
-                    break
-                if entity['entity_id'] not in seen:
-                    seen.add(entity['entity_id'])
-                    _(entity['members'])
-
-        _(self['members'])
-
-        if found['cycle']:
+
+        members = Set.get_members_graph(db_conn)
+        member_ids = [member['id'] for member in self['members']
+                      if member['kind'] == 'set']
+        if has_member_path(members, member_ids, self['entity_id']):
             return [{'message': 'Found a cycle in membership.'}]
 
         return []
 
+    def index_accepted(self, db_conn):
+        """
+        Also update the members graph once the set is accepted.
+        """
+
+        super().index_accepted(db_conn)
+        index_set_members(self['entity_id'],
+                          [member['id'] for member in self['members']])
+
+    @classmethod
+    def get_members_graph(cls, db_conn):
+        """
+        Get the member IDs of every latest accepted set,
+        as a dict of set ID: member IDs.
+        Builds the graph with one query the first time.
+        """
+
+        members = get_set_members()
+        if members is not None:
+            return members
+        query = cls.start_accepted_query(fields=('entity_id', 'members'))
+        members = {document['entity_id']: [member['id'] for member
+                                           in document['members']]
+                   for document in query.run(db_conn)}
+        build_set_members(members)
+        return members
+
     @classmethod
     def get_all(cls, db_conn, limit=10, skip=0, **params):
         query = (cls.start_accepted_query()
@@ -101,40 +119,29 @@ class Set(EntityMixin, Model):
                     .limit(limit))
         return [cls(document) for document in query.run(db_conn)]
 
+    @classmethod
+    def list_ids_by_unit_id(cls, db_conn, unit_id):
+        """
+        Get the IDs of the sets which contain the given member ID,
+        directly or through other sets.
+        """
+
+        set_ids = list_ancestor_set_ids(unit_id)
+        if set_ids is None:
+            cls.get_members_graph(db_conn)
+            set_ids = list_ancestor_set_ids(unit_id) or []
+        return set_ids
+
     @classmethod
     def list_by_unit_id(cls, db_conn, unit_id):
         """
         Get a list of sets which contain the given member ID. Recursive.
-
-        # TODO-2 is there a way to simplify this method?
         """
 
         def _():
-            # *** First, find the list of sets
-            #     directly containing the member ID. ***
-
-            query = (cls.start_accepted_query()
-                        .filter(r.row['members'].contains(
-                            lambda member: member['id'] == unit_id
-                        )))
-            sets = query.run(db_conn)
-
-            # *** Second, find all the sets containing
-            #     those sets... recursively. ***
-
-            found_sets, all_sets = sets, []
-
-            while found_sets:
-                set_ids = {set_['entity_id'] for set_ in found_sets}
-                all_sets += found_sets
-                query = (cls.start_accepted_query()
-                            .filter(r.row['members'].contains(
-                                lambda member:
-                                    r.expr(set_ids).contains(member['id'])
-                            )))
-                found_sets = query.run(db_conn)
-
-            return all_sets
+            set_ids = cls.list_ids_by_unit_id(db_conn, unit_id)
+            return [set_.data
+                    for set_ in cls.list_by_entity_ids(db_conn, set_ids)]
 
         key = 'list_sets_by_unit_id_{id}'.format(id=unit_id)
         return [Set(data) for data in memoize_redis(key, _)]
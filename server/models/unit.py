@@ -44,8 +44,7 @@ class Unit(EntityMixin, Model):
 
         """
 
-        units = Unit.list_by_entity_ids(db_conn, self['require_ids'])
-        if len(self['require_ids']) != len(units):
+        if not self.find_requires(db_conn):
             return [{'message': 'Didn\'t find all requires.'}]
         return []
 
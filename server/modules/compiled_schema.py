@@ -0,0 +1,253 @@
+"""
+Compile a schema's fields into functions that tidy, add defaults to,
+validate, bundle, and deliver a document.
+
+Walking the schema dict on every call checks each field for `embed`,
+`embed_many`, `validate`, and so on, every time. Here we walk the schema
+once, the first time it's used, and build a closure per field that does
+only what that field needs. Along the way, embedded fields are filled in
+with an empty dict or list.
+
+Only `tidy` copies the document; the others change the document in place,
+so each pipeline makes one copy up front, with `tidy` or `copy_document`.
+"""
+
+from copy import deepcopy
+
+compiled_schemas = {}
+
+
+def get_compiled_schema(fields):
+    """
+    Get the compiled functions for the schema's fields,
+    compiling them the first time.
+    """
+
+    key = id(fields)
+    if key not in compiled_schemas:
+        # Hold on to the fields, so the ID can't go to another dict
+        compiled_schemas[key] = (fields, compile_schema(fields))
+    return compiled_schemas[key][1]
+
+
+def compile_schema(fields):
+    """
+    Compile the schema's fields into a dict of functions.
+    """
+
+    return {
+        'tidy': compile_tidy(fields),
+        'defaults': compile_pipeline(fields, get_default_step),
+        'validate': compile_validate(fields),
+        'bundle': compile_pipeline(fields, get_bundle_step),
+        'deliver': compile_pipeline(fields, get_deliver_step),
+        'unique': tuple(name for name, field_schema in fields.items()
+                        if field_schema.get('unique')),
+    }
+
+
+def copy_document(data):
+    """
+    Copy the dicts and lists of the document, sharing everything else.
+    Much cheaper than `deepcopy` for documents from JSON or the database.
+    """
+
+    if isinstance(data, dict):
+        return {key: copy_document(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [copy_document(value) for value in data]
+    return data
+
+
+def compile_tidy(fields):
+    """
+    Compile a function which copies the document,
+    leaving out any fields that aren't part of the schema.
+    """
+
+    steps = []
+    for name, field_schema in fields.items():
+        if 'embed' in field_schema:
+            steps.append((name, compile_tidy(field_schema['embed'])))
+        elif 'embed_many' in field_schema:
+            steps.append((name, compile_tidy_many(field_schema['embed_many'])))
+        else:
+            steps.append((name, copy_document))
+
+    def tidy(data):
+        return {name: step(data[name]) for name, step in steps
+                if name in data}
+    return tidy
+
+
+def compile_tidy_many(fields):
+    """
+    Compile a function which tidies each document in a list.
+    """
+
+    tidy = compile_tidy(fields)
+
+    def tidy_many(data):
+        return [tidy(d) for d in data]
+    return tidy_many
+
+
+def compile_steps(fields, get_step):
+    """
+    Compile a function which runs each field's step,
+    then goes into the field's embedded fields, if any.
+    `get_step` returns the step for a field, or None if nothing to do.
+    Every step takes the data, the prefix of the field's name,
+    and a context, such as a list of errors or the access.
+    """
+
+    steps = []
+    for name, field_schema in fields.items():
+        step = get_step(name, field_schema)
+        if step:
+            steps.append(step)
+        if 'embed' in field_schema:
+            steps.append(compile_embed(
+                name, compile_steps(field_schema['embed'], get_step)))
+        elif 'embed_many' in field_schema:
+            steps.append(compile_embed_many(
+                name, compile_steps(field_schema['embed_many'], get_step)))
+
+    def run(data, prefix, context):
+        for step in steps:
+            step(data, prefix, context)
+        return data
+    return run
+
+
+def compile_pipeline(fields, get_step):
+    """
+    Compile a function which runs the steps over the whole document,
+    in place, and returns the document.
+    """
+
+    run = compile_steps(fields, get_step)
+
+    def pipeline(data, context=None):
+        return run(data, '', context)
+    return pipeline
+
+
+def compile_embed(name, run):
+    """
+    Compile a step which runs the embedded fields' steps.
+    """
+
+    def step(data, prefix, context):
+        data[name] = data.get(name) or {}
+        run(data[name], prefix + name + '.', context)
+    return step
+
+
+def compile_embed_many(name, run):
+    """
+    Compile a step which runs the embedded fields' steps on each item.
+    """
+
+    def step(data, prefix, context):
+        data[name] = data.get(name) or []
+        for i, d in enumerate(data[name]):
+            run(d, '%s%s.%i.' % (prefix, name, i), context)
+    return step
+
+
+def get_default_step(name, field_schema):
+    """
+    Set the field's default if the field is None.
+    Dict and list defaults are copied, so documents don't share them.
+    """
+
+    if 'default' not in field_schema:
+        return None
+    default = field_schema['default']
+    if hasattr(default, '__call__'):
+        get_default = default
+    elif isinstance(default, (dict, list)):
+        def get_default():
+            return deepcopy(default)
+    else:
+        def get_default():
+            return default
+
+    def step(data, prefix, context):
+        if data.get(name) is None:
+            data[name] = get_default()
+    return step
+
+
+def get_validate_step(name, field_schema):
+    """
+    Run the field's validations, adding the first error, if any.
+    """
+
+    if 'validate' not in field_schema:
+        return None
+    validations = [(fn[0], fn[1:]) if isinstance(fn, (list, tuple))
+                   else (fn, ()) for fn in field_schema['validate']]
+
+    def step(data, prefix, errors):
+        value = data.get(name)
+        for fn, args in validations:
+            error = fn(value, *args)
+            if error:
+                errors.append({
+                    'name': prefix + name,
+                    'message': error,
+                })
+                break
+    return step
+
+
+def compile_validate(fields):
+    """
+    Compile a function which returns a list of errors for the document.
+    """
+
+    run = compile_steps(fields, get_validate_step)
+
+    def validate(data):
+        errors = []
+        run(data, '', errors)
+        return errors
+    return validate
+
+
+def get_bundle_step(name, field_schema):
+    """
+    Call the field's `bundle` on the field, if set.
+    """
+
+    if 'bundle' not in field_schema:
+        return None
+    bundle = field_schema['bundle']
+
+    def step(data, prefix, context):
+        if data.get(name):
+            data[name] = bundle(data[name])
+    return step
+
+
+def get_deliver_step(name, field_schema):
+    """
+    Remove the field if the access isn't allowed,
+    otherwise call the field's `deliver` on the field, if set.
+    """
+
+    access_list = field_schema.get('access')
+    deliver = field_schema.get('deliver')
+    if access_list is None and deliver is None:
+        return None
+
+    def step(data, prefix, access):
+        if (access_list is not None and
+                data.get(name) is not None and
+                access not in access_list):
+            del data[name]
+        elif deliver and data.get(name):
+            data[name] = deliver(data[name])
+    return step
@@ -35,6 +35,12 @@ card_map = {
     # 'writing': WritingCard,
 }
 
+entity_map = {
+    'card': Card,
+    'unit': Unit,
+    'set': Set,
+}
+
 
 def get_latest_accepted(db_conn, kind, entity_id):
     """
@@ -124,31 +130,35 @@ def flip_card_into_kind(card):
         return card_map[kind](card.data)
 
 
+def flip_cards_into_kind(cards):
+    """
+    Given a list of general card models, return a list of card models
+    in their kinds, with None for cards of unknown kinds.
+    """
+
+    return [flip_card_into_kind(card) for card in cards]
+
+
 def flush_entities(db_conn, descs):
     """
     Given a list of kinds and entity_ids,
-    return a list filled out with entities.
+    return a list filled out with entities, in the same order.
+    Looks up each kind in one query. Entities not found are None.
     """
 
-    output = []
-
+    entity_ids_by_kind = {}
     for desc in descs:
-        if desc['kind'] == 'card':
-            card = Card.get_latest_accepted(db_conn, entity_id=desc['id'])
-            card = flip_card_into_kind(card)
-            if card:
-                output.append(card)
-        elif desc['kind'] == 'unit':
-            output.append(Unit.get_latest_accepted(
-                db_conn,
-                entity_id=desc['id']
-            ))
-        elif desc['kind'] == 'set':
-            output.append(Set.get_latest_accepted(
-                db_conn,
-                entity_id=desc['id']
-            ))
-        else:
-            output.append(None)
-
-    return output
+        if desc['kind'] in entity_map:
+            entity_ids_by_kind.setdefault(desc['kind'], set()).add(desc['id'])
+
+    entities_by_kind = {}
+    for kind, entity_ids in entity_ids_by_kind.items():
+        entities = entity_map[kind].list_by_entity_ids(db_conn,
+                                                       list(entity_ids))
+        if kind == 'card':
+            entities = flip_cards_into_kind(entities)
+        entities_by_kind[kind] = {entity['entity_id']: entity
+                                  for entity in entities if entity}
+
+    return [entities_by_kind.get(desc['kind'], {}).get(desc['id'])
+            for desc in descs]
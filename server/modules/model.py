@@ -1,8 +1,8 @@
 import rethinkdb as r
-from modules.util import uniqid, omit, pick, extend
-from modules.content import get as c
+from modules.util import uniqid, omit, extend
 from modules.classproperty import classproperty
-from copy import deepcopy
+from modules.compiled_schema import get_compiled_schema, copy_document
+from database.util import stream_query, find_unique_errors
 
 # TODO-2 Remove OOP based model. Instead, just use simple functions,
 #      preferring pure functions where possible.
@@ -12,22 +12,6 @@ def update_modified(field):
     return r.now()
 
 
-def iter(fn, data, schema, prefix=''):
-    for field_name, field_schema in schema.items():
-        fn(data, field_name, field_schema, prefix)
-
-        if 'embed' in field_schema:
-            data[field_name] = data.get(field_name) or {}
-            iter(fn, data[field_name], field_schema['embed'],
-                 '%s%s.' % (prefix, field_name))
-
-        elif 'embed_many' in field_schema:
-            data[field_name] = data.get(field_name) or []
-            for i, d in enumerate(data[field_name]):
-                iter(fn, d, field_schema['embed_many'],
-                     '%s%s.%i.' % (prefix, field_name, i))
-
-
 class Model(object):
     strict = True
     # strict = True will remove any fields not defined in the schema
@@ -63,6 +47,7 @@ class Model(object):
     # - unique:     True will check to make sure no other row has
     #               the same value not needed on `id` field,
     #               as it is the primary key
+    #               needs a secondary index of the same name in `indexes`
     # - embed:      list of fields contained in the field
     # - embed_many: list of fields contained in a list of dicts
 
@@ -114,6 +99,14 @@ class Model(object):
         assert self.tablename, 'You must provide a tablename.'
         return r.table(self.tablename)
 
+    @classproperty
+    def compiled(self):
+        """
+        Refer to `self.compiled` and get the schema's compiled functions.
+        """
+
+        return get_compiled_schema(self.schema)
+
     @classmethod
     def get(cls, db_conn, **params):
         """
@@ -136,16 +129,32 @@ class Model(object):
             return cls(data)
 
     @classmethod
-    def list(cls, db_conn, **params):
+    def list(cls, db_conn, fields=None, **params):
         """
         Get a list of models matching the provided keyword arguments.
         Return empty array when no models match.
+        Given `fields`, get only those fields of each document,
+        as dicts rather than models, as the models would fill in defaults.
+        """
+
+        query = cls.table.filter(params)
+        if fields:
+            return list(query.pluck(*fields).run(db_conn))
+        return [cls(data) for data in query.run(db_conn)]
+
+    @classmethod
+    def stream(cls, db_conn, fields=None, batch_size=1000, **params):
+        """
+        Iterate over the models matching the provided keyword arguments,
+        as `list` would, fetching `batch_size` documents at a time.
+        Given `fields`, yield only those fields of each document, as dicts.
         """
 
-        data_list = (cls.table
-                        .filter(params)
-                        .run(db_conn))
-        return [cls(data) for data in data_list]
+        query = cls.table.filter(params)
+        if fields:
+            query = query.pluck(*fields)
+        for data in stream_query(query, db_conn, batch_size):
+            yield data if fields else cls(data)
 
     @classmethod
     def insert(cls, db_conn, data):
@@ -181,8 +190,10 @@ class Model(object):
             return self, errors
         data = self.bundle()
         self.id = data['id']
-        self.table.insert(data, conflict='update').run(db_conn)
-        self.sync(db_conn)
+        result = (self.table
+                      .insert(data, conflict='update', return_changes='always')
+                      .run(db_conn))
+        extend(self.data, result['changes'][0]['new_val'])
         return self, []
 
     def sync(self, db_conn):
@@ -242,16 +253,7 @@ class Model(object):
         Later, we might want an option to throw errors instead.
         """
 
-        def _(data, schema):
-            for name, field_schema in schema.items():
-                if 'embed' in field_schema and name in data:
-                    data[name] = _(data[name], field_schema['embed'])
-                elif 'embed_many' in field_schema and name in data:
-                    for i, d in enumerate(data[name]):
-                        data[name][i] = _(d, field_schema['embed_many'])
-            return pick(data, schema.keys())
-
-        self.data = _(self.data, self.schema)
+        self.data = self.compiled['tidy'](self.data)
         return []
 
     def validate_fields(self):
@@ -259,67 +261,22 @@ class Model(object):
         Iterate over the schema, ensuring that everything matches up.
         """
 
-        errors = []
-
-        def _(data, field_name, field_schema, prefix):
-            if 'validate' not in field_schema:
-                return
-
-            error = None
-            for fn in field_schema['validate']:
-                if isinstance(fn, (list, tuple)):
-                    error = fn[0](data.get(field_name), *fn[1:])
-                else:
-                    error = fn(data.get(field_name))
-                if error:
-                    errors.append({
-                        'name': prefix + field_name,
-                        'message': error,
-                    })
-                    break
-
-        iter(_, self.data, self.schema)
-        return errors
+        return self.compiled['validate'](self.data)
 
     def test_unique(self, db_conn):
         """
         Test all top-level fields marked as unique.
         """
 
-        errors = []
-
-        def _(data, field_name, field_schema, prefix):
-            if ('unique' not in field_schema or
-                    data.get(field_name) is None):
-                return
-
-            query = (self.table
-                         .filter(r.row[field_name] == data.get(field_name))
-                         .filter(r.row['id'] != self['id']))
-
-            if len(list(query.run(db_conn))) > 0:
-                errors.append({
-                    'name': prefix + field_name,
-                    'message': c('unique'),
-                })
-
-        iter(_, self.data, self.schema)
-        return errors
+        return find_unique_errors(self.table, self.compiled['unique'],
+                                  [self.data], db_conn)[0]
 
     def defaults(self):
         """
         Set up defaults for data if not applied.
         """
 
-        def _(data, field_name, field_schema, prefix):
-            if 'default' in field_schema and data.get(field_name) is None:
-                if hasattr(field_schema['default'], '__call__'):
-                    data[field_name] = field_schema['default']()
-                else:
-                    data[field_name] = field_schema['default']
-
-        iter(_, self.data, self.schema)
-        return self.data
+        return self.compiled['defaults'](self.data)
 
     def bundle(self):
         """
@@ -328,13 +285,8 @@ class Model(object):
         in the schema if present.
         """
 
-        def _(data, field_name, field_schema, prefix):
-            if 'bundle' in field_schema and data.get(field_name):
-                data[field_name] = field_schema['bundle'](data[field_name])
-
-        data = deepcopy(self.data)
-        iter(_, data, self.schema)
-        return data
+        data = copy_document(self.data)
+        return self.compiled['bundle'](data)
 
     def deliver(self, access=None):
         """
@@ -343,15 +295,5 @@ class Model(object):
         in the schema if present.
         """
 
-        def _(data, field_name, field_schema, prefix):
-            if ('access' in field_schema and
-                    data.get(field_name) is not None and
-                    access not in field_schema['access']):
-                del data[field_name]
-
-            elif 'deliver' in field_schema and data.get(field_name):
-                data[field_name] = field_schema['deliver'](data[field_name])
-
-        data = deepcopy(self.data)
-        iter(_, data, self.schema)
-        return data
+        data = copy_document(self.data)
+        return self.compiled['deliver'](data, access)
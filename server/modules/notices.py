@@ -1,5 +1,6 @@
 from database.notice import insert_notice
 from database.follow import get_user_ids_by_followed_entity
+from database.review_schedule import list_due_users, remove_due_users
 # TODO-2 send out notices via email per user preference
 
 
@@ -17,3 +18,22 @@ def send_notices(db_conn, entity_id, entity_kind, notice_kind, notice_data):
         }, db_conn)
         if errors:
             raise Exception(errors)
+
+
+def send_come_back_notices(db_conn, now=None):
+    """
+    Send a come back notice to every user with units to review.
+    Each user gets one notice until their review schedule changes.
+    Return the user IDs.
+    """
+
+    user_ids = list_due_users(now)
+    for user_id in user_ids:
+        notice, errors = insert_notice({
+            'user_id': user_id,
+            'kind': 'come_back',
+        }, db_conn)
+        if errors:
+            raise Exception(errors)
+    remove_due_users(user_ids)
+    return user_ids
@@ -5,8 +5,11 @@ from random import shuffle, random
 from math import floor
 from functools import reduce
 from database.response import get_latest_response
-from database.card_parameters import get_card_parameters, \
+from database.card_parameters import list_card_parameters, \
     get_card_parameters_values
+from database.card_difficulty import has_card_difficulty_index, \
+    build_card_difficulty_index, list_cards_by_difficulty, \
+    remove_card_difficulty
 
 
 p_assessment_map = {
@@ -34,12 +37,23 @@ def choose_card(db_conn, user, unit):
     Return a card instance.
     """
 
+    previous_response = get_latest_response(user['id'], unit['entity_id'],
+                                            db_conn)
+    return choose_card_given(db_conn, unit, previous_response)
+
+
+def choose_card_given(db_conn, unit, previous_response):
+    """
+    Choose an appropriate card, given the learner's latest response
+    in the unit, or None.
+    Return a card instance.
+    """
+
     # TODO-3 simplify this method
 
     unit_id = unit['entity_id']
-    query = (Card.start_accepted_query()
-                 .filter({'unit_id': unit_id})
-                 .sample(10))  # TODO-2 index
+    query = (Card.unit_accepted_query(unit_id)
+                 .sample(10))
     # TODO-3 does this belong as a model method?
     # TODO-2 is the sample value decent?
     # TODO-2 has the learner seen this card recently?
@@ -48,7 +62,6 @@ def choose_card(db_conn, user, unit):
     if not len(cards):
         return None
 
-    previous_response = get_latest_response(user['id'], unit_id, db_conn)
     if previous_response:
         learned = previous_response['learned']
         # Don't allow the previous card as the next card
@@ -67,21 +80,11 @@ def choose_card(db_conn, user, unit):
     if choose_assessment:
         if not len(assessment):
             return nonassessment[0]
-        for card in assessment:
-            params = get_card_parameters(
-                {'entity_id': card['entity_id']},
-                db_conn
-            )
-            if params:
-                values = get_card_parameters_values(params)
-                guess = values['guess']
-                slip = values['slip']
-                correct = calculate_correct(guess, slip, learned)
-                if 0.25 < correct < 0.75:
-                    return card
-            else:
-                return card
-        return assessment[0]
+        previous_card_id = (previous_response['card_id']
+                            if previous_response else None)
+        card = choose_assessment_card(db_conn, unit_id, learned,
+                                      previous_card_id)
+        return card or assessment[0]
 
     if len(nonassessment):
         return nonassessment[0]
@@ -90,3 +93,90 @@ def choose_card(db_conn, user, unit):
         return assessment[0]
 
     return None
+
+
+def get_learned_bucket(learned):
+    """
+    Group learned values by tenths, as the chooser does
+    when deciding on an assessment card.
+    Return a string, so it can be a JSON key.
+    """
+
+    return str(floor(learned * 10))
+
+
+def get_difficulty_range(learned, min_correct=0.25, max_correct=0.75):
+    """
+    Given learned, find the range of difficulty that could contain cards
+    with correct between min_correct and max_correct.
+
+    Correct moves linearly with learned, from guess at 0 to 1 - slip at 1,
+    and difficulty is correct at 0.5. As 1 - slip - guess is between 0 and 1
+    for all non-degenerate cards, the range widens by how far learned is
+    from 0.5. The range may contain cards outside the band,
+    so check each card with `calculate_correct` after.
+    """
+
+    return (min_correct - max(0, learned - 0.5),
+            max_correct + max(0, 0.5 - learned))
+
+
+def ensure_card_difficulty_index(db_conn, unit_id):
+    """
+    Build the unit's card difficulty index if it doesn't exist yet.
+    """
+
+    if has_card_difficulty_index(unit_id):
+        return
+    query = Card.unit_accepted_query(unit_id)
+    card_ids = [data['entity_id']
+                for data in query.run(db_conn)
+                if Card(data).has_assessment()]
+    params_by_id = {params['entity_id']: params
+                    for params in list_card_parameters(card_ids, db_conn)}
+    cards_values = []
+    for card_id in card_ids:
+        values = get_card_parameters_values(params_by_id.get(card_id, {}))
+        values['entity_id'] = card_id
+        cards_values.append(values)
+    build_card_difficulty_index(unit_id, cards_values)
+
+
+def choose_assessment_card(db_conn, unit_id, learned, previous_card_id=None):
+    """
+    Use the unit's card difficulty index to find an assessment card
+    the learner has between a 25% and 75% chance of answering well.
+    Return a card instance, or None if there's no such card.
+    """
+
+    ensure_card_difficulty_index(db_conn, unit_id)
+    min_difficulty, max_difficulty = get_difficulty_range(learned)
+    candidates = filter_assessment_candidates(
+        list_cards_by_difficulty(unit_id, min_difficulty, max_difficulty),
+        learned,
+        previous_card_id
+    )
+    shuffle(candidates)
+    for values in candidates:
+        card = Card.get_latest_accepted(db_conn, values['entity_id'])
+        if card and card['unit_id'] == unit_id and card.has_assessment():
+            return card
+        remove_card_difficulty(unit_id, values['entity_id'])
+    return None
+
+
+def filter_assessment_candidates(cards_values, learned, previous_card_id=None):
+    """
+    Given the guess and slip values of cards, keep the cards the learner
+    has between a 25% and 75% chance of answering well,
+    other than the previous card.
+    """
+
+    return [
+        values
+        for values in cards_values
+        if values['entity_id'] != previous_card_id
+        and 0.25 < calculate_correct(values['guess'],
+                                     values['slip'],
+                                     learned) < 0.75
+    ]
@@ -0,0 +1,304 @@
+"""
+Write-behind updates for card parameters.
+
+Responding to a card only reads the card's parameters. The observation
+(score and prior learned) goes on a Redis queue, and a background worker
+(see `card_updates_worker.py`) applies the queue in batches, in order
+per card, writing each card's parameters once per batch.
+
+Each observation has a sequence number, and each card's parameters
+remember the last sequence number applied, so replaying a batch after
+a failure doesn't apply an observation twice, and nothing is lost.
+Sequence numbers are taken and observations queued in one atomic step,
+so the queue is always in sequence order. Observations a card fails to
+save move to a dead letter list, so they don't hold up the queue.
+Once the cause is fixed, `requeue_dead_card_updates` moves them back
+onto the queue; the worker warns while the dead letter list grows.
+
+Each card also keeps a Redis HyperLogLog of the learners who responded,
+so counting them doesn't need to scan the responses.
+"""
+
+import json
+import numpy as np
+from framework.redis import redis
+from database.card_parameters import list_card_parameters, \
+    get_distribution, bundle_distribution, insert_card_parameters, \
+    update_card_parameters
+from database.card_difficulty import index_card_difficulty
+from modules.sequencer.update import replay_distributions
+from modules.sequencer.pmf_array import get_guess_pmf_array_value, \
+    get_slip_pmf_array_value
+from modules.sequencer.params import precision
+from modules.util import uniqid, extend
+
+queue_key = 'card_updates_queue'
+sequence_key = 'card_updates_sequence'
+lock_key = 'card_updates_lock'
+dead_key = 'card_updates_dead'
+learners_key = 'card_learners_{card_id}'
+
+# Reserve a sequence number for each observation, and queue them,
+# adding `seq` to the front of each JSON object, in one step.
+# Returns the first sequence number.
+queue_script = redis.register_script("""
+local last_seq = redis.call('INCRBY', KEYS[1], #ARGV)
+local first_seq = last_seq - #ARGV + 1
+for i, observation in ipairs(ARGV) do
+    redis.call('RPUSH', KEYS[2], '{"seq": ' .. (first_seq + i - 1) .. ', '
+                                 .. string.sub(observation, 2))
+end
+return first_seq
+""")
+
+# Extend the lock, if this worker still holds it.
+renew_script = redis.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+""")
+
+# Release the lock, if this worker still holds it.
+release_script = redis.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+""")
+
+# Move the failed observations to the dead letter list, and take the batch
+# off the queue, only if this worker still holds the lock.
+finish_script = redis.register_script("""
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[3], ARGV[i])
+end
+redis.call('LTRIM', KEYS[2], ARGV[2], -1)
+return 1
+""")
+
+
+# Move dead observations back onto the queue, with new sequence numbers,
+# as later observations may have moved the card's `last_seq` past the old.
+# Returns the number moved.
+requeue_script = redis.register_script("""
+local dead = redis.call('LRANGE', KEYS[3], 0, ARGV[1] - 1)
+for i, observation in ipairs(dead) do
+    local seq = redis.call('INCR', KEYS[1])
+    local requeued = string.gsub(observation, '^{"seq": %d+, ',
+                                 '{"seq": ' .. seq .. ', ')
+    redis.call('RPUSH', KEYS[2], requeued)
+end
+redis.call('LTRIM', KEYS[3], #dead, -1)
+return #dead
+""")
+
+
+def queue_card_update(card_id, unit_id, score, learned, user_id=None):
+    """
+    Add an observation to the queue, given the learned value
+    from before the response.
+    """
+
+    return queue_card_updates([{
+        'card_id': card_id,
+        'unit_id': unit_id,
+        'user_id': user_id,
+        'score': score,
+        'learned': learned,
+    }])[0]
+
+
+def queue_card_updates(observations):
+    """
+    Add many observations to the queue, in order,
+    reserving their sequence numbers in the same atomic step,
+    so a later sequence number never comes before an earlier one.
+    """
+
+    if not observations:
+        return []
+    first_seq = queue_script(
+        keys=[sequence_key, queue_key],
+        args=[json.dumps(observation) for observation in observations])
+    return [extend({}, observation, {'seq': first_seq + i})
+            for i, observation in enumerate(observations)]
+
+
+def flush_card_updates(db_conn, limit=1000, lock_time=60):
+    """
+    Apply up to `limit` queued observations to the card parameters.
+    Only one worker flushes at a time; the worker renews its lock
+    as it goes, and only takes the batch off the queue if it still
+    holds the lock. Observations of cards that fail to save
+    move to the dead letter list.
+    Returns the number of observations taken off the queue.
+    """
+
+    lock = uniqid()
+    if not redis.set(lock_key, lock, ex=lock_time, nx=True):
+        return 0
+    try:
+        raw = redis.lrange(queue_key, 0, limit - 1)
+        if not raw:
+            return 0
+        observations = [json.loads(item.decode()) for item in raw]
+        failed_card_ids = apply_card_updates(
+            db_conn, observations,
+            renew=lambda: renew_script(keys=[lock_key],
+                                       args=[lock, lock_time]))
+        dead = [item for item, observation in zip(raw, observations)
+                if observation['card_id'] in failed_card_ids]
+        if not finish_script(keys=[lock_key, queue_key, dead_key],
+                             args=[lock, len(raw)] + dead):
+            return 0
+        return len(raw)
+    finally:
+        release_script(keys=[lock_key], args=[lock])
+
+
+def group_card_updates(observations, card_parameters_by_id):
+    """
+    Group the observations per card, keeping their order,
+    and leaving out any the card's parameters already include.
+    """
+
+    grouped = {}
+    for observation in sorted(observations, key=lambda o: o['seq']):
+        card_id = observation['card_id']
+        params = card_parameters_by_id.get(card_id, {})
+        if observation['seq'] <= params.get('last_seq', 0):
+            continue
+        grouped.setdefault(card_id, []).append(observation)
+    return grouped
+
+
+def apply_card_updates(db_conn, observations, renew=None):
+    """
+    Update the guess and slip distributions of every card in the
+    observations, in order per card, batching across cards.
+    Calls `renew`, if given, before saving each card.
+    Returns a dict of card ID: errors, of the cards that failed to save.
+    """
+
+    card_ids = list({o['card_id'] for o in observations})
+    card_parameters_by_id = {
+        params['entity_id']: params
+        for params in list_card_parameters(card_ids, db_conn)
+    }
+    grouped = group_card_updates(observations, card_parameters_by_id)
+    card_ids = list(grouped.keys())
+    if not card_ids:
+        return {}
+
+    guesses = np.array([
+        get_distribution(card_parameters_by_id.get(card_id, {}), 'guess')
+        for card_id in card_ids
+    ])
+    slips = np.array([
+        get_distribution(card_parameters_by_id.get(card_id, {}), 'slip')
+        for card_id in card_ids
+    ])
+    updates = replay_distributions(guesses, slips, [
+        [(o['score'], o['learned']) for o in grouped[card_id]]
+        for card_id in card_ids
+    ])
+    guesses = updates['guess_distribution']
+    slips = updates['slip_distribution']
+    num_learners = count_card_learners(grouped)
+
+    errors = {}
+    for j, card_id in enumerate(card_ids):
+        if renew:
+            renew()
+        card_errors = save_card_update(
+            db_conn,
+            card_parameters_by_id.get(card_id, {}),
+            grouped[card_id][-1],
+            guesses[j],
+            slips[j],
+            num_learners[card_id]
+        )
+        if card_errors:
+            errors[card_id] = card_errors
+    return errors
+
+
+def count_card_learners(grouped):
+    """
+    Add the learners of the grouped observations to each card's
+    HyperLogLog, and count each card's learners, in one round trip.
+    Adding the same learner again doesn't change the count,
+    so replaying a batch is safe.
+    """
+
+    card_ids = list(grouped.keys())
+    pipe = redis.pipeline()
+    for card_id in card_ids:
+        key = learners_key.format(card_id=card_id)
+        user_ids = {o['user_id'] for o in grouped[card_id]
+                    if o.get('user_id')}
+        pipe.pfadd(key, *user_ids)
+        pipe.pfcount(key)
+    counts = pipe.execute()[1::2]
+    return dict(zip(card_ids, counts))
+
+
+def save_card_update(db_conn, card_parameters, last_observation,
+                     guess_distribution, slip_distribution, num_learners=0):
+    """
+    Save the updated distributions and learner count of one card,
+    and move the card in its unit's difficulty index.
+    """
+
+    updated_card_parameters = {
+        'entity_id': last_observation['card_id'],
+        'precision': precision,
+        'guess_distribution': bundle_distribution(guess_distribution),
+        'slip_distribution': bundle_distribution(slip_distribution),
+        'last_seq': last_observation['seq'],
+        'num_learners': num_learners,
+    }
+    if card_parameters.get('id'):
+        _, errors = update_card_parameters(card_parameters,
+                                           updated_card_parameters,
+                                           db_conn)
+    else:
+        _, errors = insert_card_parameters(updated_card_parameters, db_conn)
+    if errors:
+        return errors
+    index_card_difficulty(
+        last_observation['unit_id'],
+        last_observation['card_id'],
+        get_guess_pmf_array_value(guess_distribution),
+        get_slip_pmf_array_value(slip_distribution)
+    )
+    return []
+
+
+def count_dead_card_updates():
+    """
+    Count the observations in the dead letter list.
+    """
+
+    return redis.llen(dead_key)
+
+
+def requeue_dead_card_updates(limit=-1):
+    """
+    Move up to `limit`, or all, dead observations back onto the queue,
+    in one atomic step, such as after fixing why their cards failed to save.
+    They get new sequence numbers, so they apply after any observations
+    of the same cards queued since.
+    Returns the number of observations moved.
+    """
+
+    if limit < 0:
+        limit = count_dead_card_updates()
+    if not limit:
+        return 0
+    return requeue_script(keys=[sequence_key, queue_key, dead_key],
+                          args=[limit])
@@ -2,8 +2,8 @@
 This document contains the formulas for Sagefy's adaptive learning algorithm.
 """
 
-from math import exp
-from modules.sequencer.params import belief_factor
+from math import exp, log
+from modules.sequencer.params import belief_factor, max_belief
 
 
 def calculate_correct(guess, slip, learned):
@@ -34,7 +34,7 @@ def calculate_difficulty(guess, slip):
     return calculate_correct(guess, slip, 0.5)
 
 
-def calculate_belief(learned, time_delta):
+def calculate_belief(learned, time_delta, belief_factor=belief_factor):
     """
     How much should we believe in learned, given the amount of time that
     has passed?
@@ -43,14 +43,25 @@ def calculate_belief(learned, time_delta):
     return exp(-1 * time_delta * (1 - learned) / belief_factor)
 
 
+def calculate_review_time(learned, belief_factor=belief_factor):
+    """
+    How long, in seconds, until belief in learned drops to `max_belief`?
+    Solves `calculate_belief` for the time.
+    """
+
+    if learned >= 1:
+        return float('inf')
+    return -log(max_belief) * belief_factor / (1 - learned)
+
+
 def update_learned(score, learned, guess, slip, transit,
-                   time_delta):
+                   time_delta, belief_factor=belief_factor):
     """
     Given a learner response,
     determines how likely the learner knows the skill.
     """
 
-    learned *= calculate_belief(learned, time_delta)
+    learned *= calculate_belief(learned, time_delta, belief_factor)
     posterior = (score
                  * learned
                  * calculate_correct(guess, slip, 1)
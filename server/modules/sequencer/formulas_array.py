@@ -0,0 +1,56 @@
+"""
+Array versions of the formulas in `modules.sequencer.formulas`.
+
+Each takes NumPy arrays (or numbers, which broadcast) in place of numbers,
+so we can ask about many learners at once, such as the distribution
+of learned in a unit across every learner, in a few calls.
+"""
+
+import numpy as np
+from modules.sequencer.formulas import calculate_correct, calculate_incorrect
+from modules.sequencer.params import belief_factor, max_belief, max_learned
+
+
+def calculate_belief_array(learned, time_delta, belief_factor=belief_factor):
+    """
+    How much should we believe in each learned, given the amount of time
+    that has passed? See `calculate_belief`.
+    """
+
+    learned = np.asarray(learned, dtype=float)
+    time_delta = np.asarray(time_delta, dtype=float)
+    return np.exp(-1 * time_delta * (1 - learned) / belief_factor)
+
+
+def update_learned_array(score, learned, guess, slip, transit,
+                         time_delta, belief_factor=belief_factor):
+    """
+    Given many learner responses, determines how likely
+    each learner knows the skill. See `update_learned`.
+    """
+
+    score = np.asarray(score, dtype=float)
+    guess = np.asarray(guess, dtype=float)
+    slip = np.asarray(slip, dtype=float)
+    learned = np.asarray(learned, dtype=float) * calculate_belief_array(
+        learned, time_delta, belief_factor)
+    posterior = (score
+                 * learned
+                 * calculate_correct(guess, slip, 1)
+                 / calculate_correct(guess, slip, learned)
+                 + (1 - score)
+                 * learned
+                 * calculate_incorrect(guess, slip, 1)
+                 / calculate_incorrect(guess, slip, learned))
+    return posterior + (1 - posterior) * transit
+
+
+def judge_done_array(learned, time_delta, belief_factor=belief_factor):
+    """
+    Which learners are done with the unit? As `judge_response` does,
+    learned has to be high enough and still believed.
+    """
+
+    learned = np.asarray(learned, dtype=float)
+    belief = calculate_belief_array(learned, time_delta, belief_factor)
+    return (learned >= max_learned) & (belief > max_belief)
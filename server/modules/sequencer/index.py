@@ -2,12 +2,7 @@
 Primary learning sequencer.
 """
 
-from database.card_parameters import get_card_parameters, get_distribution, \
-    bundle_distribution, insert_card_parameters, update_card_parameters
-from modules.sequencer.update import update as formula_update
-from modules.sequencer.params import init_learned
-from database.response import get_latest_response, insert_response
-from time import time
+from modules.sequencer.session import SequencerSession
 
 """
 Card
@@ -31,76 +26,37 @@ Set
 
 def update(db_conn, user, card, response):
     """
-    Update the card's parameters (and its parents')
-    when given a response.
+    Record the response and the learner's new learned value,
+    and queue the update to the card's parameters.
     """
 
-    # TODO-3 split up into smaller methods
-
-    if not card.has_assessment():
-        return {
-            'response': {},
-            'feedback': '',
-        }
-
-    errors = card.validate_response(response)
+    session = SequencerSession(db_conn, user)
+    result = session.respond(card, response)
+    if 'errors' in result:
+        return result
+    errors = session.flush()
     if errors:
-        return {'errors': errors}
-
-    score, feedback = card.score_response(response)
-    response = {
-        'user_id': user['id'],
-        'card_id': card['entity_id'],
-        'unit_id': card['unit_id'],
-        'response': response,
-        'score': score,
-    }
-
-    card_parameters = get_card_parameters(
-        {'entity_id': card['entity_id']},
-        db_conn
-    ) or {}
-    previous_response = get_latest_response(user['id'],
-                                            card['unit_id'],
-                                            db_conn)
-
-    now = time()
-    time_delta = now - (int(previous_response['created'].strftime("%s"))
-                        if previous_response else now)
-
-    learned = (previous_response['learned']
-               if previous_response else init_learned)
-    guess_distribution = get_distribution(card_parameters, 'guess')
-    slip_distribution = get_distribution(card_parameters, 'slip')
+        return {'errors': errors, 'feedback': result['feedback']}
+    return result
 
-    updates = formula_update(score, time_delta,
-                             learned, guess_distribution, slip_distribution)
 
-    response['learned'] = updates['learned']
-    response, errors = insert_response(response, db_conn)
-    if errors:
-        return {'errors': errors, 'feedback': feedback}
-
-    updated_card_parameters = {
-        'entity_id': card['entity_id'],
-        'guess_distribution':
-            bundle_distribution(updates['guess_distribution']),
-        'slip_distribution':
-            bundle_distribution(updates['slip_distribution']),
-    }
-    if card_parameters.get('id'):
-        _, errors = update_card_parameters(
-            card_parameters,
-            updated_card_parameters,
-            db_conn
-        )
-    else:
-        _, errors = insert_card_parameters(
-            updated_card_parameters,
-            db_conn
-        )
+def update_many(db_conn, user, cards, responses, times=None):
+    """
+    Record many responses by one learner, in order, as `update` does.
+    Reads the card parameters and the latest response per unit once,
+    and writes the responses and queues the card updates once.
+
+    `cards`, `responses`, and `times` line up. Times are when the learner
+    responded, in seconds; missing or future times become now, and each
+    time comes after the one before it on the same unit.
+    Return a list of results, as `update` does, or errors.
+    """
 
+    session = SequencerSession(db_conn, user)
+    results = session.respond_many(cards, responses, times)
+    if isinstance(results, dict):
+        return results
+    errors = session.flush()
     if errors:
-        return {'errors': errors, 'feedback': feedback}
-
-    return {'response': response, 'feedback': feedback}
+        return {'errors': errors}
+    return results
@@ -0,0 +1,146 @@
+"""
+Estimate how long a learner needs to master a unit.
+
+Simulating learners per request would be far too slow, so
+`simulation/mastery_times.py` simulates them offline, and saves a table
+of the expected responses and seconds to reach `max_learned`,
+over a grid of the learner's starting learned and the unit's
+average guess, slip, and transit. Here we only look up the table,
+interpolating between the grid points.
+"""
+
+import json
+import os
+from functools import lru_cache
+from time import time
+import numpy as np
+from database.card_difficulty import list_card_difficulty_averages
+from database.card_parameters import get_transit
+from modules.sequencer.formulas import calculate_belief
+from modules.sequencer.params import init_learned, init_guess, init_slip, \
+    max_learned
+
+table_path = os.path.join(os.path.dirname(__file__), 'mastery_table.json')
+axes = ('learned', 'guess', 'slip', 'transit')
+
+
+@lru_cache()
+def load_mastery_table(path=table_path):
+    """
+    Read the table once per process. None if it hasn't been built yet.
+    """
+
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    return {key: np.array(value, dtype=float) for key, value in data.items()}
+
+
+def get_axis_weights(grid, value):
+    """
+    Find the grid points on either side of the value,
+    and how far along between them the value is.
+    Values past the ends of the grid take the nearest end.
+    """
+
+    value = min(max(value, grid[0]), grid[-1])
+    i = min(int(np.searchsorted(grid, value, side='right')) - 1,
+            len(grid) - 2)
+    weight = (value - grid[i]) / (grid[i + 1] - grid[i])
+    return i, weight
+
+
+def interpolate_table(table, values, key):
+    """
+    Linearly interpolate the table's `key` at the values of each axis.
+    """
+
+    corners = [get_axis_weights(table[axis], value)
+               for axis, value in zip(axes, values)]
+    estimate = 0.0
+    for corner in range(2 ** len(axes)):
+        index, weight = [], 1.0
+        for d, (i, w) in enumerate(corners):
+            upper = (corner >> d) & 1
+            index.append(i + upper)
+            weight *= w if upper else 1 - w
+        if weight:
+            estimate += weight * table[key][tuple(index)]
+    return float(estimate)
+
+
+def estimate_mastery(learned, guess, slip, transit, table=None):
+    """
+    Get the expected responses and seconds until the learner
+    reaches `max_learned`, as a dict, or None without a table.
+    """
+
+    table = table if table is not None else load_mastery_table()
+    if table is None:
+        return None
+    if learned >= max_learned:
+        return {'responses': 0.0, 'seconds': 0.0}
+    values = (learned, guess, slip, transit)
+    return {
+        'responses': interpolate_table(table, values, 'responses'),
+        'seconds': interpolate_table(table, values, 'seconds'),
+    }
+
+
+def list_unit_values(unit_ids):
+    """
+    Get the average guess, slip, and transit of each unit's cards,
+    from the card difficulty index, or the initial values.
+    Return a dict of unit ID: (guess, slip, transit).
+    """
+
+    averages = list_card_difficulty_averages(unit_ids)
+    return {
+        unit_id: averages.get(unit_id, (init_guess, init_slip)) +
+        (get_transit(),)
+        for unit_id in unit_ids
+    }
+
+
+def get_current_learned(response, now=None):
+    """
+    Get the learner's learned in the unit, given the latest response,
+    discounted for the time since, as the next update would.
+    """
+
+    if not response:
+        return init_learned
+    learned = response['learned']
+    time_delta = (now or time()) - response['created'].timestamp()
+    return learned * calculate_belief(learned, time_delta)
+
+
+def estimate_unit_mastery(unit_id, response, now=None, values=None):
+    """
+    Estimate the time to master the unit, given the learner's latest
+    response in the unit, or None.
+    `values` are the unit's values from `list_unit_values`, if read already.
+    """
+
+    guess, slip, transit = values or list_unit_values([unit_id])[unit_id]
+    return estimate_mastery(get_current_learned(response, now),
+                            guess, slip, transit)
+
+
+def estimate_set_mastery(unit_ids, responses, now=None):
+    """
+    Estimate the time to master every unit given, as the sum over units.
+    `responses` is a dict of unit ID: latest response, or None.
+    """
+
+    total = {'responses': 0.0, 'seconds': 0.0}
+    unit_values = list_unit_values(unit_ids)
+    for unit_id in unit_ids:
+        estimate = estimate_unit_mastery(unit_id, responses.get(unit_id), now,
+                                         unit_values[unit_id])
+        if estimate is None:
+            return None
+        total['responses'] += estimate['responses']
+        total['seconds'] += estimate['seconds']
+    return total
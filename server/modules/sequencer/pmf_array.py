@@ -0,0 +1,149 @@
+"""
+Array-backed PMF, or Probability Mass Function, on a fixed grid.
+
+Where `modules.sequencer.pmf` keeps a dict of hypothesis: probability,
+here the hypotheses are always the grid `h / precision`
+for `h` in `1 ... precision - 1`, so a PMF is only a NumPy array
+of probabilities. A 2-D array is a batch of PMFs, one per row,
+which lets us update many cards' distributions in one call.
+"""
+
+import numpy as np
+from functools import lru_cache
+from modules.sequencer.formulas import calculate_correct, calculate_incorrect
+from modules.sequencer.params import adjust_guess, adjust_slip, precision
+
+
+@lru_cache()
+def get_pmf_grid(precision=precision):
+    """
+    Get the hypotheses all array PMFs share.
+    The grid is cached, so don't change it in place.
+    """
+
+    grid = np.arange(1, precision) / precision
+    grid.flags.writeable = False
+    return grid
+
+
+def init_pmf_array(weights):
+    """
+    Create a new PMF (or a batch of PMFs) given weights on the grid.
+    """
+
+    return normalize_pmf_array(np.array(weights, dtype=float))
+
+
+def init_pmf_array_around(init, precision=precision):
+    """
+    Create a new PMF centered on the initial value,
+    as `database.card_parameters.get_distribution` does.
+    """
+
+    return init_pmf_array(1 - (init - get_pmf_grid(precision)) ** 2)
+
+
+def update_pmf_array(probabilities, likelihood):
+    """
+    Main update function. Multiplies each hypothesis by the likelihood
+    of the data given that hypothesis, then normalizes.
+    """
+
+    return normalize_pmf_array(probabilities * likelihood)
+
+
+def normalize_pmf_array(probabilities):
+    """
+    Make sure that all hypotheses sum up to 1, per PMF.
+    """
+
+    return probabilities / probabilities.sum(axis=-1, keepdims=True)
+
+
+def get_pmf_array_value(probabilities, precision=precision):
+    """
+    Turns the distribution into a single value. See `get_pmf_value`.
+    """
+
+    return probabilities.dot(get_pmf_grid(precision))
+
+
+def get_guess_pmf_array_likelihood(score, learned, slip,
+                                   precision=precision):
+    """
+    Get the likelihood of the score for every guess hypothesis.
+    Score, learned, and slip may be numbers, or arrays for a batch.
+    """
+
+    score, learned, slip = [np.asarray(v, dtype=float)[..., np.newaxis]
+                            for v in (score, learned, slip)]
+    grid = get_pmf_grid(precision)
+    return (score
+            * calculate_correct(grid, slip, learned)
+            + (1 - score)
+            * calculate_incorrect(grid, slip, learned))
+
+
+def get_guess_pmf_array_value(probabilities, precision=precision,
+                              adjust_guess=adjust_guess):
+    """
+    See `get_guess_pmf_value`.
+    """
+
+    return get_pmf_array_value(probabilities, precision) * adjust_guess
+
+
+def get_slip_pmf_array_likelihood(score, learned, guess,
+                                  precision=precision):
+    """
+    Get the likelihood of the score for every slip hypothesis.
+    Score, learned, and guess may be numbers, or arrays for a batch.
+    """
+
+    score, learned, guess = [np.asarray(v, dtype=float)[..., np.newaxis]
+                             for v in (score, learned, guess)]
+    grid = get_pmf_grid(precision)
+    return (score
+            * calculate_correct(guess, grid, learned)
+            + (1 - score)
+            * calculate_incorrect(guess, grid, learned))
+
+
+def get_slip_pmf_array_value(probabilities, precision=precision,
+                             adjust_slip=adjust_slip):
+    """
+    See `get_slip_pmf_value`.
+    """
+
+    return get_pmf_array_value(probabilities, precision) * adjust_slip
+
+
+def pmf_to_array(hypotheses, precision=precision):
+    """
+    Convert a dict PMF on the grid into an array PMF.
+    """
+
+    return np.array([hypotheses.get(h, 0)
+                     for h in get_pmf_grid(precision).tolist()])
+
+
+def array_to_pmf(probabilities, precision=precision):
+    """
+    Convert an array PMF into a dict PMF.
+    """
+
+    return dict(zip(get_pmf_grid(precision).tolist(),
+                    probabilities.tolist()))
+
+
+def regrid_pmf_array(probabilities, from_precision, to_precision=precision):
+    """
+    Move a PMF stored with a different precision onto another grid,
+    interpolating between hypotheses.
+    """
+
+    if from_precision == to_precision:
+        return probabilities
+    return init_pmf_array(np.interp(get_pmf_grid(to_precision),
+                                    get_pmf_grid(from_precision),
+                                    probabilities))
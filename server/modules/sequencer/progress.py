@@ -0,0 +1,231 @@
+"""
+Keep a snapshot of each learner's progress in each set, so the set tree,
+choosing a unit, and responding to a card don't each traverse the set.
+
+The snapshot holds the status of every unit, the units per bucket
+in priority order, and the count per bucket. It updates one unit at a
+time as responses come in, moves done units to review when they come due,
+and rebuilds when the set's units or their requires change.
+"""
+
+import json
+from hashlib import sha1
+from time import time
+from redis import WatchError
+from framework.redis import redis
+from models.set import Set
+from modules.sequencer.traversal import judge_units, order_units_by_need, \
+    judge_due
+from database.review_schedule import get_review_dues
+
+bucket_names = ('diagnose', 'learn', 'review', 'done')
+progress_time = 24 * 60 * 60
+
+
+def get_progress_key(user_id, set_id):
+    """
+    Get the Redis key of the learner's snapshot for the set.
+    """
+
+    return 'set_progress_{user_id}_{set_id}'.format(
+        user_id=user_id, set_id=set_id)
+
+
+def get_units_signature(units):
+    """
+    Summarize the units and their requires,
+    so we know when the set's graph changes.
+    """
+
+    return sha1(json.dumps(sorted(
+        [unit['entity_id'], sorted(unit['require_ids'] or [])]
+        for unit in units
+    )).encode()).hexdigest()
+
+
+def order_bucket(units, unit_ids, name):
+    """
+    Order the unit IDs of a bucket by need, see `order_buckets`.
+    """
+
+    units_by_id = {unit['entity_id']: unit for unit in units}
+    if name == 'done':
+        return sorted(unit_ids)
+    ordered = [unit['entity_id'] for unit in order_units_by_need(
+        [units_by_id[unit_id] for unit_id in unit_ids])]
+    if name == 'diagnose':
+        ordered.reverse()
+    return ordered
+
+
+def create_progress(units, statuses, dues):
+    """
+    Create the snapshot, given the units of the set,
+    a dict of unit ID: status, and a dict of unit ID: review due time.
+    """
+
+    progress = {
+        'signature': get_units_signature(units),
+        'statuses': statuses,
+        'dues': {unit_id: due for unit_id, due in dues.items()
+                 if statuses.get(unit_id) == 'done'},
+        'buckets': {},
+        'counts': {},
+    }
+    for name in bucket_names:
+        progress['buckets'][name] = order_bucket(
+            units,
+            [unit['entity_id'] for unit in units
+             if statuses[unit['entity_id']] == name],
+            name)
+        progress['counts'][name] = len(progress['buckets'][name])
+    return progress
+
+
+def apply_unit_status(progress, units, unit_id, status, due=None):
+    """
+    Move one unit into its new bucket, reordering only the buckets
+    it left and joined.
+    """
+
+    previous = progress['statuses'].get(unit_id)
+    if previous is None:
+        return
+    if status == 'done':
+        progress['dues'][unit_id] = due
+    else:
+        progress['dues'].pop(unit_id, None)
+    if previous == status:
+        return
+    progress['statuses'][unit_id] = status
+    for name in (previous, status):
+        unit_ids = [id_ for id_ in progress['buckets'][name]
+                    if id_ != unit_id]
+        if name == status:
+            unit_ids.append(unit_id)
+        progress['buckets'][name] = order_bucket(units, unit_ids, name)
+        progress['counts'][name] = len(progress['buckets'][name])
+
+
+def apply_due_reviews(progress, units, now=None):
+    """
+    Move the done units that have come due into review.
+    Return the IDs of the units moved.
+    """
+
+    now = now or time()
+    unit_ids = [unit_id for unit_id, due in progress['dues'].items()
+                if due is not None and judge_due(due, now) == 'review']
+    for unit_id in unit_ids:
+        apply_unit_status(progress, units, unit_id, 'review')
+    return unit_ids
+
+
+def save_progress(user_id, set_id, progress):
+    redis.setex(get_progress_key(user_id, set_id), progress_time,
+                json.dumps(progress))
+
+
+def load_progress(user_id, set_id):
+    data = redis.get(get_progress_key(user_id, set_id))
+    return json.loads(data.decode()) if data else None
+
+
+def update_progress(user_id, set_id, update):
+    """
+    Load the learner's snapshot for the set, change it in place with
+    `update`, and save it, starting over if another request saves the
+    snapshot in between. Snapshots not built yet are left alone.
+    """
+
+    key = get_progress_key(user_id, set_id)
+    with redis.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                data = pipe.get(key)
+                if not data:
+                    return
+                progress = json.loads(data.decode())
+                update(progress)
+                pipe.multi()
+                pipe.setex(key, progress_time, json.dumps(progress))
+                pipe.execute()
+                return
+            except WatchError:
+                continue
+
+
+def delete_all_progress(batch_size=1000):
+    """
+    Delete every learner's snapshots, such as after replaying the
+    responses, so they rebuild from the new learned values on first read.
+    """
+
+    keys = []
+    for key in redis.scan_iter(match=get_progress_key('*', '*'),
+                               count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            redis.delete(*keys)
+            keys = []
+    if keys:
+        redis.delete(*keys)
+
+
+def get_set_progress(db_conn, user, set_, units=None):
+    """
+    Get the learner's snapshot for the set, building it if needed
+    from the saved responses. Given the set's units, if read already,
+    doesn't read them again.
+    """
+
+    if units is None:
+        units = set_.list_units(db_conn)
+    progress = load_progress(user['id'], set_['entity_id'])
+    if progress and progress['signature'] == get_units_signature(units):
+        if apply_due_reviews(progress, units):
+            update_progress(user['id'], set_['entity_id'],
+                            lambda saved: apply_due_reviews(saved, units))
+        return progress
+    unit_ids = [unit['entity_id'] for unit in units]
+    progress = create_progress(
+        units,
+        judge_units(db_conn, user, units),
+        get_review_dues(user['id'], unit_ids))
+    save_progress(user['id'], set_['entity_id'], progress)
+    return progress
+
+
+def get_progress_buckets(units, progress):
+    """
+    Get the units per bucket, in priority order, as `traverse` does,
+    given the set's units.
+    """
+
+    units_by_id = {unit['entity_id']: unit for unit in units}
+    return {name: [units_by_id[unit_id] for unit_id in unit_ids]
+            for name, unit_ids in progress['buckets'].items()}
+
+
+def update_set_progress(db_conn, user_id, unit_statuses):
+    """
+    After responses, update the learner's snapshots of the sets
+    containing each unit, given a dict of unit ID: (status, due).
+    Sets without a snapshot yet are left to build on first read.
+    """
+
+    set_ids = set()
+    for unit_id in unit_statuses:
+        set_ids.update(Set.list_ids_by_unit_id(db_conn, unit_id))
+    set_ids = [set_id for set_id in set_ids
+               if redis.exists(get_progress_key(user_id, set_id))]
+    for set_ in Set.list_by_entity_ids(db_conn, set_ids):
+        units = set_.list_units(db_conn)
+
+        def update(progress):
+            for unit_id, (status, due) in unit_statuses.items():
+                if unit_id in progress['statuses']:
+                    apply_unit_status(progress, units, unit_id, status, due)
+
+        update_progress(user_id, set_['entity_id'], update)
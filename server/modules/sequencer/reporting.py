@@ -0,0 +1,158 @@
+"""
+Reports on mastery across many learners, such as the distribution
+of learned in a unit, or the share of learners done with a set.
+
+The responses stream in batches, so only the latest learned value
+of each learner in each unit stays in memory. Then the formulas run
+once over arrays of every learner, see `modules.sequencer.formulas_array`.
+"""
+
+from time import time
+import numpy as np
+import rethinkdb as r
+from schemas.response import schema as response_schema
+from modules.sequencer.formulas_array import calculate_belief_array, \
+    judge_done_array
+from modules.sequencer.params import init_learned
+
+num_bins = 10
+
+
+def stream_responses(db_conn, unit_ids, batch_size=1000):
+    """
+    Get the responses in the units, in batches of up to `batch_size`,
+    with only the fields the reports need, and `created` in seconds.
+    """
+
+    if not unit_ids:
+        return
+    tablename = response_schema['tablename']
+    query = (r.table(tablename)
+              .get_all(*unit_ids, index='unit_id')
+              .map(lambda response: {
+                  'user_id': response['user_id'],
+                  'unit_id': response['unit_id'],
+                  'learned': response['learned'],
+                  'created': response['created'].to_epoch_time(),
+              }))
+    batch = []
+    for response in query.run(db_conn, max_batch_rows=batch_size):
+        batch.append(response)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def collect_learner_states(batches):
+    """
+    Given batches of responses, keep the latest of each learner
+    in each unit. Return a dict of unit ID: dict of user ID:
+    `(learned, created)`.
+    """
+
+    states = {}
+    for batch in batches:
+        for response in batch:
+            unit_states = states.setdefault(response['unit_id'], {})
+            previous = unit_states.get(response['user_id'])
+            if previous is None or response['created'] > previous[1]:
+                unit_states[response['user_id']] = (response['learned'],
+                                                    response['created'])
+    return states
+
+
+def get_state_arrays(unit_states, user_ids=None):
+    """
+    Get the learned values and times of the learners in one unit,
+    as arrays in the order of `user_ids`. Learners without a response
+    in the unit start at `init_learned`, and are never done.
+    """
+
+    if user_ids is None:
+        user_ids = sorted(unit_states)
+    learned = np.full(len(user_ids), init_learned)
+    created = np.full(len(user_ids), np.nan)
+    for i, user_id in enumerate(user_ids):
+        if user_id in unit_states:
+            learned[i], created[i] = unit_states[user_id]
+    return learned, created
+
+
+def get_current_learned(learned, created, now=None):
+    """
+    Discount each learned value by how long ago it was recorded,
+    as `update_learned` does before the next response.
+    Values without a time stay as they are.
+    """
+
+    now = now or time()
+    time_delta = np.nan_to_num(now - created)
+    return learned * calculate_belief_array(learned, time_delta)
+
+
+def get_done(learned, created, now=None):
+    """
+    Which learners are done, as `judge_response` decides?
+    """
+
+    now = now or time()
+    done = judge_done_array(learned, np.nan_to_num(now - created))
+    return done & ~np.isnan(created)
+
+
+def get_mastery_histogram(learned, done):
+    """
+    Count the learners in each tenth of learned, and the learners done.
+    """
+
+    counts, edges = np.histogram(learned, bins=num_bins, range=(0, 1))
+    return {
+        'num_learners': int(len(learned)),
+        'num_done': int(np.count_nonzero(done)),
+        'bins': edges.tolist(),
+        'counts': counts.tolist(),
+    }
+
+
+def get_unit_mastery(db_conn, unit_id, now=None, batch_size=1000):
+    """
+    Get the mastery histogram of every learner who responded in the unit.
+    """
+
+    states = collect_learner_states(
+        stream_responses(db_conn, [unit_id], batch_size))
+    learned, created = get_state_arrays(states.get(unit_id, {}))
+    return get_mastery_histogram(get_current_learned(learned, created, now),
+                                 get_done(learned, created, now))
+
+
+def get_set_mastery(db_conn, set_, now=None, batch_size=1000):
+    """
+    Get the mastery histograms of every unit in the set, over the
+    learners who responded anywhere in the set, and of the set itself.
+    A learner's mastery of the set is their least mastered unit,
+    and they are done with the set once done with every unit.
+    """
+
+    unit_ids = [unit['entity_id'] for unit in set_.list_units(db_conn)]
+    states = collect_learner_states(
+        stream_responses(db_conn, unit_ids, batch_size))
+    user_ids = sorted({user_id for unit_states in states.values()
+                       for user_id in unit_states})
+    set_learned = np.ones(len(user_ids))
+    set_done = np.ones(len(user_ids), dtype=bool)
+    units = {}
+    for unit_id in unit_ids:
+        learned, created = get_state_arrays(states.get(unit_id, {}),
+                                            user_ids)
+        current = get_current_learned(learned, created, now)
+        done = get_done(learned, created, now)
+        units[unit_id] = get_mastery_histogram(current, done)
+        set_learned = np.minimum(set_learned, current)
+        set_done &= done
+    return {
+        'set': get_mastery_histogram(set_learned, set_done),
+        'units': units,
+    }
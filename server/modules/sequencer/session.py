@@ -0,0 +1,309 @@
+"""
+A sequencer session handles one request for one learner.
+
+It reads the learner's latest responses and the cards' parameters once,
+keeps them in memory as new responses come in, so judging, traversing,
+and choosing a card see the fresh learned value without reading it back,
+and makes all the writes at the end with `flush`.
+"""
+
+from datetime import datetime, timezone
+from threading import Thread
+from time import time
+import rethinkdb as r
+from framework.database import make_db_connection, close_db_connection
+from database.card_parameters import list_card_parameters, \
+    get_card_parameters_values
+from database.response import list_latest_responses, insert_responses
+from database.user import set_learning_context, set_precomputed_cards
+from modules.sequencer.formulas import update_learned
+from modules.sequencer.card_updates import queue_card_updates
+from modules.sequencer.card_chooser import choose_card_given, \
+    get_learned_bucket
+from modules.sequencer.traversal import judge_response
+from modules.sequencer.progress import get_set_progress, apply_unit_status, \
+    get_progress_buckets, update_set_progress
+from database.review_schedule import schedule_reviews, get_review_due
+from modules.sequencer.params import init_learned
+from modules.util import extend
+from models.card import Card
+
+
+class SequencerSession(object):
+    def __init__(self, db_conn, user):
+        self.db_conn = db_conn
+        self.user = user
+        self.latest_responses = {}
+        self.card_values = {}
+        self.new_responses = []
+        self.results = []
+        self.card_updates = []
+        self.learning_context = {}
+
+    def load_latest_responses(self, unit_ids):
+        """
+        Read the learner's latest response in each unit not yet loaded,
+        in one query.
+        """
+
+        unit_ids = [unit_id for unit_id in set(unit_ids)
+                    if unit_id not in self.latest_responses]
+        if not unit_ids:
+            return
+        responses = list_latest_responses(self.user['id'], unit_ids,
+                                          self.db_conn)
+        for unit_id in unit_ids:
+            self.latest_responses[unit_id] = responses.get(unit_id)
+
+    def load_card_parameters(self, card_ids):
+        """
+        Read the parameters of each card not yet loaded, in one query.
+        """
+
+        card_ids = [card_id for card_id in set(card_ids)
+                    if card_id not in self.card_values]
+        if not card_ids:
+            return
+        for card_id in card_ids:
+            self.card_values[card_id] = get_card_parameters_values({})
+        for params in list_card_parameters(card_ids, self.db_conn):
+            self.card_values[params['entity_id']] = \
+                get_card_parameters_values(params)
+
+    def get_latest_response(self, unit_id):
+        """
+        Get the learner's latest response in the unit, or None.
+        Includes responses not yet flushed.
+        """
+
+        self.load_latest_responses([unit_id])
+        return self.latest_responses[unit_id]
+
+    def respond(self, card, response, time_=None):
+        """
+        Score the response and update the learner's learned value,
+        as `modules.sequencer.index.update` does, but only in memory.
+        `time_` is when the learner responded, in seconds; see
+        `modules.sequencer.index.update_many`.
+        """
+
+        if not card.has_assessment():
+            return {
+                'response': {},
+                'feedback': '',
+            }
+
+        errors = card.validate_response(response)
+        if errors:
+            return {'errors': errors}
+
+        score, feedback = card.score_response(response)
+        unit_id = card['unit_id']
+        previous_response = self.get_latest_response(unit_id)
+        self.load_card_parameters([card['entity_id']])
+        values = self.card_values[card['entity_id']]
+
+        now = time()
+        time_ = min(time_ or now, now)
+        if previous_response:
+            prev_time = previous_response['created'].timestamp()
+            time_ = max(time_, prev_time + 0.001)
+            learned = previous_response['learned']
+        else:
+            prev_time = time_
+            learned = init_learned
+
+        response = {
+            'user_id': self.user['id'],
+            'card_id': card['entity_id'],
+            'unit_id': unit_id,
+            'response': response,
+            'score': score,
+            'learned': update_learned(score, learned,
+                                      values['guess'], values['slip'],
+                                      values['transit'], time_ - prev_time),
+        }
+        self.new_responses.append(extend({}, response, {
+            'created': r.epoch_time(time_),
+        }))
+        self.latest_responses[unit_id] = extend({}, response, {
+            'created': datetime.fromtimestamp(time_, timezone.utc),
+        })
+        self.card_updates.append({
+            'card_id': card['entity_id'],
+            'unit_id': unit_id,
+            'user_id': self.user['id'],
+            'score': score,
+            'learned': learned,
+        })
+        result = {'response': response, 'feedback': feedback}
+        self.results.append(result)
+        return result
+
+    def respond_many(self, cards, responses, times=None):
+        """
+        Respond to many cards in order, reading the card parameters
+        and the latest responses once up front.
+        Return a list of results, or errors if any response isn't valid.
+        """
+
+        times = times or [None] * len(cards)
+        errors = []
+        for i, (card, response) in enumerate(zip(cards, responses)):
+            if card.has_assessment():
+                errors += [extend({'name': 'responses.%i' % i}, error)
+                           for error in card.validate_response(response)]
+        if errors:
+            return {'errors': errors}
+        self.load_card_parameters([card['entity_id'] for card in cards])
+        self.load_latest_responses([card['unit_id'] for card in cards])
+        return [self.respond(card, response, time_)
+                for card, response, time_ in zip(cards, responses, times)]
+
+    def judge(self, unit):
+        """
+        See `modules.sequencer.traversal.judge`.
+        """
+
+        return judge_response(self.get_latest_response(unit['entity_id']))
+
+    def traverse(self, set_):
+        """
+        See `modules.sequencer.traversal.traverse`.
+        Reads the learner's progress snapshot for the set, built only
+        from saved responses, and applies the responses not yet flushed
+        in memory; `flush` saves them to the snapshot.
+        """
+
+        units = set_.list_units(self.db_conn)
+        progress = get_set_progress(self.db_conn, self.user, set_, units)
+        for unit_id, (status, due) in self.get_unit_statuses().items():
+            apply_unit_status(progress, units, unit_id, status, due)
+        return get_progress_buckets(units, progress)
+
+    def get_unit_statuses(self):
+        """
+        Get the status and review due time of each unit responded to
+        in this session, as a dict of unit ID: (status, due).
+        """
+
+        statuses = {}
+        for unit_id in {update['unit_id'] for update in self.card_updates}:
+            response = self.latest_responses[unit_id]
+            statuses[unit_id] = (
+                judge_response(response),
+                get_review_due(response['learned'],
+                               response['created'].timestamp()),
+            )
+        return statuses
+
+    def choose_card(self, unit, precomputed=None):
+        """
+        See `modules.sequencer.card_chooser.choose_card`.
+        Given the choices from `precompute_next_cards`, use the one
+        for the learner's learned bucket, if any.
+        """
+
+        previous_response = self.get_latest_response(unit['entity_id'])
+        if precomputed and previous_response:
+            data = precomputed.get(
+                get_learned_bucket(previous_response['learned']))
+            if (data and data['unit_id'] == unit['entity_id'] and
+                    data['entity_id'] != previous_response['card_id']):
+                return Card(data)
+        return choose_card_given(self.db_conn, unit, previous_response)
+
+    def precompute_next_cards(self, card):
+        """
+        While the learner views the card, choose the next card for both
+        a correct and an incorrect response, so responding only has to
+        pick one. Return a dict of predicted learned bucket: card data.
+        See `precompute_next_cards_later` to run off the request.
+        """
+
+        if not card.has_assessment():
+            return {}
+        unit_id = card['unit_id']
+        previous_response = self.get_latest_response(unit_id)
+        self.load_card_parameters([card['entity_id']])
+        values = self.card_values[card['entity_id']]
+        if previous_response:
+            learned = previous_response['learned']
+            time_delta = time() - previous_response['created'].timestamp()
+        else:
+            learned, time_delta = init_learned, 0
+
+        precomputed = {}
+        for score in (1, 0):
+            predicted = update_learned(score, learned,
+                                       values['guess'], values['slip'],
+                                       values['transit'], time_delta)
+            bucket = get_learned_bucket(predicted)
+            if bucket in precomputed:
+                continue
+            next_card = choose_card_given(self.db_conn, {'entity_id': unit_id},
+                                          {'card_id': card['entity_id'],
+                                           'learned': predicted})
+            if next_card:
+                precomputed[bucket] = next_card.data
+        return precomputed
+
+    def set_learning_context(self, **d):
+        """
+        Update the learning context when the session flushes.
+        See `database.user.set_learning_context`.
+        """
+
+        self.learning_context.update(d)
+
+    def flush(self):
+        """
+        Write the new responses in one query, queue the card updates,
+        update the review schedule and the progress snapshots,
+        and update the learning context.
+        The results from `respond` get the saved responses.
+        Return a list of errors.
+        """
+
+        responses, errors = insert_responses(self.new_responses,
+                                             self.db_conn)
+        if errors:
+            return errors
+        for result, response in zip(self.results, responses):
+            result['response'] = response
+        queue_card_updates(self.card_updates)
+        unit_ids = {update['unit_id'] for update in self.card_updates}
+        schedule_reviews(self.user['id'], [
+            (unit_id, self.latest_responses[unit_id]['learned'],
+             self.latest_responses[unit_id]['created'].timestamp())
+            for unit_id in unit_ids
+        ], self.db_conn)
+        update_set_progress(self.db_conn, self.user['id'],
+                            self.get_unit_statuses())
+        if self.learning_context:
+            set_learning_context(self.user, **self.learning_context)
+        self.new_responses, self.results, self.card_updates = [], [], []
+        self.learning_context = {}
+        return []
+
+
+def precompute_next_cards_later(user, card):
+    """
+    Run `SequencerSession.precompute_next_cards` in a background thread,
+    with its own database connection, so the request doesn't wait on the
+    chooser. Stores the result with `database.user.set_precomputed_cards`;
+    `choose_card` chooses as usual if the result isn't ready yet.
+    """
+
+    def run():
+        db_conn = make_db_connection()
+        try:
+            precomputed = (SequencerSession(db_conn, user)
+                           .precompute_next_cards(card))
+            set_precomputed_cards(user, card['entity_id'], precomputed)
+        finally:
+            close_db_connection(db_conn)
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    return thread
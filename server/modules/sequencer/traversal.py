@@ -1,5 +1,6 @@
 from modules.sequencer.params import max_learned, max_belief, diag_belief
-from database.response import get_latest_response
+from database.response import get_latest_response, list_latest_responses
+from database.review_schedule import get_review_dues, schedule_reviews
 from modules.sequencer.formulas import calculate_belief
 from time import time
 
@@ -27,16 +28,55 @@ def traverse(db_conn, user, set_):
     }
 
     units = set_.list_units(db_conn)
+    statuses = judge_units(db_conn, user, units)
     for unit in units:
-        status = judge(db_conn, unit, user)
-        buckets[status].append(unit)
+        buckets[statuses[unit['entity_id']]].append(unit)
+
+    return order_buckets(buckets)
+
+
+def judge_units(db_conn, user, units, latest_responses=None):
+    """
+    Pass judgement on many units at once.
+    Uses the latest responses given, if any, then the review schedule,
+    then reads the latest responses of the remaining units in one query,
+    adding any learned units to the schedule.
+    Return a dict of unit ID: status.
+    """
+
+    latest_responses = latest_responses or {}
+    now = time()
+    statuses = {
+        unit['entity_id']: judge_response(latest_responses[unit['entity_id']],
+                                          now)
+        for unit in units
+        if unit['entity_id'] in latest_responses
+    }
+    unit_ids = [unit['entity_id'] for unit in units
+                if unit['entity_id'] not in statuses]
+    for unit_id, due in get_review_dues(user['id'], unit_ids).items():
+        statuses[unit_id] = judge_due(due, now)
+    unit_ids = [unit_id for unit_id in unit_ids if unit_id not in statuses]
+    responses = list_latest_responses(user['id'], unit_ids, db_conn)
+    for unit_id in unit_ids:
+        statuses[unit_id] = judge_response(responses.get(unit_id), now)
+    schedule_reviews(user['id'], [
+        (unit_id, response['learned'], response['created'].timestamp())
+        for unit_id, response in responses.items()
+        if response['learned'] >= max_learned
+    ], db_conn)
+    return statuses
+
+
+def order_buckets(buckets):
+    """
+    Make sure the buckets are in the correct orderings.
+    """
 
-    # Make sure the buckets are in the correct orderings
     buckets['diagnose'] = order_units_by_need(buckets['diagnose'])
     buckets['diagnose'].reverse()
     buckets['learn'] = order_units_by_need(buckets['learn'])
     buckets['review'] = order_units_by_need(buckets['review'])
-
     return buckets
 
 
@@ -96,11 +136,32 @@ def judge(db_conn, unit, user):
         unit['entity_id'],
         db_conn
     )
+    return judge_response(response)
+
+
+def judge_due(due, now=None):
+    """
+    Given when a learned unit needs review,
+    pass judgement on which bucket to file the unit under.
+    Matches `judge_response`, as belief drops to `max_belief` at `due`.
+    """
+
+    now = now or time()
+    if due > now:
+        return "done"
+    return "review"
+
+
+def judge_response(response, now=None):
+    """
+    Given the latest response on a unit, or None,
+    pass judgement on which bucket to file the unit under.
+    """
+
     if response:
         learned = response['learned']
-        now = time()
-        time_delta = now - (int(response['created'].strftime("%s"))
-                            if response else now)
+        now = now or time()
+        time_delta = now - response['created'].timestamp()
         belief = calculate_belief(learned, time_delta)
     else:
         learned = 0
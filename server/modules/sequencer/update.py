@@ -2,6 +2,9 @@ from modules.sequencer.params import init_transit
 from modules.sequencer.pmf import update_pmf, \
     get_guess_pmf_value, get_guess_pmf_likelihood, \
     get_slip_pmf_value, get_slip_pmf_likelihood
+from modules.sequencer.pmf_array import update_pmf_array, \
+    get_guess_pmf_array_value, get_guess_pmf_array_likelihood, \
+    get_slip_pmf_array_value, get_slip_pmf_array_likelihood
 from modules.sequencer.formulas import update_learned
 
 
@@ -73,3 +76,74 @@ def update(score, time_delta, learned,
         'guess_distribution': guess_distribution,
         'slip_distribution': slip_distribution,
     }
+
+
+def update_array(score, time_delta, learned,
+                 guess_distribution, slip_distribution):
+    """
+    Same as `update`, but with array PMFs.
+    See `modules.sequencer.pmf_array`.
+    """
+
+    guess = get_guess_pmf_array_value(guess_distribution)
+    slip = get_slip_pmf_array_value(slip_distribution)
+    learned2 = update_learned(score, learned,
+                              guess, slip, init_transit,
+                              time_delta)
+    distributions = update_distributions(score, learned,
+                                         guess_distribution,
+                                         slip_distribution)
+    distributions['learned'] = learned2
+    return distributions
+
+
+def update_distributions(scores, learneds,
+                         guess_distributions, slip_distributions):
+    """
+    Update the guess and slip array PMFs of many cards in one call.
+    Each row of the distributions is one card, and gets updated
+    with the score and learned value of the same row.
+    Also works with a single card, given numbers and 1-D arrays.
+    """
+
+    guesses = get_guess_pmf_array_value(guess_distributions)
+    slips = get_slip_pmf_array_value(slip_distributions)
+    guess_distributions = update_pmf_array(
+        guess_distributions,
+        get_guess_pmf_array_likelihood(scores, learneds, slips)
+    )
+    slip_distributions = update_pmf_array(
+        slip_distributions,
+        get_slip_pmf_array_likelihood(scores, learneds, guesses)
+    )
+    return {
+        'guess_distribution': guess_distributions,
+        'slip_distribution': slip_distributions,
+    }
+
+
+def replay_distributions(guess_distributions, slip_distributions,
+                         observations):
+    """
+    Given the guess and slip array PMFs of many cards, and per card a list
+    of `(score, learned)` observations in order, apply all the observations.
+    Each round updates the next observation of every card
+    that still has one, in one batch.
+    """
+
+    guess_distributions = guess_distributions.copy()
+    slip_distributions = slip_distributions.copy()
+    for i in range(max([len(o) for o in observations] or [0])):
+        rows = [j for j, o in enumerate(observations) if len(o) > i]
+        updates = update_distributions(
+            [observations[j][i][0] for j in rows],
+            [observations[j][i][1] for j in rows],
+            guess_distributions[rows],
+            slip_distributions[rows],
+        )
+        guess_distributions[rows] = updates['guess_distribution']
+        slip_distributions[rows] = updates['slip_distribution']
+    return {
+        'guess_distribution': guess_distributions,
+        'slip_distribution': slip_distributions,
+    }
@@ -0,0 +1,360 @@
+"""
+Rebuild `cards_parameters` and the learned values on `responses`
+by replaying every response in order, such as after changing
+`modules/sequencer/params.py` or fixing a formula.
+
+The replay goes in two passes:
+
+1. Cards: each card's guess and slip only depend on the card's own
+   responses and the learner's learned value before each response,
+   so cards are sharded across a process pool and replayed from the
+   initial distributions. Each card's count of learners is rebuilt too.
+2. Learners: stream the responses again in order, recomputing learned per
+   learner and unit with the rebuilt card parameters.
+
+Progress is checkpointed to a JSON file, so an interrupted replay
+picks up where it left off. The learners pass holds every learner's
+learned value per unit in the checkpoint, so it only checkpoints every
+`--checkpoint-rows` rows; rows after the last checkpoint are replayed
+again on resume, which writes the same values.
+
+Run again with `--passes` above one to let learned and the card
+parameters settle on each other.
+
+    python3 replay_responses.py --workers 4
+"""
+
+import json
+import os
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from time import time
+import numpy as np
+import rethinkdb as r
+from framework.database import setup_db, make_db_connection, \
+    close_db_connection
+from schemas.response import schema as response_schema
+from schemas.card_parameters import schema as card_parameters_schema
+from database.util import prepare_document
+from modules.compiled_schema import get_compiled_schema
+from database.card_parameters import list_card_parameters, \
+    bundle_distribution, get_guess, get_slip
+from database.review_schedule import schedule_reviews
+from framework.redis import redis
+from modules.sequencer.card_updates import sequence_key, learners_key
+from modules.sequencer.progress import delete_all_progress
+from modules.sequencer.update import replay_distributions
+from modules.sequencer.pmf_array import init_pmf_array_around
+from modules.sequencer.formulas import update_learned
+from modules.sequencer.params import init_learned, init_guess, \
+    init_slip, init_transit, precision
+
+
+def stream_responses(db_conn, after=None):
+    """
+    Stream the responses table in chronological order, ties broken by ID.
+    Given `after`, a `[created, id]` pair with `created` in ISO 8601,
+    start after that response, as `skip` isn't stable when
+    `created` ties.
+    """
+
+    lower = [r.minval, r.minval]
+    if after:
+        lower = [r.iso8601(after[0]), after[1]]
+    return (r.table(response_schema['tablename'])
+             .between(lower, [r.maxval, r.maxval], index='created_id',
+                      left_bound='open' if after else 'closed')
+             .order_by(index='created_id')
+             .run(db_conn))
+
+
+def get_response_key(response):
+    """
+    Get where a response falls in `stream_responses`, for the checkpoint.
+    """
+
+    return [response['created'].isoformat(), response['id']]
+
+
+def report(label, rows, start):
+    """
+    Print the progress and rows per second.
+    """
+
+    elapsed = max(time() - start, 1e-9)
+    print('{label}: {rows} rows, {rate:.0f} rows/s'.format(
+        label=label, rows=rows, rate=rows / elapsed))
+
+
+def load_checkpoint(path):
+    """
+    Read the checkpoint, or start a new one.
+    """
+
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return new_checkpoint(0, os.cpu_count())
+
+
+def new_checkpoint(pass_, workers):
+    """
+    Start the checkpoint for a pass.
+    """
+
+    return {
+        'pass': pass_,
+        'workers': workers,
+        'shards_done': [],
+        'cards_done': False,
+        'rows_done': 0,
+        'after': None,
+        'last_seq': None,
+        'learners': {},
+    }
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    Write the checkpoint, replacing the previous one in one step.
+    """
+
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+
+def collect_card_observations(db_conn):
+    """
+    Stream the responses, and collect per card the list of
+    `(score, learned before the response)`, in order,
+    and the set of learners who responded.
+    """
+
+    observations, learners, learned, rows, start = {}, {}, {}, 0, time()
+    for response in stream_responses(db_conn):
+        key = response['user_id'] + '|' + response['unit_id']
+        observations.setdefault(response['card_id'], []).append(
+            (response['score'], learned.get(key, init_learned)))
+        learners.setdefault(response['card_id'], set()).add(
+            response['user_id'])
+        learned[key] = response['learned']
+        rows += 1
+        if rows % 100000 == 0:
+            report('collect', rows, start)
+    report('collect', rows, start)
+    return observations, learners
+
+
+def backfill_card_learners(learners, chunk_size=1000):
+    """
+    Add each card's learners to the card's HyperLogLog, as the card
+    updates worker does, so responses from before the counts were kept
+    count too. Return the count of learners per card.
+    """
+
+    counts, card_ids = {}, list(learners)
+    for i in range(0, len(card_ids), chunk_size):
+        chunk = card_ids[i:i + chunk_size]
+        pipe = redis.pipeline()
+        for card_id in chunk:
+            key = learners_key.format(card_id=card_id)
+            pipe.pfadd(key, *learners[card_id])
+            pipe.pfcount(key)
+        counts.update(zip(chunk, pipe.execute()[1::2]))
+    return counts
+
+
+def replay_cards_shard(shard):
+    """
+    Replay the observations of a shard of cards from the initial
+    distributions. Runs in a worker process.
+    """
+
+    card_ids = list(shard.keys())
+    guesses = np.tile(init_pmf_array_around(init_guess), (len(card_ids), 1))
+    slips = np.tile(init_pmf_array_around(init_slip), (len(card_ids), 1))
+    updates = replay_distributions(guesses, slips,
+                                   [shard[card_id] for card_id in card_ids])
+    return {
+        card_id: (bundle_distribution(updates['guess_distribution'][j]),
+                  bundle_distribution(updates['slip_distribution'][j]))
+        for j, card_id in enumerate(card_ids)
+    }
+
+
+def write_card_parameters(db_conn, results, last_seq, num_learners,
+                          chunk_size=1000):
+    """
+    Write the rebuilt distributions and learner counts in batch inserts.
+    `last_seq` is the card updates sequence from before the replay read
+    the responses, so the worker doesn't apply queued observations
+    the replay already included.
+    """
+
+    schema = card_parameters_schema
+    bundle = get_compiled_schema(schema['fields'])['bundle']
+    existing = {params['entity_id']: params
+                for params in list_card_parameters(results.keys(), db_conn)}
+    documents = []
+    for card_id, (guess, slip) in results.items():
+        data = {
+            'entity_id': card_id,
+            'precision': precision,
+            'guess_distribution': guess,
+            'slip_distribution': slip,
+            'last_seq': last_seq,
+        }
+        if card_id in existing:
+            data['id'] = existing[card_id]['id']
+            data['created'] = existing[card_id]['created']
+            data['num_learners'] = existing[card_id].get('num_learners')
+        if card_id in num_learners:
+            data['num_learners'] = num_learners[card_id]
+        data, errors = prepare_document(schema, data, db_conn)
+        if errors:
+            raise ValueError(errors)
+        documents.append(bundle(data))
+    for i in range(0, len(documents), chunk_size):
+        (r.table(schema['tablename'])
+          .insert(documents[i:i + chunk_size], conflict='update')
+          .run(db_conn))
+
+
+def replay_cards(db_conn, checkpoint, checkpoint_path):
+    """
+    First pass: rebuild the card parameters, sharded by card.
+    """
+
+    workers = checkpoint['workers']
+    if checkpoint['last_seq'] is None:
+        checkpoint['last_seq'] = int(redis.get(sequence_key) or 0)
+        save_checkpoint(checkpoint_path, checkpoint)
+    observations, learners = collect_card_observations(db_conn)
+    num_learners = backfill_card_learners(learners)
+    shards = [{} for _ in range(workers)]
+    for i, card_id in enumerate(sorted(observations)):
+        shards[i % workers][card_id] = observations[card_id]
+    todo = [i for i in range(workers) if i not in checkpoint['shards_done']]
+    rows, start = 0, time()
+    with Pool(workers) as pool:
+        for i, results in zip(todo, pool.imap(replay_cards_shard,
+                                              [shards[i] for i in todo])):
+            if results:
+                write_card_parameters(db_conn, results,
+                                      checkpoint['last_seq'], num_learners)
+            rows += sum(len(o) for o in shards[i].values())
+            checkpoint['shards_done'].append(i)
+            save_checkpoint(checkpoint_path, checkpoint)
+            report('cards', rows, start)
+    checkpoint['cards_done'] = True
+    save_checkpoint(checkpoint_path, checkpoint)
+
+
+def get_card_values(db_conn):
+    """
+    Read the guess and slip values of every card with parameters.
+    """
+
+    query = r.table(card_parameters_schema['tablename'])
+    return {params['entity_id']: (get_guess(params), get_slip(params))
+            for params in query.run(db_conn)}
+
+
+def write_learned(db_conn, updates):
+    """
+    Write the recomputed learned values in one query.
+    """
+
+    (r.expr(updates)
+      .for_each(lambda update:
+                r.table(response_schema['tablename'])
+                 .get(update['id'])
+                 .update({'learned': update['learned']}))
+      .run(db_conn))
+
+
+def replay_learners(db_conn, card_values, checkpoint, checkpoint_path,
+                    chunk_size, checkpoint_rows=100000):
+    """
+    Second pass: recompute learned on every response, in order.
+    Writes learned every `chunk_size` rows, and checkpoints
+    every `checkpoint_rows` rows.
+    """
+
+    learners = checkpoint['learners']
+    rows, updates, start = checkpoint['rows_done'], [], time()
+    saved_rows = rows
+    default_values = (get_guess({}), get_slip({}))
+    for response in stream_responses(db_conn, checkpoint['after']):
+        key = response['user_id'] + '|' + response['unit_id']
+        created = response['created'].timestamp()
+        learned, prev_created = learners.get(key, (init_learned, created))
+        guess, slip = card_values.get(response['card_id'], default_values)
+        learned = update_learned(response['score'], learned, guess, slip,
+                                 init_transit, created - prev_created)
+        learners[key] = (learned, created)
+        updates.append({'id': response['id'], 'learned': learned})
+        rows += 1
+        if len(updates) >= chunk_size:
+            write_learned(db_conn, updates)
+            updates = []
+            report('learners', rows, start)
+            if rows - saved_rows >= checkpoint_rows:
+                checkpoint['rows_done'] = saved_rows = rows
+                checkpoint['after'] = get_response_key(response)
+                save_checkpoint(checkpoint_path, checkpoint)
+    if updates:
+        write_learned(db_conn, updates)
+        checkpoint['after'] = get_response_key(response)
+    checkpoint['rows_done'] = rows
+    save_checkpoint(checkpoint_path, checkpoint)
+    report('learners', rows, start)
+    reschedule_reviews(db_conn, learners)
+    # The progress snapshots hold statuses from the old learned values
+    delete_all_progress()
+
+
+def reschedule_reviews(db_conn, learners):
+    """
+    Update the review schedule, and the sets' earliest due times,
+    with the recomputed learned values.
+    """
+
+    reviews = {}
+    for key, (learned, created) in learners.items():
+        user_id, unit_id = key.split('|', 1)
+        reviews.setdefault(user_id, []).append((unit_id, learned, created))
+    for user_id, user_reviews in reviews.items():
+        schedule_reviews(user_id, user_reviews, db_conn)
+
+
+def main():
+    parser = ArgumentParser(description='Replay responses to rebuild '
+                                        'card parameters and learned.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--checkpoint-rows', type=int, default=100000)
+    parser.add_argument('--passes', type=int, default=1)
+    parser.add_argument('--checkpoint', default='replay_checkpoint.json')
+    args = parser.parse_args()
+
+    setup_db()
+    db_conn = make_db_connection()
+    checkpoint = load_checkpoint(args.checkpoint)
+    if not checkpoint['shards_done']:
+        checkpoint['workers'] = args.workers
+    while checkpoint['pass'] < args.passes:
+        if not checkpoint['cards_done']:
+            replay_cards(db_conn, checkpoint, args.checkpoint)
+        replay_learners(db_conn, get_card_values(db_conn), checkpoint,
+                        args.checkpoint, args.chunk_size,
+                        args.checkpoint_rows)
+        checkpoint = new_checkpoint(checkpoint['pass'] + 1, args.workers)
+        save_checkpoint(args.checkpoint, checkpoint)
+    close_db_connection(db_conn)
+    os.remove(args.checkpoint)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,19 @@
 from framework.session import get_current_user
 from framework.routes import get, post, abort
 from models.card import Card
+from models.mixins.entity import get_paging_errors
 from models.unit import Unit
 from models.set import Set
 from database.topic import list_topics_by_entity_id, deliver_topic
-from modules.entity import get_card_by_kind
-from modules.sequencer.index import update as seq_update
-from modules.sequencer.traversal import traverse, judge
-from modules.sequencer.card_chooser import choose_card
-from database.user import get_learning_context, set_learning_context
+from modules.entity import get_card_by_kind, flip_card_into_kind
+from modules.sequencer.session import SequencerSession, \
+    precompute_next_cards_later
+from database.user import get_learning_context, set_learning_context, \
+    get_precomputed_cards
 from database.response import deliver_response
 from database.card_parameters import get_card_parameters, \
     get_card_parameters_values
+from modules.validations import is_required, is_dict, is_string, is_number
 # from modules.sequencer.params import max_learned
 
 
@@ -82,6 +84,8 @@ def learn_card_route(request, card_id):
                 .format(card_id=card['entity_id'])
     }
     set_learning_context(current_user, card=card.data, next=next_)
+    # Choose the next card in the background, while the learner reads this one
+    precompute_next_cards_later(current_user, card)
 
     return 200, {
         'card': card.deliver(access='learn'),
@@ -95,9 +99,17 @@ def learn_card_route(request, card_id):
 def get_card_versions_route(request, card_id):
     """
     Get versions card given an ID. Paginates.
+    Take `limit`, and `before`, the `created` of the last version
+    of the previous page. `skip` is not supported. (400)
     """
 
     db_conn = request['db_conn']
+    errors = get_paging_errors(request['params'])
+    if errors:
+        return 400, {
+            'errors': errors,
+            'ref': 'Xq4cUe7LmH2sVb9nRz0kTjWd',
+        }
     versions = Card.get_versions(
         db_conn,
         entity_id=card_id,
@@ -137,36 +149,155 @@ def respond_to_card_route(request, card_id):
     if context.get('card', {}).get('entity_id') != card['entity_id']:
         return abort(400)
 
-    r = seq_update(db_conn, current_user, card,
-                   request['params'].get('response'))
-    errors, response, feedback = (r.get('errors'), r.get('response'),
-                                  r.get('feedback'))
+    # Read the learner's state once, and write it all at the end
+    session = SequencerSession(db_conn, current_user)
+    result = session.respond(card, request['params'].get('response'))
+    errors = result.get('errors')
     if errors:
         return 400, {
             'errors': errors,
             'ref': 'wtyOJPoy4bh76OIbYp8mS3LP',
         }
 
+    next_ = choose_next(session, context)
+    errors = session.flush()
+    if errors:
+        return 400, {
+            'errors': errors,
+            'ref': 'wtyOJPoy4bh76OIbYp8mS3LP',
+        }
+
+    return 200, {
+        'response': deliver_response(result['response']),
+        'feedback': result['feedback'],
+        'next': next_,
+    }
+
+
+@post('/s/responses')
+def respond_to_cards_route(request):
+    """
+    Record and process a list of a learner's responses, in order,
+    such as the responses queued while offline.
+    Each response is a dict of `card_id`, `response`,
+    and optionally `created`, when the learner responded, in seconds.
+    The first card must be the current one, and all the cards
+    must be in the same unit.
+
+    NEXT STATE
+    POST Respond Cards
+        -> same as POST Respond Card, after the last response
+    """
+
+    db_conn = request['db_conn']
+    current_user = get_current_user(request)
+    if not current_user:
+        return abort(401)
+
+    items = request['params'].get('responses')
+    if not items or not isinstance(items, list):
+        return abort(400)
+    errors = validate_response_items(items)
+    if errors:
+        return 400, {
+            'errors': errors,
+            'ref': 'kJ3nQhsWc9F1vDxA4m7LpYe2',
+        }
+
+    card_ids = [item.get('card_id') for item in items]
+    cards_by_id = {
+        card['entity_id']: flip_card_into_kind(card)
+        for card in Card.list_by_entity_ids(db_conn, list(set(card_ids)))
+    }
+    if not all(cards_by_id.get(card_id) for card_id in card_ids):
+        return abort(404)
+    cards = [cards_by_id[card_id] for card_id in card_ids]
+
+    # Make sure the first card is the current one,
+    # and the learner stayed in its unit
+    context = get_learning_context(current_user)
+    if context.get('card', {}).get('entity_id') != card_ids[0]:
+        return abort(400)
+    if any(card['unit_id'] != cards[0]['unit_id'] for card in cards):
+        return abort(400)
+
+    session = SequencerSession(db_conn, current_user)
+    results = session.respond_many(cards,
+                                   [item.get('response') for item in items],
+                                   [item.get('created') for item in items])
+    if isinstance(results, dict):
+        return 400, {
+            'errors': results['errors'],
+            'ref': 'kJ3nQhsWc9F1vDxA4m7LpYe2',
+        }
+
+    next_ = choose_next(session, context)
+    errors = session.flush()
+    if errors:
+        return 400, {
+            'errors': errors,
+            'ref': 'kJ3nQhsWc9F1vDxA4m7LpYe2',
+        }
+
+    return 200, {
+        'responses': [deliver_response(result['response'])
+                      for result in results],
+        'feedback': [result['feedback'] for result in results],
+        'next': next_,
+    }
+
+
+def validate_response_items(items):
+    """
+    Ensure each response is a dict with a string `card_id`,
+    and `created`, if given, is a number.
+    Returns a list of errors, named by the response's index.
+    """
+
+    errors = []
+    for i, item in enumerate(items):
+        prefix = 'responses.%i' % i
+        error = is_required(item) or is_dict(item)
+        if error:
+            errors.append({'name': prefix, 'message': error})
+            continue
+        card_id, created = item.get('card_id'), item.get('created')
+        error = is_required(card_id) or is_string(card_id)
+        if error:
+            errors.append({'name': prefix + '.card_id', 'message': error})
+        error = is_number(created)
+        if error:
+            errors.append({'name': prefix + '.created', 'message': error})
+    return errors
+
+
+def choose_next(session, context):
+    """
+    After the learner responds, judge the current unit, and choose
+    what comes next: another card, another unit, or the set tree.
+    Update the learning context when the session flushes,
+    and return the next state.
+    """
+
     set_ = Set(context.get('set'))
     unit = Unit(context.get('unit'))
 
-    status = judge(db_conn, unit, current_user)
+    status = session.judge(unit)
 
     # If we are done with this current unit...
     if status == "done":
-        buckets = traverse(db_conn, current_user, set_)
+        buckets = session.traverse(set_)
 
         # If there are units to be diagnosed...
         if buckets['diagnose']:
             unit = buckets['diagnose'][0]
-            next_card = choose_card(db_conn, current_user, unit)
+            next_card = session.choose_card(unit)
             next_ = {
                 'method': 'GET',
                 'path': '/s/cards/{card_id}/learn'
                         .format(card_id=next_card['entity_id']),
             }
-            set_learning_context(
-                current_user,
+            session.set_learning_context(
                 card=next_card.data, unit=unit.data, next=next_)
 
         # If there are units to be learned or reviewed...
@@ -176,8 +307,7 @@ def respond_to_card_route(request, card_id):
                 'path': '/s/sets/{set_id}/units'
                         .format(set_id=set_['entity_id']),
             }
-            set_learning_context(current_user,
-                                 card=None, unit=None, next=next_)
+            session.set_learning_context(card=None, unit=None, next=next_)
 
         # If we are out of units...
         else:
@@ -186,25 +316,22 @@ def respond_to_card_route(request, card_id):
                 'path': '/s/sets/{set_id}/tree'
                         .format(set_id=set_['entity_id']),
             }
-            set_learning_context(current_user,
-                                 card=None, unit=None, next=next_)
+            session.set_learning_context(card=None, unit=None, next=next_)
 
     # If we are still reviewing, learning or diagnosing this unit...
     else:
-        next_card = choose_card(db_conn, current_user, unit)
+        precomputed = get_precomputed_cards(
+            session.user, context.get('card', {}).get('entity_id'))
+        next_card = session.choose_card(unit, precomputed)
         if next_card:
             next_ = {
                 'method': 'GET',
                 'path': '/s/cards/{card_id}/learn'
                         .format(card_id=next_card['entity_id']),
             }
-            set_learning_context(current_user, card=next_card.data, next=next_)
+            session.set_learning_context(card=next_card.data, next=next_)
         else:
             next_ = {}
-            set_learning_context(current_user, next=next_)
+            session.set_learning_context(next=next_)
 
-    return 200, {
-        'response': deliver_response(response),
-        'feedback': feedback,
-        'next': next_,
-    }
+    return next_
@@ -1,6 +1,8 @@
 from framework.routes import post, abort
 from framework.session import get_current_user
 from modules.util import uniqid
+from models.unit import Unit
+from models.card import Card
 import rethinkdb as r
 
 
@@ -149,12 +151,19 @@ def inject_votes(topic_id, proposal_id, db_conn):
 
 
 def update_status(kind, version_id, db_conn):
+    """
+    Accept the version, and update the cached graphs and indexes,
+    as `save` would.
+    """
+
     if kind != 'unit' and kind != 'card':
         raise Exception('must be a unit or card')
-    r.db('sagefy').table(kind + 's').get(version_id).update({
+    result = r.db('sagefy').table(kind + 's').get(version_id).update({
         'modified': r.now(),
         'status': 'accepted',
-    }).run(db_conn)
+    }, return_changes='always').run(db_conn)
+    model = Unit if kind == 'unit' else Card
+    model(result['changes'][0]['new_val']).index_accepted(db_conn)
 
 
 @post('/s/mass_upload')
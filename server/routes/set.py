@@ -1,10 +1,16 @@
 from framework.routes import get, post, abort
 from models.set import Set
+from models.mixins.entity import get_paging_errors
 from models.unit import Unit
 from framework.session import get_current_user
-from modules.sequencer.traversal import traverse, judge
+from modules.sequencer.traversal import judge
+from modules.sequencer.progress import get_set_progress, \
+    get_progress_buckets
 from modules.sequencer.card_chooser import choose_card
+from modules.sequencer.mastery_time import estimate_unit_mastery, \
+    estimate_set_mastery, list_unit_values
 from database.user import get_learning_context, set_learning_context
+from database.response import list_latest_responses
 from database.topic import list_topics_by_entity_id, deliver_topic
 
 # Nota Bene: We use `set_` because `set` is a type in Python
@@ -50,9 +56,17 @@ def get_set_route(request, set_id):
 def get_set_versions_route(request, set_id):
     """
     Get versions set given an ID. Paginates.
+    Take `limit`, and `before`, the `created` of the last version
+    of the previous page. `skip` is not supported. (400)
     """
 
     db_conn = request['db_conn']
+    errors = get_paging_errors(request['params'])
+    if errors:
+        return 400, {
+            'errors': errors,
+            'ref': 'Lc2dVj9WsE4uHn7mTq0aZyKp',
+        }
     versions = Set.get_versions(db_conn, entity_id=set_id, **request['params'])
     return 200, {
         'versions': [version.deliver(access='view') for version in versions]
@@ -102,21 +116,22 @@ def get_set_tree_route(request, set_id):
         return 200, output
 
     context = get_learning_context(current_user) if current_user else {}
-    buckets = traverse(db_conn, current_user, set_)
-    output['buckets'] = {
-        'diagnose': [u['entity_id'] for u in buckets['diagnose']],
-        'review': [u['entity_id'] for u in buckets['review']],
-        'learn': [u['entity_id'] for u in buckets['learn']],
-        'done': [u['entity_id'] for u in buckets['done']],
-    }
+    progress = get_set_progress(db_conn, current_user, set_, units)
+    output['buckets'] = progress['buckets']
+    output['counts'] = progress['counts']
+    unit_ids = [unit_id for name in ('diagnose', 'learn', 'review')
+                for unit_id in progress['buckets'][name]]
+    output['estimate'] = estimate_set_mastery(
+        unit_ids,
+        list_latest_responses(current_user['id'], unit_ids, db_conn))
 
     # If we are just previewing, don't update anything
     if set_id != context.get('set', {}).get('entity_id'):
         return 200, output
 
     # When in diagnosis, choose the unit and card automagically.
-    if buckets['diagnose']:
-        unit = buckets['diagnose'][0]
+    if progress['buckets']['diagnose']:
+        unit = get_progress_buckets(units, progress)['diagnose'][0]
         card = choose_card(db_conn, current_user, unit)
         next_ = {
             'method': 'GET',
@@ -128,7 +143,7 @@ def get_set_tree_route(request, set_id):
             next=next_, unit=unit.data, card=card.data)
 
     # When in learn or review mode, lead me to choose a unit.
-    elif buckets['review'] or buckets['learn']:
+    elif progress['buckets']['review'] or progress['buckets']['learn']:
         next_ = {
             'method': 'GET',
             'path': '/s/sets/{set_id}/units'
@@ -179,13 +194,21 @@ def get_set_units_route(request, set_id):
     set_ = Set.get_latest_accepted(db_conn, set_id)
 
     # Pull a list of up to 5 units to choose from based on priority.
-    buckets = traverse(db_conn, current_user, set_)
-    units = buckets['learn'][:5]
-    # TODO-3 Time estimates per unit for mastery.
+    units = set_.list_units(db_conn)
+    progress = get_set_progress(db_conn, current_user, set_, units)
+    units = get_progress_buckets(units, progress)['learn'][:5]
+    unit_ids = [unit['entity_id'] for unit in units]
+    responses = list_latest_responses(current_user['id'], unit_ids, db_conn)
+    unit_values = list_unit_values(unit_ids)
 
     return 200, {
         'next': next_,
         'units': [unit.deliver() for unit in units],
+        'estimates': {
+            unit_id: estimate_unit_mastery(
+                unit_id, responses.get(unit_id), values=unit_values[unit_id])
+            for unit_id in unit_ids
+        },
         # For the menu, it must return the name and ID of the set
         'set': set_.deliver(),
         'current_unit_id': context.get('unit', {}).get('entity_id'),
@@ -215,8 +238,7 @@ def choose_unit_route(request, set_id, unit_id):
 
     # If the unit isn't in the set...
     context = get_learning_context(current_user)
-    set_ids = [set_['entity_id']
-               for set_ in Set.list_by_unit_id(db_conn, unit_id)]
+    set_ids = Set.list_ids_by_unit_id(db_conn, unit_id)
     if context.get('set', {}).get('entity_id') not in set_ids:
         return abort(400)
 
@@ -2,8 +2,8 @@ from framework.routes import get
 from models.card import Card
 from models.unit import Unit
 from models.set import Set
-from database.user import list_users, deliver_user
-from database.topic import list_topics
+from database.user import stream_users
+from database.topic import stream_topics
 
 defaults = {
     'https://sagefy.org/',
@@ -32,9 +32,7 @@ def sitemap_route(request):
     # Card, unit, set
     kinds = {'card': Card, 'unit': Unit, 'set': Set}
     for kind, Model in kinds.items():
-        query = Model.start_accepted_query()
-        entities = [Model(data).deliver() for data in query.run(db_conn)]
-        for entity in entities:
+        for entity in Model.stream_accepted(db_conn, fields=('entity_id',)):
             sitemap.add('https://sagefy.org/{kind}s/{id}'.format(
                 id=entity['entity_id'],
                 kind=kind
@@ -43,12 +41,11 @@ def sitemap_route(request):
             # TODO-2 set tree
 
     # Topic
-    for topic in list_topics({}, db_conn):
+    for topic in stream_topics({}, db_conn, fields=('id',)):
         sitemap.add('https://sagefy.org/topics/{id}'.format(id=topic['id']))
 
     # User
-    users = [deliver_user(user) for user in list_users({}, db_conn)]
-    for user in users:
+    for user in stream_users({}, db_conn, fields=('id',)):
         sitemap.add('https://sagefy.org/users/{id}'.format(id=user['id']))
 
     sitemap = '\n'.join(sitemap)
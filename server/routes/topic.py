@@ -294,7 +294,8 @@ def get_posts_route(request, topic_id):
     for post_ in posts:
         user_id = post_['user_id']
         if user_id not in users:
-            user = get_user({'id': user_id}, db_conn)
+            user = get_user({'id': user_id}, db_conn,
+                            fields=('name', 'email'))
             if user:
                 users[user_id] = {
                     'name': user['name'],
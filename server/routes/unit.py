@@ -1,5 +1,6 @@
 from framework.routes import get, abort
 from models.unit import Unit
+from models.mixins.entity import get_paging_errors
 from models.set import Set
 from database.topic import list_topics_by_entity_id, deliver_topic
 
@@ -38,9 +39,17 @@ def get_unit_route(request, unit_id):
 def get_unit_versions_route(request, unit_id):
     """
     Get unit versions given an ID. Paginates.
+    Take `limit`, and `before`, the `created` of the last version
+    of the previous page. `skip` is not supported. (400)
     """
 
     db_conn = request['db_conn']
+    errors = get_paging_errors(request['params'])
+    if errors:
+        return 400, {
+            'errors': errors,
+            'ref': 'Pf8aNw3YtK6oQe1hGx5rBvMz',
+        }
     versions = Unit.get_versions(
         db_conn,
         entity_id=unit_id,
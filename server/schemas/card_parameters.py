@@ -1,6 +1,8 @@
-from modules.validations import is_required, is_string, is_dict
+from modules.validations import is_required, is_string, is_list, \
+    is_integer
 from schemas.index import schema as default
 from modules.util import extend
+from modules.sequencer.params import precision
 
 schema = extend({}, default, {
     'tablename': 'cards_parameters',
@@ -8,11 +10,32 @@ schema = extend({}, default, {
         'entity_id': {  # TODO-3 validate foreign
             'validate': (is_required, is_string),
         },
+        'precision': {
+            # Distributions hold a probability for each `h / precision`,
+            # for `h` in `1 ... precision - 1`
+            'validate': (is_required, is_integer,),
+            'default': precision,
+        },
         'guess_distribution': {
-            'validate': (is_required, is_dict,),
+            'validate': (is_required, is_list,),
         },
         'slip_distribution': {
-            'validate': (is_required, is_dict,),
+            'validate': (is_required, is_list,),
+        },
+        'last_seq': {
+            # The last queued observation applied to the distributions,
+            # see `modules.sequencer.card_updates`
+            'validate': (is_integer,),
+            'default': 0,
+        },
+        'num_learners': {
+            # Estimated from a Redis HyperLogLog of the learners
+            # who responded, see `modules.sequencer.card_updates`
+            'validate': (is_integer,),
+            'default': 0,
         },
     },
+    'indexes': (
+        ('entity_id',),
+    ),
 })
@@ -23,6 +23,9 @@ schema = {
         }
     },
     'validate': [],
+    'indexes': (),
+    # A list of secondary indexes for the table,
+    # each the arguments to `index_create`
 }
 
 
@@ -41,5 +44,6 @@ schema = {
 # - unique:     True will check to make sure no other row has
 #               the same value not needed on `id` field,
 #               as it is the primary key
+#               needs a secondary index of the same name in `indexes`
 # - embed:      list of fields contained in the field
 # - embed_many: list of fields contained in a list of dicts
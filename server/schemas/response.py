@@ -1,3 +1,4 @@
+import rethinkdb as r
 from schemas.index import schema as default
 from modules.validations import is_required, is_string, is_number
 from modules.util import extend
@@ -30,5 +31,11 @@ schema = extend({}, default, {
         'learned': {
             'validate': (is_required, is_number,)
         }
-    }
+    },
+    'indexes': (
+        ('unit_id',),
+        ('created_id', [r.row['created'], r.row['id']]),
+        ('user_id_unit_id_created',
+         [r.row['user_id'], r.row['unit_id'], r.row['created']]),
+    ),
 })
@@ -71,4 +71,8 @@ schema = extend({}, default, {
         }
     },
     'validate': [],
+    'indexes': (
+        ('name',),
+        ('email',),
+    ),
 })
@@ -0,0 +1,19 @@
+"""
+Send a come back notice to every learner with units due for review.
+See `database.review_schedule`. Run once a day, such as from cron:
+
+    python3 send_come_back_notices.py
+"""
+# flake8: noqa
+
+from config import config
+import framework.index as framework
+framework.update_config(config)
+
+from framework.database import make_db_connection, close_db_connection
+from modules.notices import send_come_back_notices
+
+db_conn = make_db_connection()
+user_ids = send_come_back_notices(db_conn)
+print('sent', len(user_ids))
+close_db_connection(db_conn)
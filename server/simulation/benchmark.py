@@ -0,0 +1,230 @@
+"""
+Benchmarks the sequencer for both speed and accuracy, and compares
+the results with a stored baseline.
+
+Speed is the throughput, in calls per second, of `update`, `update_pmf`,
+and the in-memory parts of `choose_card` and `traverse`, on fixtures
+that don't need a database. Accuracy is the guess and slip error
+of `simulation.sequencer` against the mock's underlying values,
+with a fixed seed, so the same code gives the same errors.
+
+The stored baseline only holds the accuracy, as throughput depends on
+the machine. To check throughput, save the results on one machine with
+`--output`, and pass them as `--baseline` to a later run on the same
+machine.
+
+    python3 simulation/benchmark.py
+    python3 simulation/benchmark.py --save-baseline
+    python3 simulation/benchmark.py --output before.json
+    python3 simulation/benchmark.py --baseline before.json
+
+Exits with a status of 1 if any result regressed past the tolerance.
+"""
+
+import os
+import sys
+import inspect
+currentdir = os.path.dirname(
+    os.path.abspath(
+        inspect.getfile(
+            inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import json
+import platform
+from argparse import ArgumentParser
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from random import Random
+from timeit import timeit
+from sequencer import main as run_sequencer
+from models.unit import Unit
+from modules.sequencer.update import update
+from modules.sequencer.pmf import init_pmf, update_pmf, \
+    get_guess_pmf_likelihood
+from modules.sequencer.card_chooser import get_difficulty_range, \
+    filter_assessment_candidates
+from modules.sequencer.traversal import judge_response, order_buckets
+from modules.sequencer.formulas import calculate_difficulty
+from modules.sequencer.params import init_guess, init_slip, precision
+
+baseline_path = os.path.join(currentdir, 'benchmark_baseline.json')
+
+
+def create_fixtures(seed=0, num_cards=200, num_units=50):
+    """
+    Create the in-memory cards, units, and responses to benchmark on.
+    """
+
+    rand = Random(seed)
+    hypotheses = [h / precision for h in range(1, precision)]
+    cards = sorted([{
+        'entity_id': 'card%s' % i,
+        'guess': rand.uniform(0.05, 0.45),
+        'slip': rand.uniform(0.05, 0.35),
+    } for i in range(num_cards)], key=lambda values: calculate_difficulty(
+        values['guess'], values['slip']))
+    now = datetime(2016, 1, 1)
+    units = [Unit({
+        'entity_id': 'unit%s' % i,
+        'require_ids': ['unit%s' % j
+                        for j in rand.sample(range(i), min(i, 2))],
+    }) for i in range(num_units)]
+    responses = {unit['entity_id']: {
+        'learned': rand.choice((0.2, 0.7, 0.995)),
+        'created': now - timedelta(seconds=rand.randint(0, 10 ** 7)),
+    } for unit in units if rand.random() < 0.8}
+    return {
+        'guess_distribution': init_pmf({
+            h: 1 - (init_guess - h) ** 2 for h in hypotheses}),
+        'slip_distribution': init_pmf({
+            h: 1 - (init_slip - h) ** 2 for h in hypotheses}),
+        'cards': cards,
+        'difficulties': [calculate_difficulty(values['guess'],
+                                              values['slip'])
+                         for values in cards],
+        'units': units,
+        'responses': responses,
+        'now': now.timestamp(),
+        'rand': rand,
+    }
+
+
+def choose_card_in_memory(fixtures, learned):
+    """
+    Choose an assessment card the way `choose_assessment_card` does,
+    with a sorted list in place of the difficulty index.
+    """
+
+    low, high = get_difficulty_range(learned)
+    difficulties = fixtures['difficulties']
+    cards = fixtures['cards'][bisect_left(difficulties, low):
+                              bisect_right(difficulties, high)]
+    candidates = filter_assessment_candidates(cards, learned, 'card0')
+    fixtures['rand'].shuffle(candidates)
+    return candidates[0] if candidates else None
+
+
+def traverse_in_memory(fixtures):
+    """
+    Sort the units into buckets the way `traverse` does,
+    with the latest responses already in memory.
+    """
+
+    buckets = {'diagnose': [], 'learn': [], 'review': [], 'done': []}
+    for unit in fixtures['units']:
+        response = fixtures['responses'].get(unit['entity_id'])
+        buckets[judge_response(response, fixtures['now'])].append(unit)
+    return order_buckets(buckets)
+
+
+def measure_throughput(fixtures, number=2000):
+    """
+    Get the calls per second of each part of the sequencer.
+    """
+
+    guess_distribution = fixtures['guess_distribution']
+    slip_distribution = fixtures['slip_distribution']
+    benchmarks = {
+        'update': lambda: update(1, 60, 0.5, guess_distribution,
+                                 slip_distribution),
+        'update_pmf': lambda: update_pmf(guess_distribution, {
+            'score': 1,
+            'learned': 0.5,
+            'slip': init_slip,
+        }, get_guess_pmf_likelihood),
+        'choose_card': lambda: choose_card_in_memory(
+            fixtures, fixtures['rand'].random()),
+        'traverse': lambda: traverse_in_memory(fixtures),
+    }
+    return {
+        name: number / timeit(benchmark, number=number)
+        for name, benchmark in sorted(benchmarks.items())
+    }
+
+
+def measure_accuracy(num_learners=1000, num_cards=50, seed=0):
+    """
+    Get the estimation errors of the sequencer against the mock.
+    """
+
+    return run_sequencer(num_learners, num_cards, seed=seed)
+
+
+def compare(results, baseline, speed_tolerance, accuracy_tolerance):
+    """
+    List every result worse than the baseline past the tolerance.
+    Throughput is worse when lower by more than `speed_tolerance`,
+    as a ratio. Error is worse when higher by more than
+    `accuracy_tolerance`.
+    """
+
+    regressions = []
+    for name, value in sorted(results['throughput'].items()):
+        expected = baseline.get('throughput', {}).get(name)
+        if expected and value < expected * (1 - speed_tolerance):
+            regressions.append(
+                'throughput {name}: {value:.0f}/s, baseline {expected:.0f}/s'
+                .format(name=name, value=value, expected=expected))
+    for name, value in sorted(results['accuracy'].items()):
+        expected = baseline['accuracy'].get(name)
+        if expected is not None and value > expected + accuracy_tolerance:
+            regressions.append(
+                'accuracy {name}: {value:.4f}, baseline {expected:.4f}'
+                .format(name=name, value=value, expected=expected))
+    return regressions
+
+
+def write_results(results, path):
+    """
+    Write the results as JSON, ending with a newline.
+    """
+
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark the sequencer.')
+    parser.add_argument('--output', default=None,
+                        help='write the results here, instead of stdout')
+    parser.add_argument('--baseline', default=baseline_path)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--learners', type=int, default=1000)
+    parser.add_argument('--cards', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--speed-tolerance', type=float, default=0.3)
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.005)
+    args = parser.parse_args()
+
+    results = {
+        'python': platform.python_version(),
+        'throughput': measure_throughput(create_fixtures(args.seed),
+                                         args.number),
+        'accuracy': measure_accuracy(args.learners, args.cards, args.seed),
+    }
+    if args.save_baseline:
+        write_results({'accuracy': results['accuracy']}, args.baseline)
+        return
+    if args.output:
+        write_results(results, args.output)
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    if not os.path.exists(args.baseline):
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline,
+                          args.speed_tolerance, args.accuracy_tolerance)
+    for regression in regressions:
+        print('REGRESSION', regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
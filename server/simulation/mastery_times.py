@@ -0,0 +1,125 @@
+"""
+Builds the table `modules.sequencer.mastery_time` looks up.
+
+For each point on the grid of starting learned and card guess, slip,
+and transit, simulates learners with the model in `simulation.mock`,
+while the sequencer's estimate of learned follows `update_learned`,
+until the estimate reaches `max_learned`. Every point simulates at once,
+as arrays, so the whole table takes seconds.
+
+    python3 simulation/mastery_times.py
+    python3 simulation/mastery_times.py --learners 2000 --seed 1
+"""
+
+import os
+import sys
+import inspect
+currentdir = os.path.dirname(
+    os.path.abspath(
+        inspect.getfile(
+            inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import json
+from argparse import ArgumentParser
+from itertools import product
+import numpy as np
+from mock import question_gap, session_gap, max_questions, degrade
+from modules.sequencer.formulas import calculate_correct
+from modules.sequencer.formulas_array import update_learned_array
+from modules.sequencer.params import max_learned
+from modules.sequencer.mastery_time import table_path
+
+grid = {
+    'learned': [i / 10 for i in range(10)] + [max_learned],
+    'guess': [0.05, 0.15, 0.3, 0.45],
+    'slip': [0.05, 0.1, 0.2, 0.3],
+    'transit': [0.01, 0.03, 0.05, 0.1, 0.2],
+}
+
+
+def simulate(learned, guess, slip, transit, rng, max_responses=500):
+    """
+    Simulate one learner per row, each starting from the learned value
+    and responding to cards with the guess, slip, and transit of the row.
+    Return the responses and seconds each took to reach `max_learned`.
+    Learners still going after `max_responses` stop there.
+    """
+
+    num = len(learned)
+    actual = np.array(learned, dtype=float)
+    estimate = np.array(learned, dtype=float)
+    seconds = np.zeros(num)
+    responses = np.zeros(num)
+    count = np.zeros(num)
+    time_delta = np.zeros(num)
+    active = np.flatnonzero(estimate < max_learned)
+
+    for _ in range(max_responses):
+        if not len(active):
+            break
+        correct = calculate_correct(guess[active], slip[active],
+                                    actual[active])
+        score = (rng.random_sample(len(active)) < correct).astype(float)
+        estimate[active] = update_learned_array(
+            score, estimate[active], guess[active], slip[active],
+            transit[active], time_delta[active])
+        responses[active] += 1
+
+        count[active] += 1
+        new_session = count[active] > rng.uniform(*max_questions,
+                                                  size=len(active))
+        gap = np.where(new_session,
+                       rng.uniform(*session_gap, size=len(active)),
+                       rng.uniform(*question_gap, size=len(active)))
+        count[active[new_session]] = 0
+        actual[active] = np.clip(np.where(
+            new_session,
+            actual[active] - degrade * gap / session_gap[1],
+            actual[active] + transit[active]), 0, 1)
+
+        done = estimate[active] >= max_learned
+        seconds[active[~done]] += gap[~done]
+        time_delta[active] = gap
+        active = active[~done]
+
+    return responses, seconds
+
+
+def build_table(num_learners=500, seed=None):
+    """
+    Simulate every grid point, and average over the learners.
+    Return the grid and tables of responses and seconds, as lists.
+    """
+
+    rng = np.random.RandomState(seed)
+    names = ('learned', 'guess', 'slip', 'transit')
+    points = np.array(list(product(*[grid[name] for name in names])))
+    rows = np.repeat(points, num_learners, axis=0)
+    responses, seconds = simulate(*rows.T, rng=rng)
+    shape = [len(grid[name]) for name in names]
+    table = dict(grid)
+    for name, values in (('responses', responses), ('seconds', seconds)):
+        table[name] = np.round(
+            values.reshape(-1, num_learners).mean(axis=1).reshape(shape), 1
+        ).tolist()
+    return table
+
+
+def main():
+    parser = ArgumentParser(description='Build the mastery time table.')
+    parser.add_argument('--learners', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=table_path)
+    args = parser.parse_args()
+
+    table = build_table(args.learners, args.seed)
+    with open(args.output, 'w') as f:
+        json.dump(table, f, sort_keys=True)
+        f.write('\n')
+    print('saved', args.output)
+
+
+if __name__ == '__main__':
+    main()
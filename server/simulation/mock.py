@@ -4,6 +4,7 @@ learner models.
 """
 
 from random import uniform, triangular, sample, randrange
+import numpy as np
 from modules.sequencer.params import max_learned, \
     init_guess, init_slip, init_transit
 
@@ -166,6 +167,129 @@ def update_time(time, count):
     return time, count
 
 
+def main_arrays(num_learners=100, num_cards=10, seed=None,
+                chunk_size=10000):
+    """
+    Same as `main`, but vectorized with NumPy, and returns columns:
+    `responses` is a dict of arrays `learner`, `card`, `time`, `score`,
+    sorted by time. Cards are a dict of arrays `guess`, `slip`, `transit`.
+    Learners are a dict of arrays `start_time`.
+
+    Given the same seed and chunk size, produces the same responses.
+    """
+
+    rng = np.random.RandomState(seed)
+    cards = create_card_arrays(num_cards, rng)
+    learners = create_learner_arrays(num_learners, rng)
+    chunks = list(stream_response_arrays(learners, cards, rng, chunk_size))
+    responses = {
+        key: np.concatenate([chunk[key] for chunk in chunks])
+        for key in ('learner', 'card', 'time', 'score')
+    }
+    order = np.argsort(responses['time'], kind='mergesort')
+    return {
+        'responses': {key: column[order]
+                      for key, column in responses.items()},
+        'learners': learners,
+        'cards': cards,
+    }
+
+
+def create_card_arrays(num_cards, rng):
+    """
+    Produces random set of cards with underlying values for
+    guess, slip, and transit, as columns.
+    """
+
+    return {
+        name: rng.triangular(low, (low + high) / 2, high, num_cards)
+        for name, (low, high) in (('guess', guess),
+                                  ('slip', slip),
+                                  ('transit', transit))
+    }
+
+
+def create_learner_arrays(num_learners, rng):
+    """
+    Produces the start time of each learner, as a column.
+    """
+
+    return {
+        'start_time': (rng.uniform(*session_gap, size=num_learners)
+                       * num_learners / 2).astype(np.int64),
+    }
+
+
+def stream_response_arrays(learners, cards, rng, chunk_size=10000):
+    """
+    Generates the responses of `chunk_size` learners at a time,
+    each chunk as columns sorted by time. Chunks are not in time order
+    with each other; use `main_arrays` when that matters.
+    """
+
+    start_times = learners['start_time']
+    for offset in range(0, len(start_times), chunk_size):
+        chunk = create_response_arrays(
+            start_times[offset:offset + chunk_size], cards, rng, offset)
+        order = np.argsort(chunk['time'], kind='mergesort')
+        yield {key: column[order] for key, column in chunk.items()}
+
+
+def create_response_arrays(start_times, cards, rng, offset=0):
+    """
+    Simulates the responses of many learners at once. Each step,
+    every learner still learning responds to one card, following the same
+    model as `create_responses_as_learner`.
+    """
+
+    num_learners, num_cards = len(start_times), len(cards['guess'])
+    learned = np.zeros(num_learners)
+    time = np.array(start_times, dtype=np.int64)
+    count = np.zeros(num_learners, dtype=np.int64)
+    # Each learner sees the cards in a random order before repeating
+    card_order = np.argsort(rng.random_sample((num_learners, num_cards)),
+                            axis=1)
+    position = np.zeros(num_learners, dtype=np.int64)
+    active = np.arange(num_learners)
+    columns = {'learner': [], 'card': [], 'time': [], 'score': []}
+
+    while len(active):
+        seen_all = active[position[active] == num_cards]
+        card_order[seen_all] = np.argsort(
+            rng.random_sample((len(seen_all), num_cards)), axis=1)
+        position[seen_all] = 0
+        card = card_order[active, position[active]]
+        position[active] += 1
+
+        correct = (learned[active] * (1 - cards['slip'][card])
+                   + (1 - learned[active]) * cards['guess'][card])
+        score = (rng.random_sample(len(active)) < correct).astype(np.int64)
+        columns['learner'].append(active + offset)
+        columns['card'].append(card)
+        columns['time'].append(time[active])
+        columns['score'].append(score)
+
+        count[active] += 1
+        new_session = count[active] > rng.uniform(*max_questions,
+                                                  size=len(active))
+        gap = np.where(new_session,
+                       rng.uniform(*session_gap, size=len(active)),
+                       rng.uniform(*question_gap, size=len(active))
+                       ).astype(np.int64)
+        time[active] += gap
+        count[active[new_session]] = 0
+        learned[active] = np.where(
+            new_session,
+            learned[active] - degrade * gap / session_gap[1],
+            learned[active] + cards['transit'][card])
+
+        active = active[(learned[active] < max_learned) | (score != 1)]
+
+    return {key: np.concatenate(column) if column else
+            np.zeros(0, dtype=np.int64)
+            for key, column in columns.items()}
+
+
 if __name__ == '__main__':
     d = main()
     for r in d['responses']:
@@ -0,0 +1,58 @@
+"""
+Compares the per-update cost of the dict PMFs in `modules.sequencer.pmf`
+with the array PMFs in `modules.sequencer.pmf_array`,
+one card at a time and in a batch of many cards.
+"""
+
+import os
+import sys
+import inspect
+currentdir = os.path.dirname(
+    os.path.abspath(
+        inspect.getfile(
+            inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from timeit import timeit
+import numpy as np
+from modules.sequencer.update import update, update_array, \
+    update_distributions
+from modules.sequencer.pmf import init_pmf
+from modules.sequencer.pmf_array import init_pmf_array_around
+from modules.sequencer.params import init_guess, init_slip, precision
+
+
+def main(num_updates=10000, batch_size=1000):
+    guess_distribution = init_pmf({
+        h: 1 - (init_guess - h) ** 2
+        for h in [h / precision for h in range(1, precision)]})
+    slip_distribution = init_pmf({
+        h: 1 - (init_slip - h) ** 2
+        for h in [h / precision for h in range(1, precision)]})
+    guess_array = init_pmf_array_around(init_guess)
+    slip_array = init_pmf_array_around(init_slip)
+    guess_batch = np.tile(guess_array, (batch_size, 1))
+    slip_batch = np.tile(slip_array, (batch_size, 1))
+    scores = np.random.randint(0, 2, batch_size)
+    learneds = np.random.uniform(0, 1, batch_size)
+
+    dict_time = timeit(
+        lambda: update(1, 60, 0.5, guess_distribution, slip_distribution),
+        number=num_updates) / num_updates
+    array_time = timeit(
+        lambda: update_array(1, 60, 0.5, guess_array, slip_array),
+        number=num_updates) / num_updates
+    batch_time = timeit(
+        lambda: update_distributions(scores, learneds,
+                                     guess_batch, slip_batch),
+        number=max(1, num_updates // batch_size)
+    ) / max(1, num_updates // batch_size) / batch_size
+
+    print('dict update (us)', dict_time * 1e6)
+    print('array update (us)', array_time * 1e6)
+    print('batch update, per card (us)', batch_time * 1e6)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ currentdir = os.path.dirname(
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
-from mock import main as create_responses
+from mock import main_arrays as create_responses
 from modules.sequencer.update import update
 from modules.sequencer.pmf import init_pmf, get_guess_pmf_value, \
     get_slip_pmf_value
@@ -22,22 +22,13 @@ from modules.sequencer.params import init_learned, init_guess, \
 from math import sqrt
 
 
-def get_learner(name, my_learners):
-    return my_learners[name]
-
-
-def get_card(name, my_cards):
-    return my_cards[name]
-
-
-def main(num_learners=1000, num_cards=50):
-    d = create_responses(num_learners, num_cards)
-    responses, learners, cards = d['responses'], d['learners'], d['cards']
-
-    precision = 20
+def estimate_cards(responses, num_cards, precision=20):
+    """
+    Replay the responses, in order, through the sequencer.
+    Return the estimated guess, slip, and transit of each card.
+    """
 
     my_cards = [{
-        'name': card['name'],
         'guess_distribution': init_pmf({
             h: 1 - (init_guess - h) ** 2
             for h in [h / precision for h in range(1, precision)]}),
@@ -45,69 +36,74 @@ def main(num_learners=1000, num_cards=50):
             h:  1 - (init_slip - h) ** 2
             for h in [h / precision for h in range(1, precision)]}),
         'transit': init_transit,
-    } for card in cards]
+    } for _ in range(num_cards)]
 
-    my_learners = [{
-        'name': learner['name'],
-        'learned': init_learned,
-    } for learner in learners]
-
-    latest_response_per_learner = {}
-
-    for i, response in enumerate(responses):
-        # response keys: learner, card, time, score
-
-        if response['learner'] in latest_response_per_learner:
-            prev_response = latest_response_per_learner[response['learner']]
-        else:
-            prev_response = {
-                'time': response['time'],
-                'prev_learned': init_learned,
-            }
+    my_learners = {}
 
-        my_learner = get_learner(response['learner'], my_learners)
-        my_card = get_card(response['card'], my_cards)
+    for learner, card, time, score in zip(responses['learner'].tolist(),
+                                          responses['card'].tolist(),
+                                          responses['time'].tolist(),
+                                          responses['score'].tolist()):
+        learned, prev_time = my_learners.get(learner, (init_learned, time))
+        my_card = my_cards[card]
 
-        response['prev_learned'] = my_learner['learned']
-
-        c = update(learned=my_learner['learned'],
+        c = update(learned=learned,
                    guess_distribution=my_card['guess_distribution'],
                    slip_distribution=my_card['slip_distribution'],
-                   score=response['score'],
-                   time_delta=response['time'] - prev_response['time'])
+                   score=score,
+                   time_delta=time - prev_time)
 
-        my_learner['learned'] = c['learned']
+        my_learners[learner] = (c['learned'], time)
         my_card['guess_distribution'] = c['guess_distribution']
         my_card['slip_distribution'] = c['slip_distribution']
 
-        latest_response_per_learner[response['learner']] = response
-
-    # Compute the error rates.
-    # Error should sqrt(sum( (o - x)^2 for o in list ))
-    guess_error, slip_error, transit_error = 0, 0, 0
-
-    for card in cards:
-        my_card = get_card(card['name'], my_cards)
+    for my_card in my_cards:
         my_card['guess'] = get_guess_pmf_value(my_card['guess_distribution'])
         my_card['slip'] = get_slip_pmf_value(my_card['slip_distribution'])
-        guess_error += (my_card['guess'] - card['guess']) ** 2
-        slip_error += (my_card['slip'] - card['slip']) ** 2
-        transit_error += (my_card['transit'] - card['transit']) ** 2
 
-    print('guess_error', sqrt(guess_error / len(my_cards)))
-    print('slip_error', sqrt(slip_error / len(my_cards)))
-    print('transit_error', sqrt(transit_error / len(my_cards)))
+    return my_cards
+
+
+def get_errors(cards, my_cards):
+    """
+    Error should sqrt(sum( (o - x)^2 for o in list )).
+    Given the mock cards, and either the estimated cards,
+    or the same value for every card.
+    """
+
+    errors = {}
+    for name in ('guess', 'slip', 'transit'):
+        if isinstance(my_cards, dict):
+            estimates = [my_cards[name]] * len(cards[name])
+        else:
+            estimates = [my_card[name] for my_card in my_cards]
+        errors[name + '_error'] = sqrt(sum(
+            (estimate - actual) ** 2
+            for estimate, actual in zip(estimates, cards[name].tolist())
+        ) / len(estimates))
+    return errors
+
+
+def main(num_learners=1000, num_cards=50, seed=None):
+    d = create_responses(num_learners, num_cards, seed=seed)
+    responses, cards = d['responses'], d['cards']
+
+    errors = get_errors(cards, estimate_cards(responses, num_cards))
+    control = get_errors(cards, {
+        'guess': init_guess,
+        'slip': init_slip,
+        'transit': init_transit,
+    })
 
-    guess_error, slip_error, transit_error = 0, 0, 0
+    for name, error in sorted(errors.items()):
+        print(name, error)
+    for name, error in sorted(control.items()):
+        print('CONTROL', name, error)
 
-    for card in cards:
-        guess_error += (init_guess - card['guess']) ** 2
-        slip_error += (init_slip - card['slip']) ** 2
-        transit_error += (init_transit - card['transit']) ** 2
+    errors.update({'control_' + name: error
+                   for name, error in control.items()})
+    return errors
 
-    print('CONTROL guess_error', sqrt(guess_error / len(my_cards)))
-    print('CONTROL slip_error', sqrt(slip_error / len(my_cards)))
-    print('CONTROL transit_error', sqrt(transit_error / len(my_cards)))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,227 @@
+"""
+Searches over the sequencer's parameters, so we can tune them
+without hand-editing `modules/sequencer/params.py`.
+
+The mock responses are created once, and saved as NumPy files
+each worker memory-maps, so every setting replays the same responses
+without copying them per process. Each setting is ranked
+by how well it estimates the cards' guess and slip,
+and then by the time it takes per update.
+
+    python3 simulation/sweep.py --search grid
+    python3 simulation/sweep.py --search random --samples 100
+"""
+
+import os
+import sys
+import inspect
+currentdir = os.path.dirname(
+    os.path.abspath(
+        inspect.getfile(
+            inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+import json
+import shutil
+import tempfile
+from argparse import ArgumentParser
+from itertools import product
+from math import sqrt
+from multiprocessing import Pool
+from random import Random
+from time import time
+import numpy as np
+from mock import main_arrays as create_responses
+from modules.sequencer.pmf_array import init_pmf_array_around, \
+    update_pmf_array, get_guess_pmf_array_likelihood, \
+    get_slip_pmf_array_likelihood, get_guess_pmf_array_value, \
+    get_slip_pmf_array_value
+from modules.sequencer.formulas import calculate_correct, update_learned
+from modules.sequencer.params import init_learned, init_guess, init_slip
+from modules.sequencer import params
+
+# For grid search, the values to try of each parameter.
+# For random search, the range between the first and last value.
+search_space = {
+    'adjust_guess': (0.7, 0.82, 0.95),
+    'adjust_slip': (0.45, 0.6, 0.8),
+    'belief_factor': (354000.0, 708000.0, 1416000.0),
+    'init_transit': (0.02, 0.05, 0.1),
+    'precision': (10, 20, 40),
+}
+
+columns = ('learner', 'card', 'time', 'score')
+shared = {}
+
+
+def save_responses(path, num_learners, num_cards, seed):
+    """
+    Create the mock responses and save each column, and the cards'
+    underlying guess and slip, to the directory.
+    """
+
+    d = create_responses(num_learners, num_cards, seed=seed)
+    for name in columns:
+        np.save(os.path.join(path, name + '.npy'), d['responses'][name])
+    for name in ('guess', 'slip'):
+        np.save(os.path.join(path, 'card_' + name + '.npy'), d['cards'][name])
+    return len(d['responses']['score'])
+
+
+def load_responses(path):
+    """
+    Memory-map the saved responses. Runs once in each worker process.
+    """
+
+    for name in columns:
+        shared[name] = np.load(os.path.join(path, name + '.npy'),
+                               mmap_mode='r')
+    for name in ('guess', 'slip'):
+        shared['card_' + name] = np.load(
+            os.path.join(path, 'card_' + name + '.npy'), mmap_mode='r')
+
+
+def list_grid_settings(space=search_space):
+    """
+    List every combination of the values in the search space.
+    """
+
+    names = sorted(space)
+    return [dict(zip(names, values))
+            for values in product(*[space[name] for name in names])]
+
+
+def list_random_settings(samples, seed=None, space=search_space):
+    """
+    List settings sampled uniformly from the ranges of the search space.
+    Precision only takes the values listed.
+    """
+
+    rand = Random(seed)
+    settings = []
+    for _ in range(samples):
+        setting = {}
+        for name, values in sorted(space.items()):
+            if name == 'precision':
+                setting[name] = rand.choice(values)
+            else:
+                setting[name] = rand.uniform(min(values), max(values))
+        settings.append(setting)
+    return settings
+
+
+def evaluate(setting):
+    """
+    Replay the shared responses, in order, with the given parameters.
+    Return the setting with its guess, slip, and prediction errors,
+    and the time per update.
+    """
+
+    precision = setting['precision']
+    num_cards = len(shared['card_guess'])
+    guesses = np.tile(init_pmf_array_around(init_guess, precision),
+                      (num_cards, 1))
+    slips = np.tile(init_pmf_array_around(init_slip, precision),
+                    (num_cards, 1))
+    learners = {}
+    squared_error = 0
+
+    start = time()
+    for learner, card, time_, score in zip(*[shared[name].tolist()
+                                             for name in columns]):
+        learned, prev_time = learners.get(learner, (init_learned, time_))
+        guess = get_guess_pmf_array_value(guesses[card], precision,
+                                          setting['adjust_guess'])
+        slip = get_slip_pmf_array_value(slips[card], precision,
+                                        setting['adjust_slip'])
+        squared_error += (calculate_correct(guess, slip, learned)
+                          - score) ** 2
+        guesses[card] = update_pmf_array(
+            guesses[card],
+            get_guess_pmf_array_likelihood(score, learned, slip, precision))
+        slips[card] = update_pmf_array(
+            slips[card],
+            get_slip_pmf_array_likelihood(score, learned, guess, precision))
+        learned = update_learned(score, learned, guess, slip,
+                                 setting['init_transit'], time_ - prev_time,
+                                 setting['belief_factor'])
+        learners[learner] = (learned, time_)
+    elapsed = time() - start
+
+    num_responses = len(shared['score'])
+    guess_error = np.sqrt(np.mean((
+        get_guess_pmf_array_value(guesses, precision,
+                                  setting['adjust_guess'])
+        - shared['card_guess']) ** 2))
+    slip_error = np.sqrt(np.mean((
+        get_slip_pmf_array_value(slips, precision,
+                                 setting['adjust_slip'])
+        - shared['card_slip']) ** 2))
+    return {
+        'setting': setting,
+        'guess_error': float(guess_error),
+        'slip_error': float(slip_error),
+        'estimation_error': float(guess_error + slip_error),
+        'predict_error': sqrt(squared_error / max(num_responses, 1)),
+        'update_us': elapsed / max(num_responses, 1) * 1e6,
+    }
+
+
+def rank(results):
+    """
+    Order the results by estimation error, then by time per update.
+    """
+
+    return sorted(results, key=lambda result: (
+        round(result['estimation_error'], 4), result['update_us']))
+
+
+def main():
+    parser = ArgumentParser(description='Sweep the sequencer parameters.')
+    parser.add_argument('--search', choices=('grid', 'random'),
+                        default='grid')
+    parser.add_argument('--samples', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--learners', type=int, default=500)
+    parser.add_argument('--cards', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--output', default='sweep_results.json')
+    args = parser.parse_args()
+
+    if args.search == 'grid':
+        settings = list_grid_settings()
+    else:
+        settings = list_random_settings(args.samples, args.seed)
+    current = {name: getattr(params, name) for name in search_space}
+    settings.append(current)
+
+    path = tempfile.mkdtemp()
+    try:
+        num_responses = save_responses(path, args.learners, args.cards,
+                                       args.seed)
+        print('settings', len(settings), 'responses', num_responses)
+        start = time()
+        with Pool(args.workers, load_responses, (path,)) as pool:
+            results = rank(pool.map(evaluate, settings, chunksize=1))
+        print('elapsed (s)', time() - start)
+    finally:
+        shutil.rmtree(path)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+    for i, result in enumerate(results[:args.top]):
+        print(i + 1, json.dumps(result['setting'], sort_keys=True))
+        print('   estimation {estimation_error:.4f} '
+              '(guess {guess_error:.4f}, slip {slip_error:.4f}) '
+              'predict {predict_error:.4f} '
+              'update {update_us:.1f}us'.format(**result))
+    position = [result['setting'] for result in results].index(current)
+    print('current params.py ranks', position + 1, 'of', len(results))
+
+
+if __name__ == '__main__':
+    main()
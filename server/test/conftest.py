@@ -20,6 +20,9 @@ framework.update_config(config)
 from framework.database import setup_db, \
     make_db_connection, close_db_connection
 import framework.session
+from framework.redis import redis
+from database.requires_graph import get_requires_graph_key
+from database.set_members import members_key, parents_key
 
 setup_db()
 
@@ -62,11 +65,18 @@ def session(request, db_conn, users_table):
 
 def table(name, request, db_conn):
     """
-    Ensure the table is freshly empty after use.
+    Ensure the table, and its graphs, is freshly empty after use.
     """
     table = r.table(name)
-    table.delete().run(db_conn)
-    request.addfinalizer(lambda: table.delete().run(db_conn))
+
+    def clear():
+        table.delete().run(db_conn)
+        redis.delete(get_requires_graph_key(name))
+        if name == 'sets':
+            redis.delete(members_key, parents_key)
+
+    clear()
+    request.addfinalizer(clear)
     return table
 
 
@@ -0,0 +1,88 @@
+from framework.redis import redis
+from database.card_difficulty import get_card_difficulty_keys, \
+    has_card_difficulty_index, index_card_difficulty, \
+    build_card_difficulty_index, remove_card_difficulty, \
+    list_cards_by_difficulty, list_card_difficulty_averages
+
+
+def clear_index(unit_id):
+    redis.delete(*get_card_difficulty_keys(unit_id))
+
+
+def test_build_card_difficulty_index():
+    """
+    Expect to build a unit's index of cards by difficulty.
+    """
+
+    clear_index('u1')
+    assert not has_card_difficulty_index('u1')
+    build_card_difficulty_index('u1', [
+        {'entity_id': 'easy', 'guess': 0.5, 'slip': 0.05},
+        {'entity_id': 'hard', 'guess': 0.05, 'slip': 0.3},
+    ])
+    assert has_card_difficulty_index('u1')
+    cards = list_cards_by_difficulty('u1', 0, 1)
+    assert [card['entity_id'] for card in cards] == ['hard', 'easy']
+    assert cards[0]['guess'] == 0.05
+    assert cards[0]['slip'] == 0.3
+    clear_index('u1')
+
+
+def test_index_card_difficulty():
+    """
+    Expect to move a card within the index when its parameters change,
+    but only once the index exists.
+    """
+
+    clear_index('u1')
+    index_card_difficulty('u1', 'a', 0.3, 0.1)
+    assert not has_card_difficulty_index('u1')
+    build_card_difficulty_index('u1', [
+        {'entity_id': 'a', 'guess': 0.3, 'slip': 0.1},
+    ])
+    index_card_difficulty('u1', 'a', 0.1, 0.4)
+    cards = list_cards_by_difficulty('u1', 0.3, 0.4)
+    assert len(cards) == 1
+    assert cards[0]['guess'] == 0.1
+    assert list_cards_by_difficulty('u1', 0.6, 0.7) == []
+    clear_index('u1')
+
+
+def test_remove_card_difficulty():
+    """
+    Expect to remove a card from the index.
+    """
+
+    clear_index('u1')
+    build_card_difficulty_index('u1', [
+        {'entity_id': 'a', 'guess': 0.3, 'slip': 0.1},
+        {'entity_id': 'b', 'guess': 0.2, 'slip': 0.1},
+    ])
+    remove_card_difficulty('u1', 'a')
+    cards = list_cards_by_difficulty('u1', 0, 1)
+    assert [card['entity_id'] for card in cards] == ['b']
+    clear_index('u1')
+
+
+def test_list_card_difficulty_averages():
+    """
+    Expect to keep the average guess and slip of each unit's cards
+    as cards are added, moved, and removed.
+    """
+
+    clear_index('u1')
+    assert list_card_difficulty_averages(['u1']) == {}
+    build_card_difficulty_index('u1', [
+        {'entity_id': 'a', 'guess': 0.2, 'slip': 0.1},
+        {'entity_id': 'b', 'guess': 0.4, 'slip': 0.2},
+    ])
+    guess, slip = list_card_difficulty_averages(['u1'])['u1']
+    assert abs(guess - 0.3) < 1e-9
+    assert abs(slip - 0.15) < 1e-9
+    index_card_difficulty('u1', 'a', 0.4, 0.2)
+    index_card_difficulty('u1', 'c', 0.1, 0.3)
+    remove_card_difficulty('u1', 'b')
+    guess, slip = list_card_difficulty_averages(['u1'])['u1']
+    assert abs(guess - 0.25) < 1e-9
+    assert abs(slip - 0.25) < 1e-9
+    clear_index('u1')
@@ -0,0 +1,32 @@
+from framework.redis import redis
+from database.requires_graph import get_requires_graph_key, \
+    has_requires_graph, build_requires_graph, index_requires, \
+    get_requires_graph, has_requires_path
+
+
+def test_build_requires_graph():
+    """
+    Expect to build the table's graph, and to update edges once built.
+    """
+
+    redis.delete(get_requires_graph_key('tests'))
+    index_requires('tests', 'c', ['a'])
+    assert not has_requires_graph('tests')
+    assert get_requires_graph('tests') is None
+    build_requires_graph('tests', {'a': [], 'b': ['a']})
+    index_requires('tests', 'c', ['b'])
+    assert get_requires_graph('tests') == {'a': [], 'b': ['a'], 'c': ['b']}
+    assert redis.ttl(get_requires_graph_key('tests')) > 0
+    redis.delete(get_requires_graph_key('tests'))
+
+
+def test_has_requires_path():
+    """
+    Expect to find a path following the requires, even through cycles.
+    """
+
+    graph = {'a': [], 'b': ['a'], 'c': ['b', 'a'], 'd': ['d']}
+    assert has_requires_path(graph, ['c'], 'a')
+    assert not has_requires_path(graph, ['b'], 'c')
+    assert not has_requires_path(graph, ['d'], 'a')
+    assert not has_requires_path(graph, [], 'a')
@@ -1,4 +1,5 @@
-from database.response import insert_response, get_latest_response
+from database.response import insert_response, get_latest_response, \
+    insert_responses, list_latest_responses
 import rethinkdb as r
 
 
@@ -140,3 +141,63 @@ def test_get_latest(db_conn, responses_table):
     }]).run(db_conn)
 
     assert get_latest_response('abcd1234', 'apple', db_conn)['id'] == 'A'
+
+
+def test_insert_responses(db_conn, responses_table):
+    """
+    Expect to create many responses at once, in order,
+    or none if any is invalid.
+    """
+
+    data = [{
+        'user_id': 'A',
+        'card_id': card_id,
+        'unit_id': 'RM',
+        'response': 42,
+        'score': 1,
+        'learned': 0.5,
+    } for card_id in ('BC', 'DE')]
+    responses, errors = insert_responses(data, db_conn)
+    assert len(errors) == 0
+    assert [response['card_id'] for response in responses] == ['BC', 'DE']
+    assert all(response['created'] for response in responses)
+
+    del data[1]['score']
+    responses, errors = insert_responses(data, db_conn)
+    assert len(errors) == 1
+    assert errors[0]['name'] == '1.score'
+    assert responses_table.count().run(db_conn) == 2
+
+
+def test_list_latest_responses(db_conn, responses_table):
+    """
+    Expect to get the latest response per unit for a user.
+    """
+
+    responses_table.insert([{
+        'id': 'A',
+        'user_id': 'abcd1234',
+        'unit_id': 'apple',
+        'created': r.time(2004, 11, 3, 'Z'),
+    }, {
+        'id': 'B',
+        'user_id': 'abcd1234',
+        'unit_id': 'apple',
+        'created': r.now(),
+    }, {
+        'id': 'C',
+        'user_id': 'abcd1234',
+        'unit_id': 'banana',
+        'created': r.now(),
+    }, {
+        'id': 'D',
+        'user_id': 'other',
+        'unit_id': 'banana',
+        'created': r.now(),
+    }]).run(db_conn)
+
+    latest = list_latest_responses('abcd1234', ['apple', 'banana', 'kiwi'],
+                                   db_conn)
+    assert {unit_id: response['id']
+            for unit_id, response in latest.items()} == \
+        {'apple': 'B', 'banana': 'C'}
@@ -0,0 +1,95 @@
+from framework.redis import redis
+from database.review_schedule import get_review_key, review_users_key, \
+    get_review_due, schedule_reviews, get_review_dues, list_due_units, \
+    list_due_users, remove_due_users, get_set_reviews_key, \
+    get_set_units_reviews_key, schedule_set_reviews, get_set_review_dues
+from database.set_members import members_key, parents_key, \
+    build_set_members
+from database.user_sets import order_sets_by_review
+from modules.sequencer.formulas import calculate_belief
+from modules.sequencer.params import max_belief
+
+
+def clear_schedule(user_id):
+    redis.delete(get_review_key(user_id))
+    redis.zrem(review_users_key, user_id)
+
+
+def test_get_review_due():
+    """
+    Expect belief to drop to max belief at the due time,
+    and no due time for units not learned yet.
+    """
+
+    due = get_review_due(0.995, 1000)
+    assert abs(calculate_belief(0.995, due - 1000) - max_belief) < 1e-9
+    assert get_review_due(0.5, 1000) is None
+
+
+def test_schedule_reviews():
+    """
+    Expect to schedule learned units, and list the units due by time.
+    """
+
+    clear_schedule('u1')
+    schedule_reviews('u1', [
+        ('soon', 0.99, 0),
+        ('later', 0.999, 0),
+        ('learning', 0.5, 0),
+    ])
+    dues = get_review_dues('u1')
+    assert sorted(dues) == ['later', 'soon']
+    assert dues['soon'] < dues['later']
+    assert get_review_dues('u1', ['soon', 'learning']) == \
+        {'soon': dues['soon']}
+    assert list_due_units('u1', dues['soon']) == ['soon']
+    assert list_due_units('u1', dues['later']) == ['soon', 'later']
+
+    schedule_reviews('u1', [('soon', 0.5, 100)])
+    assert list(get_review_dues('u1')) == ['later']
+    clear_schedule('u1')
+
+
+def test_list_due_users():
+    """
+    Expect to list users with units due,
+    until taken out or their schedule changes.
+    """
+
+    clear_schedule('u1')
+    clear_schedule('u2')
+    schedule_reviews('u1', [('unit', 0.99, 0)])
+    schedule_reviews('u2', [('unit', 0.99, 10 ** 12)])
+    assert 'u1' in list_due_users()
+    assert 'u2' not in list_due_users()
+    remove_due_users(['u1'])
+    assert 'u1' not in list_due_users()
+    schedule_reviews('u1', [('other', 0.99, 0)])
+    assert 'u1' in list_due_users()
+    schedule_reviews('u1', [('unit', 0.5, 0), ('other', 0.5, 0)])
+    assert 'u1' not in list_due_users()
+    clear_schedule('u1')
+    clear_schedule('u2')
+
+
+def test_schedule_set_reviews():
+    """
+    Expect to keep each set's earliest due time, through nested sets,
+    and order the sets by it.
+    """
+
+    build_set_members({'s1': ['a', 'b'], 's2': ['s1', 'c'], 's3': ['d']})
+    keys = [get_set_reviews_key('u1')] + [
+        get_set_units_reviews_key('u1', set_id)
+        for set_id in ('s1', 's2', 's3')]
+    redis.delete(*keys)
+    schedule_set_reviews(None, 'u1', {'a': 300, 'b': 200, 'c': 100})
+    assert get_set_review_dues('u1') == {'s1': 200, 's2': 100}
+    schedule_set_reviews(None, 'u1', {'b': None, 'c': 400})
+    assert get_set_review_dues('u1') == {'s1': 300, 's2': 300}
+    schedule_set_reviews(None, 'u1', {'a': None})
+    assert get_set_review_dues('u1') == {'s2': 400}
+    sets = [{'entity_id': set_id} for set_id in ('s1', 's2', 's3')]
+    assert [set_['entity_id'] for set_ in order_sets_by_review('u1', sets)] \
+        == ['s2', 's1', 's3']
+    redis.delete(members_key, parents_key, *keys)
@@ -0,0 +1,59 @@
+from framework.redis import redis
+from database.set_members import members_key, parents_key, \
+    has_set_members, build_set_members, index_set_members, \
+    get_set_members, list_ancestor_set_ids, has_member_path
+
+
+def test_build_set_members():
+    """
+    Expect to build the members graph, and to update sets once built.
+    """
+
+    redis.delete(members_key, parents_key)
+    index_set_members('s3', ['s1'])
+    assert not has_set_members()
+    assert get_set_members() is None
+    build_set_members({'s1': ['u1'], 's2': ['s1', 'u2']})
+    index_set_members('s3', ['s2'])
+    assert get_set_members() == {
+        's1': ['u1'],
+        's2': ['s1', 'u2'],
+        's3': ['s2'],
+    }
+    assert redis.ttl(members_key) > 0
+    assert redis.ttl(parents_key) > 0
+    redis.delete(members_key, parents_key)
+
+
+def test_list_ancestor_set_ids():
+    """
+    Expect to find every set containing the unit, nearest first,
+    following the sets as their members change.
+    """
+
+    redis.delete(members_key, parents_key)
+    assert list_ancestor_set_ids('u1') is None
+    build_set_members({
+        's1': ['u1'],
+        's2': ['s1', 'u2'],
+        's3': ['s2', 'u1'],
+        's4': ['u2'],
+    })
+    assert list_ancestor_set_ids('u1') == ['s1', 's3', 's2']
+    assert list_ancestor_set_ids('u2') == ['s2', 's4', 's3']
+    assert list_ancestor_set_ids('u3') == []
+    index_set_members('s3', ['u3'])
+    index_set_members('s5', ['s1'])
+    assert list_ancestor_set_ids('u1') == ['s1', 's2', 's5']
+    assert list_ancestor_set_ids('u3') == ['s3']
+    redis.delete(members_key, parents_key)
+
+
+def test_has_member_path():
+    """
+    Expect to find a path following the members.
+    """
+
+    members = {'s1': ['u1'], 's2': ['s1'], 's3': ['s2']}
+    assert has_member_path(members, ['s2'], 'u1')
+    assert not has_member_path(members, ['s1'], 's3')
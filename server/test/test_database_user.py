@@ -1,7 +1,7 @@
 from database.user import insert_user, update_user, get_user, \
     is_password_valid, get_avatar, get_learning_context, \
     set_learning_context, get_email_token, is_valid_token, deliver_user, \
-    update_user_password
+    update_user_password, get_precomputed_cards, set_precomputed_cards
 import json
 from framework.redis import redis
 
@@ -299,6 +299,19 @@ def test_set_learning_context(db_conn, users_table):
         },
     }
 
+
+def test_precomputed_cards():
+    """
+    Expect to get the precomputed cards only for the card they were for.
+    """
+
+    user = {'id': 'abcd1234'}
+    assert get_precomputed_cards(user, 'A') is None
+    set_precomputed_cards(user, 'A', {'5': {'entity_id': 'B'}})
+    assert get_precomputed_cards(user, 'A') == {'5': {'entity_id': 'B'}}
+    assert get_precomputed_cards(user, 'C') is None
+    redis.delete('precomputed_cards_abcd1234')
+
     set_learning_context(user, card=None, unit=None)
     assert get_learning_context(user) == {}
 
@@ -2,6 +2,7 @@ import pytest
 import rethinkdb as r
 from conftest import table
 from test_config import config
+from framework.database import create_index
 import database.util as util
 from modules.util import extend, pick, omit
 from schemas.index import schema as default
@@ -56,6 +57,9 @@ vases_schema = extend({}, default, {
             },
         }
     },
+    'indexes': (
+        ('name',),
+    ),
 })
 
 
@@ -67,6 +71,13 @@ def vases_table(request, db_conn):
         (r.db(config['rdb_db'])
           .table_create(tablename)
           .run(db_conn))
+    indexes = (r.db(config['rdb_db'])
+                .table(tablename)
+                .index_list()
+                .run(db_conn))
+    for index in vases_schema['indexes']:
+        if index[0] not in indexes:
+            create_index(db_conn, tablename, index)
     return table(tablename, request, db_conn)
 
 
@@ -89,6 +100,28 @@ def test_insert_document(db_conn, vases_table):
     assert subdoc == subdata
 
 
+def test_insert_documents(db_conn, vases_table):
+    schema = vases_schema
+    data = [{
+        'id': 'haxxor',
+        'name': name,
+        'plants': [{'species': 'zzplant', 'quantity': 2}],
+        'soil': {'color': 'black'}
+    } for name in ('celestial', 'zen')]
+    documents, errors = util.insert_documents(schema, data, db_conn)
+    assert len(errors) == 0
+    assert [document['name'] for document in documents] == \
+        ['celestial', 'zen']
+    assert all(document['id'] != 'haxxor' for document in documents)
+    assert all(document['created'] for document in documents)
+
+    data[1]['plants'] = []
+    documents, errors = util.insert_documents(schema, data, db_conn)
+    assert documents == []
+    assert '1.plants' in [error['name'] for error in errors]
+    assert vases_table.count().run(db_conn) == 2
+
+
 def test_update_document(db_conn):
     schema = vases_schema
     data1 = {
@@ -192,6 +225,36 @@ def test_list_documents(db_conn, vases_table):
     assert len(documents) == 2
 
 
+def test_get_document_fields(db_conn, vases_table):
+    tablename = 'vases'
+    documents = create_test_data_set(db_conn, vases_table)
+    params = {'id': documents[0]['id']}
+    document = util.get_document(tablename, params, db_conn, ('name',))
+    assert document == {'name': documents[0]['name']}
+    params = {'id': 'nope'}
+    assert util.get_document(tablename, params, db_conn, ('name',)) is None
+
+
+def test_list_documents_fields(db_conn, vases_table):
+    tablename = 'vases'
+    create_test_data_set(db_conn, vases_table)
+    params = {'shape': 'round'}
+    documents = list(util.list_documents(tablename, params, db_conn,
+                                         ('name', 'shape')))
+    assert len(documents) == 2
+    assert all(set(d.keys()) == {'name', 'shape'} for d in documents)
+
+
+def test_stream_documents(db_conn, vases_table):
+    tablename = 'vases'
+    create_test_data_set(db_conn, vases_table)
+    params = {'shape': 'round'}
+    documents = util.stream_documents(tablename, params, db_conn,
+                                      fields=('name',), batch_size=1)
+    assert not isinstance(documents, list)
+    assert sorted(d['name'] for d in documents) == ['celestial', 'kitch']
+
+
 def test_delete_document(db_conn, vases_table):
     tablename = 'vases'
     documents = create_test_data_set(db_conn, vases_table)
@@ -205,39 +268,6 @@ def test_delete_document(db_conn, vases_table):
 ###############################################################################
 
 
-def test_recurse_embeds():
-    o = {}
-
-    def _(data, field_name, field_schema, prefix):
-        o[prefix + field_name] = data.get(field_name)
-
-    schema = vases_schema
-    data = {
-        'name': 'celestial',
-        'shape': 'round',
-        'plants': [
-            {'species': 'zzplant'},
-            {'species': 'rubbertree'},
-        ],
-        'soil': {'color': 'black'}
-    }
-    util.recurse_embeds(_, data, schema['fields'])
-    assert o == {
-        'created': None,
-        'id': None,
-        'modified': None,
-        'name': 'celestial',
-        'plants': [{'species': 'zzplant'}, {'species': 'rubbertree'}],
-        'plants.0.species': 'zzplant',
-        'plants.0.quantity': None,
-        'plants.1.species': 'rubbertree',
-        'plants.1.quantity': None,
-        'shape': 'round',
-        'soil': {'color': 'black'},
-        'soil.color': 'black'
-    }
-
-
 def test_prepare_document(db_conn, vases_table):
     schema = vases_schema
     create_test_data_set(db_conn, vases_table)
@@ -338,6 +368,20 @@ def test_validate_unique_fields(db_conn, vases_table):
     assert len(errors) == 0
 
 
+def test_validate_unique_documents(db_conn, vases_table):
+    create_test_data_set(db_conn, vases_table)
+    schema = vases_schema
+    data = [{'id': 'A', 'name': 'celestial'},
+            {'id': 'B', 'name': 'starry'},
+            {'id': 'C', 'name': 'starry'}]
+    errors = util.validate_unique_documents(schema, data, db_conn)
+    assert errors == [
+        [{'message': 'Must be unique.', 'name': 'name'}],
+        [],
+        [{'message': 'Must be unique.', 'name': 'name'}],
+    ]
+
+
 def test_bundle_fields():
     schema = vases_schema
     data = {
@@ -1,4 +1,8 @@
 from models.card import Card
+from database.card_difficulty import get_card_difficulty_keys, \
+    build_card_difficulty_index, list_cards_by_difficulty
+from framework.redis import redis
+import rethinkdb as r
 import pytest
 
 xfail = pytest.mark.xfail
@@ -147,3 +151,77 @@ def test_validate_response(db_conn, cards_table):
     """
 
     assert False
+
+
+def test_unit_accepted_query(db_conn, cards_table):
+    """
+    Expect to get the latest accepted cards still in the unit.
+    """
+
+    cards_table.insert([{
+        'id': 'A1',
+        'entity_id': 'A',
+        'unit_id': 'U',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+    }, {
+        'id': 'A2',
+        'entity_id': 'A',
+        'unit_id': 'U',
+        'created': r.time(2005, 11, 3, 'Z'),
+        'status': 'accepted',
+    }, {
+        'id': 'B1',
+        'entity_id': 'B',
+        'unit_id': 'U',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+    }, {
+        'id': 'B2',
+        'entity_id': 'B',
+        'unit_id': 'V',
+        'created': r.time(2005, 11, 3, 'Z'),
+        'status': 'accepted',
+    }]).run(db_conn)
+
+    cards = list(Card.unit_accepted_query('U').run(db_conn))
+    assert [card['id'] for card in cards] == ['A2']
+
+
+def test_move_unit(db_conn, cards_table):
+    """
+    Expect a card moved to another unit to leave the old unit's
+    difficulty index, and join the new one's.
+    """
+
+    cards_table.insert({
+        'id': 'A1',
+        'entity_id': 'A',
+        'unit_id': 'U',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+        'kind': 'choice',
+    }).run(db_conn)
+    for unit_id, card_ids in (('U', ['A']), ('V', [])):
+        redis.delete(*get_card_difficulty_keys(unit_id))
+        build_card_difficulty_index(unit_id, [
+            {'entity_id': card_id, 'guess': 0.3, 'slip': 0.1}
+            for card_id in card_ids
+        ] + [{'entity_id': 'Z', 'guess': 0.3, 'slip': 0.1}])
+    card = Card({
+        'id': 'A2',
+        'entity_id': 'A',
+        'unit_id': 'V',
+        'status': 'accepted',
+        'kind': 'choice',
+    })
+    card.index_accepted(db_conn)
+
+    def list_ids(unit_id):
+        return sorted(values['entity_id']
+                      for values in list_cards_by_difficulty(unit_id, 0, 1))
+
+    assert list_ids('U') == ['Z']
+    assert list_ids('V') == ['A', 'Z']
+    redis.delete(*get_card_difficulty_keys('U'))
+    redis.delete(*get_card_difficulty_keys('V'))
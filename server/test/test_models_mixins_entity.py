@@ -6,6 +6,7 @@ import rethinkdb as r
 from models.card import Card
 from models.set import Set
 from models.unit import Unit
+from models.mixins.entity import get_paging_errors
 
 
 def test_latest_accepted_card(db_conn, cards_table):
@@ -34,6 +35,65 @@ def test_latest_accepted_card(db_conn, cards_table):
     assert card['id'] == 'B2'
 
 
+def test_list_by_entity_ids_fields(db_conn, cards_table):
+    """
+    Expect to get only the given fields of the latest accepted versions.
+    """
+
+    cards_table.insert([{
+        'id': 'A1',
+        'entity_id': 'A',
+        'name': 'a',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+    }, {
+        'id': 'B2',
+        'entity_id': 'A',
+        'name': 'b',
+        'created': r.time(2005, 11, 3, 'Z'),
+        'status': 'accepted',
+    }]).run(db_conn)
+
+    cards = Card.list_by_entity_ids(db_conn, ['A'], fields=('id', 'name'))
+    assert cards == [{'id': 'B2', 'name': 'b'}]
+    query = Card.start_accepted_query(fields=('entity_id',))
+    assert list(query.run(db_conn)) == [{'entity_id': 'A'}]
+
+
+def test_stream_accepted(db_conn, cards_table):
+    """
+    Expect to iterate over the latest accepted version of each card.
+    """
+
+    cards_table.insert([{
+        'id': 'A1',
+        'entity_id': 'A',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+    }, {
+        'id': 'B2',
+        'entity_id': 'A',
+        'created': r.time(2005, 11, 3, 'Z'),
+        'status': 'accepted',
+    }, {
+        'id': 'C3',
+        'entity_id': 'A',
+        'created': r.time(2006, 11, 3, 'Z'),
+        'status': 'pending',
+    }, {
+        'id': 'D4',
+        'entity_id': 'B',
+        'created': r.time(2006, 11, 3, 'Z'),
+        'status': 'accepted',
+    }]).run(db_conn)
+
+    cards = list(Card.stream_accepted(db_conn, batch_size=1))
+    assert sorted(card['id'] for card in cards) == ['B2', 'D4']
+    assert isinstance(cards[0], Card)
+    cards = Card.stream_accepted(db_conn, fields=('id',))
+    assert sorted(card['id'] for card in cards) == ['B2', 'D4']
+
+
 def test_latest_accepted(db_conn, units_table):
     """
     Expect to get the latest accepted unit version.
@@ -109,6 +169,36 @@ def test_get_versions(db_conn, cards_table):
 
     card_versions = Card.get_versions(db_conn, 'A')
     assert len(card_versions) == 2
+    assert [version['id'] for version in card_versions] == ['B2', 'A1']
+
+
+def test_get_versions_before(db_conn, cards_table):
+    """
+    Expect to get the next page of versions given the last one seen.
+    """
+
+    cards_table.insert([{
+        'id': 'A%i' % year,
+        'entity_id': 'A',
+        'created': r.time(year, 11, 3, 'Z'),
+        'status': 'accepted',
+    } for year in range(2001, 2006)]).run(db_conn)
+
+    page = Card.get_versions(db_conn, 'A', limit=2)
+    assert [version['id'] for version in page] == ['A2005', 'A2004']
+    page = Card.get_versions(db_conn, 'A', limit=2,
+                             before=page[-1]['created'])
+    assert [version['id'] for version in page] == ['A2003', 'A2002']
+
+
+def test_get_paging_errors():
+    """
+    Expect to reject `skip`, as pages go by `before`.
+    """
+
+    assert get_paging_errors({'limit': 2, 'before': '2005-11-03'}) == []
+    errors = get_paging_errors({'skip': 10})
+    assert [error['name'] for error in errors] == ['skip']
 
 
 def test_list_requires(db_conn, cards_table):
@@ -123,7 +213,7 @@ def test_list_requires(db_conn, cards_table):
         'modified': r.now(),
         'status': 'accepted',
         'kind': 'video',
-        'requires': ['zxyz'],
+        'require_ids': ['zxyz'],
     }, {
         'entity_id': 'abcd',
         'unit_id': 'zytx',
@@ -145,7 +235,7 @@ def test_list_requires(db_conn, cards_table):
         'modified': r.now(),
         'status': 'accepted',
         'kind': 'choice',
-        'requires': ['abcd'],
+        'require_ids': ['abcd'],
     }]).run(db_conn)
 
     cards = Card.list_requires(db_conn, 'abcd')
@@ -166,7 +256,7 @@ def test_list_required_by(db_conn, cards_table):
         'modified': r.now(),
         'status': 'accepted',
         'kind': 'video',
-        'requires': ['zxyz'],
+        'require_ids': ['zxyz'],
     }, {
         'entity_id': 'abcd',
         'unit_id': 'zytx',
@@ -188,7 +278,7 @@ def test_list_required_by(db_conn, cards_table):
         'modified': r.now(),
         'status': 'accepted',
         'kind': 'choice',
-        'requires': ['abcd'],
+        'require_ids': ['abcd'],
     }]).run(db_conn)
 
     cards = Card.list_required_by(db_conn, 'abcd')
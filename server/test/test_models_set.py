@@ -167,6 +167,31 @@ def test_members(db_conn, sets_table, units_table):
     assert len(errors) == 0
 
 
+def test_is_valid_members(db_conn, sets_table, units_table):
+    """
+    Expect a set to report every member that isn't an accepted entity.
+    """
+
+    create_unit_a(db_conn, units_table)
+    set_ = Set({
+        'name': 'Statistics',
+        'body': 'A beginning course focused on probability.',
+        'members': [{
+            'id': 'A',
+            'kind': 'unit',
+        }, {
+            'id': 'B',
+            'kind': 'unit',
+        }, {
+            'id': 'A',
+            'kind': 'set',
+        }],
+    })
+    errors = set_.is_valid_members(db_conn)
+    assert [error['name'] for error in errors] == \
+        ['members.1.id', 'members.2.id']
+
+
 def test_list_by_entity_ids(db_conn, sets_table):
     """
     Expect to list sets by given entity IDs.
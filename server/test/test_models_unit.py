@@ -1,4 +1,7 @@
 from models.unit import Unit
+from framework.redis import redis
+from database.requires_graph import get_requires_graph_key, \
+    build_requires_graph, get_requires_graph
 import rethinkdb as r
 
 
@@ -122,3 +125,15 @@ def test_requires(db_conn, units_table):
     unit['require_ids'] = ['A']
     unit, errors = unit.save(db_conn)
     assert len(errors) == 0
+
+
+def test_index_accepted():
+    """
+    Expect an accepted version to update the cached requires graph,
+    even when accepted without `save`, as in mass upload.
+    """
+
+    build_requires_graph('units', {'A': []})
+    Unit({'entity_id': 'B', 'require_ids': ['A']}).index_accepted(None)
+    assert get_requires_graph('units') == {'A': [], 'B': ['A']}
+    redis.delete(get_requires_graph_key('units'))
@@ -0,0 +1,128 @@
+from modules.compiled_schema import get_compiled_schema, copy_document
+from modules.validations import is_required, is_string, has_min_length
+
+
+def lowercase(s):
+    return s.lower()
+
+
+fields = {
+    'name': {
+        'validate': (is_required, is_string),
+        'bundle': lowercase,
+        'unique': True,
+    },
+    'tags': {
+        'default': [],
+    },
+    'password': {
+        'validate': ((has_min_length, 8),),
+        'access': ('private',),
+    },
+    'soil': {
+        'embed': {
+            'color': {
+                'validate': (is_required,),
+                'default': 'brown',
+                'deliver': lowercase,
+            },
+        },
+    },
+    'plants': {
+        'embed_many': {
+            'species': {
+                'validate': (is_required,),
+            },
+        },
+    },
+}
+
+
+def test_get_compiled_schema():
+    """
+    Expect to compile each schema once.
+    """
+
+    compiled = get_compiled_schema(fields)
+    assert get_compiled_schema(fields) is compiled
+    assert set(compiled.keys()) == {'tidy', 'defaults', 'validate',
+                                    'bundle', 'deliver', 'unique'}
+
+
+def test_unique():
+    """
+    Expect to list the top-level unique fields.
+    """
+
+    assert get_compiled_schema(fields)['unique'] == ('name',)
+
+
+def test_copy_document():
+    """
+    Expect to copy dicts and lists, but not the rest.
+    """
+
+    data = {'a': [{'b': 1}], 'c': 'd'}
+    copy = copy_document(data)
+    assert copy == data
+    assert copy['a'] is not data['a']
+    assert copy['a'][0] is not data['a'][0]
+
+
+def test_tidy():
+    """
+    Expect to copy the document without the extra fields, even embedded.
+    """
+
+    data = {'name': 'A', 'extra': 1, 'plants': [{'species': 'x', 'z': 2}]}
+    tidied = get_compiled_schema(fields)['tidy'](data)
+    assert tidied == {'name': 'A', 'plants': [{'species': 'x'}]}
+    assert 'z' in data['plants'][0]
+
+
+def test_defaults():
+    """
+    Expect to set defaults, even embedded, without sharing lists.
+    """
+
+    defaults = get_compiled_schema(fields)['defaults']
+    a, b = defaults({}), defaults({})
+    assert a['tags'] == []
+    assert a['tags'] is not b['tags']
+    assert a['soil'] == {'color': 'brown'}
+    assert a['plants'] == []
+
+
+def test_validate():
+    """
+    Expect the first error of each field, named by its path.
+    """
+
+    errors = get_compiled_schema(fields)['validate']({
+        'name': 1,
+        'password': 'abc',
+        'plants': [{'species': 'x'}, {}],
+    })
+    assert [error['name'] for error in errors] == [
+        'name', 'password', 'soil.color', 'plants.1.species']
+
+
+def test_bundle():
+    """
+    Expect to bundle the fields in place.
+    """
+
+    data = get_compiled_schema(fields)['bundle']({'name': 'ABC'})
+    assert data['name'] == 'abc'
+
+
+def test_deliver():
+    """
+    Expect to remove fields by access, and deliver the rest.
+    """
+
+    deliver = get_compiled_schema(fields)['deliver']
+    data = {'name': 'A', 'password': 'abcdefgh', 'soil': {'color': 'RED'}}
+    assert deliver(copy_document(data)) == {
+        'name': 'A', 'soil': {'color': 'red'}, 'plants': []}
+    assert deliver(copy_document(data), 'private')['password'] == 'abcdefgh'
@@ -1,6 +1,8 @@
 import rethinkdb as r
 
 from models.card import Card
+from models.cards.video_card import VideoCard
+from models.unit import Unit
 from modules import entity
 
 import pytest
@@ -55,3 +57,36 @@ def test_get_card_by_kind(db_conn, cards_table):
     """
 
     assert False
+
+
+def test_flush_entities(db_conn, cards_table, units_table):
+    """
+    Expect to fill out the entities in the given order,
+    with the cards in their kinds, and None for the misses.
+    """
+
+    cards_table.insert([{
+        'id': 'A1',
+        'entity_id': 'A',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+        'kind': 'video'
+    }]).run(db_conn)
+    units_table.insert([{
+        'id': 'U1',
+        'entity_id': 'U',
+        'created': r.time(2004, 11, 3, 'Z'),
+        'status': 'accepted',
+    }]).run(db_conn)
+
+    entities = entity.flush_entities(db_conn, [
+        {'kind': 'unit', 'id': 'U'},
+        {'kind': 'card', 'id': 'Z'},
+        {'kind': 'card', 'id': 'A'},
+        {'kind': 'topic', 'id': 'A'},
+    ])
+
+    assert isinstance(entities[0], Unit)
+    assert entities[1] is None
+    assert isinstance(entities[2], VideoCard)
+    assert entities[3] is None
@@ -190,6 +190,49 @@ def test_list_params(db_conn, users_table):
     assert users[0]['email'] == 'test1@example.com'
 
 
+def test_list_fields(db_conn, users_table):
+    """
+    Expect to get only the given fields of each document.
+    """
+    users_table.insert([
+        {
+            'id': '1',
+            'name': 'test1',
+            'email': 'test1@example.com',
+        },
+        {
+            'id': '2',
+            'name': 'test2',
+            'email': 'test2@example.com',
+        },
+    ]).run(db_conn)
+    users = User.list(db_conn, fields=('id',), name='test1')
+    assert users == [{'id': '1'}]
+
+
+def test_stream(db_conn, users_table):
+    """
+    Expect to iterate over the models, a batch at a time.
+    """
+    users_table.insert([
+        {
+            'id': '1',
+            'name': 'test1',
+            'email': 'test1@example.com',
+        },
+        {
+            'id': '2',
+            'name': 'test2',
+            'email': 'test2@example.com',
+        },
+    ]).run(db_conn)
+    users = list(User.stream(db_conn, batch_size=1))
+    assert len(users) == 2
+    assert isinstance(users[0], User)
+    users = list(User.stream(db_conn, fields=('id',), name='test2'))
+    assert users == [{'id': '2'}]
+
+
 def test_list_none(db_conn, users_table):
     """
     Expect to get an empty list of models when none.
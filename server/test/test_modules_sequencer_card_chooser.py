@@ -1,4 +1,8 @@
 import pytest
+from modules.sequencer.card_chooser import get_difficulty_range, \
+    filter_assessment_candidates, get_learned_bucket
+from modules.sequencer.formulas import calculate_correct, \
+    calculate_difficulty
 
 xfail = pytest.mark.xfail
 
@@ -10,3 +14,44 @@ def test_update(app):
     """
 
     assert False
+
+
+def test_get_difficulty_range():
+    """
+    Expect the difficulty range to contain every card
+    within the correct band for the given learned.
+    """
+
+    assert get_difficulty_range(0.5) == (0.25, 0.75)
+    for learned in (0.1, 0.4, 0.5, 0.8, 0.99):
+        low, high = get_difficulty_range(learned)
+        for guess in (0.05, 0.2, 0.4, 0.6):
+            for slip in (0.05, 0.2, 0.35):
+                correct = calculate_correct(guess, slip, learned)
+                if 0.25 < correct < 0.75:
+                    assert low <= calculate_difficulty(guess, slip) <= high
+
+
+def test_filter_assessment_candidates():
+    """
+    Expect to keep only cards within the correct band,
+    other than the previous card.
+    """
+
+    cards_values = [
+        {'entity_id': 'easy', 'guess': 0.9, 'slip': 0.05},
+        {'entity_id': 'fair', 'guess': 0.3, 'slip': 0.1},
+        {'entity_id': 'previous', 'guess': 0.3, 'slip': 0.1},
+        {'entity_id': 'hard', 'guess': 0.05, 'slip': 0.9},
+    ]
+    candidates = filter_assessment_candidates(cards_values, 0.4, 'previous')
+    assert [values['entity_id'] for values in candidates] == ['fair']
+
+
+def test_get_learned_bucket():
+    """
+    Expect to group learned values by tenths.
+    """
+
+    assert get_learned_bucket(0.4) == get_learned_bucket(0.45) == '4'
+    assert get_learned_bucket(0.99) == '9'
@@ -0,0 +1,129 @@
+import json
+from framework.redis import redis
+from modules.sequencer.card_updates import queue_card_update, \
+    queue_card_updates, group_card_updates, count_card_learners, \
+    queue_key, learners_key, lock_key, dead_key, finish_script, \
+    requeue_dead_card_updates, count_dead_card_updates
+
+
+def test_queue_card_update():
+    """
+    Expect to add observations to the queue in order,
+    each with a new sequence number.
+    """
+
+    redis.delete(queue_key)
+    a = queue_card_update('card-a', 'unit', 1, 0.4)
+    b = queue_card_update('card-a', 'unit', 0, 0.5)
+    assert b['seq'] > a['seq']
+    queued = [json.loads(item.decode())
+              for item in redis.lrange(queue_key, 0, -1)]
+    assert queued == [a, b]
+    redis.delete(queue_key)
+
+
+def test_queue_card_updates():
+    """
+    Expect to add many observations to the queue in one step,
+    with consecutive sequence numbers.
+    """
+
+    redis.delete(queue_key)
+    observations = queue_card_updates([
+        {'card_id': 'card-a', 'unit_id': 'unit', 'score': 1, 'learned': 0.4},
+        {'card_id': 'card-b', 'unit_id': 'unit', 'score': 0, 'learned': 0.5},
+    ])
+    assert observations[1]['seq'] == observations[0]['seq'] + 1
+    queued = [json.loads(item.decode())
+              for item in redis.lrange(queue_key, 0, -1)]
+    assert queued == observations
+    assert queue_card_updates([]) == []
+    redis.delete(queue_key)
+
+
+def test_group_card_updates():
+    """
+    Expect to group observations per card in order,
+    skipping the ones already applied.
+    """
+
+    observations = [
+        {'seq': 3, 'card_id': 'a', 'score': 1},
+        {'seq': 1, 'card_id': 'a', 'score': 0},
+        {'seq': 2, 'card_id': 'b', 'score': 1},
+        {'seq': 4, 'card_id': 'b', 'score': 0},
+    ]
+    grouped = group_card_updates(observations, {'b': {'last_seq': 2}})
+    assert [o['seq'] for o in grouped['a']] == [1, 3]
+    assert [o['seq'] for o in grouped['b']] == [4]
+
+
+def test_count_card_learners():
+    """
+    Expect to count each card's distinct learners,
+    without counting a replayed learner twice.
+    """
+
+    for card_id in ('a', 'b'):
+        redis.delete(learners_key.format(card_id=card_id))
+    grouped = {
+        'a': [{'user_id': 'u1'}, {'user_id': 'u2'}, {'user_id': 'u1'}],
+        'b': [{'user_id': None}],
+    }
+    assert count_card_learners(grouped) == {'a': 2, 'b': 0}
+    assert count_card_learners(grouped) == {'a': 2, 'b': 0}
+    for card_id in ('a', 'b'):
+        redis.delete(learners_key.format(card_id=card_id))
+
+
+def test_finish_script():
+    """
+    Expect to take the batch off the queue, and move the failed
+    observations to the dead letter list, only while holding the lock.
+    """
+
+    redis.delete(queue_key, dead_key)
+    queue_card_updates([
+        {'card_id': 'card-a', 'unit_id': 'unit', 'score': 1, 'learned': 0.4},
+        {'card_id': 'card-b', 'unit_id': 'unit', 'score': 0, 'learned': 0.5},
+        {'card_id': 'card-c', 'unit_id': 'unit', 'score': 0, 'learned': 0.5},
+    ])
+    raw = redis.lrange(queue_key, 0, 1)
+    redis.set(lock_key, 'other')
+    assert not finish_script(keys=[lock_key, queue_key, dead_key],
+                             args=['mine', 2, raw[1]])
+    assert redis.llen(queue_key) == 3
+    redis.set(lock_key, 'mine')
+    assert finish_script(keys=[lock_key, queue_key, dead_key],
+                         args=['mine', 2, raw[1]])
+    assert redis.llen(queue_key) == 1
+    assert redis.lrange(dead_key, 0, -1) == [raw[1]]
+    redis.delete(queue_key, dead_key, lock_key)
+
+
+def test_requeue_dead_card_updates():
+    """
+    Expect to move dead observations back onto the queue,
+    with new sequence numbers after the queued ones.
+    """
+
+    redis.delete(queue_key, dead_key)
+    a, b, c = queue_card_updates([
+        {'card_id': 'card-a', 'unit_id': 'unit', 'score': 1, 'learned': 0.4},
+        {'card_id': 'card-b', 'unit_id': 'unit', 'score': 0, 'learned': 0.5},
+        {'card_id': 'card-c', 'unit_id': 'unit', 'score': 0, 'learned': 0.5},
+    ])
+    redis.rpush(dead_key, *redis.lrange(queue_key, 0, 1))
+    redis.ltrim(queue_key, 2, -1)
+    assert count_dead_card_updates() == 2
+    assert requeue_dead_card_updates(limit=1) == 1
+    assert requeue_dead_card_updates() == 1
+    assert count_dead_card_updates() == 0
+    queued = [json.loads(item.decode())
+              for item in redis.lrange(queue_key, 0, -1)]
+    assert [o['card_id'] for o in queued] == ['card-c', 'card-a', 'card-b']
+    assert queued[0] == c
+    assert c['seq'] < queued[1]['seq'] < queued[2]['seq']
+    assert dict(queued[1], seq=a['seq']) == a
+    assert requeue_dead_card_updates() == 0
+    redis.delete(queue_key, dead_key)
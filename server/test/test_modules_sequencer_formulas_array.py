@@ -0,0 +1,42 @@
+import numpy as np
+from modules.sequencer.formulas import calculate_belief, update_learned
+from modules.sequencer.formulas_array import calculate_belief_array, \
+    update_learned_array, judge_done_array
+
+
+def test_calculate_belief_array():
+    """
+    Expect to match `calculate_belief` for each learner.
+    """
+
+    learned = [0.1, 0.5, 0.99]
+    time_delta = [0, 60 * 60, 30 * 24 * 60 * 60]
+    assert np.allclose(calculate_belief_array(learned, time_delta), [
+        calculate_belief(l_, t) for l_, t in zip(learned, time_delta)])
+
+
+def test_update_learned_array():
+    """
+    Expect to match `update_learned` for each learner.
+    """
+
+    score = [1, 0, 1, 0.5]
+    learned = [0.4, 0.4, 0.9, 0.2]
+    guess = [0.3, 0.3, 0.2, 0.25]
+    slip = [0.1, 0.1, 0.15, 0.05]
+    time_delta = [0, 60, 24 * 60 * 60, 10]
+    expected = [update_learned(*args, transit=0.05, time_delta=t)
+                for *args, t in zip(score, learned, guess, slip,
+                                    time_delta)]
+    assert np.allclose(update_learned_array(score, learned, guess, slip,
+                                            0.05, time_delta), expected)
+
+
+def test_judge_done_array():
+    """
+    Expect learners done only when learned is high and still believed.
+    """
+
+    done = judge_done_array([0.5, 0.995, 0.995],
+                            [0, 0, 365 * 24 * 60 * 60])
+    assert done.tolist() == [False, True, False]
@@ -0,0 +1,67 @@
+import numpy as np
+from modules.sequencer.mastery_time import get_axis_weights, \
+    estimate_mastery, get_current_learned, load_mastery_table
+from modules.sequencer.params import init_learned, max_learned
+
+
+def create_table():
+    """
+    Create a table where responses grow with each axis,
+    so interpolation is easy to check.
+    """
+
+    grid = np.array([0.0, 0.5, 1.0])
+    table = {axis: grid for axis in ('learned', 'guess', 'slip', 'transit')}
+    learned, guess, slip, transit = np.meshgrid(grid, grid, grid, grid,
+                                                indexing='ij')
+    table['responses'] = 10 * learned + guess + slip + transit
+    table['seconds'] = 60 * table['responses']
+    return table
+
+
+def test_get_axis_weights():
+    """
+    Expect to find the grid points around the value,
+    taking the nearest end past the grid.
+    """
+
+    grid = np.array([0.0, 0.5, 1.0])
+    assert get_axis_weights(grid, 0.25) == (0, 0.5)
+    assert get_axis_weights(grid, 0.5) == (1, 0.0)
+    assert get_axis_weights(grid, 1.0) == (1, 1.0)
+    assert get_axis_weights(grid, -1) == (0, 0.0)
+
+
+def test_estimate_mastery():
+    """
+    Expect to interpolate between the grid points,
+    and to need nothing more once learned.
+    """
+
+    table = create_table()
+    estimate = estimate_mastery(0.25, 0.5, 0.75, 0, table)
+    assert np.isclose(estimate['responses'], 2.5 + 0.5 + 0.75)
+    assert np.isclose(estimate['seconds'], 60 * estimate['responses'])
+    assert estimate_mastery(max_learned, 0.5, 0.5, 0.5, table) == {
+        'responses': 0.0, 'seconds': 0.0,
+    }
+
+
+def test_mastery_table():
+    """
+    Expect the built table to need fewer responses
+    the more the learner already knows.
+    """
+
+    table = load_mastery_table()
+    low = estimate_mastery(0.1, 0.3, 0.1, 0.05, table)
+    high = estimate_mastery(0.8, 0.3, 0.1, 0.05, table)
+    assert low['responses'] > high['responses'] > 0
+
+
+def test_get_current_learned():
+    """
+    Expect to start new learners at the initial learned.
+    """
+
+    assert get_current_learned(None) == init_learned
@@ -0,0 +1,103 @@
+import numpy as np
+from modules.sequencer.pmf import init_pmf, update_pmf, get_pmf_value, \
+    get_guess_pmf_likelihood, get_slip_pmf_likelihood, \
+    get_guess_pmf_value, get_slip_pmf_value
+from modules.sequencer.pmf_array import get_pmf_grid, init_pmf_array, \
+    init_pmf_array_around, update_pmf_array, normalize_pmf_array, \
+    get_pmf_array_value, get_guess_pmf_array_likelihood, \
+    get_slip_pmf_array_likelihood, get_guess_pmf_array_value, \
+    get_slip_pmf_array_value, pmf_to_array, array_to_pmf
+
+
+def dict_pmf(init):
+    return init_pmf({
+        h: 1 - (init - h) ** 2
+        for h in [h / 20 for h in range(1, 20)]
+    })
+
+
+def test_get_pmf_grid():
+    """
+    Expect the grid to match the hypotheses of the dict PMFs.
+    """
+
+    assert get_pmf_grid(20).tolist() == [h / 20 for h in range(1, 20)]
+
+
+def test_init_pmf_array():
+    """
+    Expect to create a normalized PMF from weights.
+    """
+
+    probabilities = init_pmf_array([1, 1, 2])
+    assert probabilities.tolist() == [0.25, 0.25, 0.5]
+    assert np.allclose(init_pmf_array_around(0.3),
+                       pmf_to_array(dict_pmf(0.3)))
+
+
+def test_normalize_pmf_array():
+    """
+    Expect each PMF of a batch to add up to 1.
+    """
+
+    probabilities = normalize_pmf_array(np.array([[1., 1.], [1., 3.]]))
+    assert probabilities.tolist() == [[0.5, 0.5], [0.25, 0.75]]
+
+
+def test_get_pmf_array_value():
+    """
+    Expect to match the value of the dict PMF.
+    """
+
+    hypotheses = dict_pmf(0.3)
+    probabilities = pmf_to_array(hypotheses)
+    assert np.isclose(get_pmf_array_value(probabilities),
+                      get_pmf_value(hypotheses))
+    assert np.isclose(get_guess_pmf_array_value(probabilities),
+                      get_guess_pmf_value(hypotheses))
+    assert np.isclose(get_slip_pmf_array_value(probabilities),
+                      get_slip_pmf_value(hypotheses))
+
+
+def test_update_pmf_array():
+    """
+    Expect updates to match the dict PMF updates.
+    """
+
+    data = {'score': 1, 'learned': 0.6, 'guess': 0.25, 'slip': 0.08}
+    guess = dict_pmf(0.3)
+    slip = dict_pmf(0.1)
+    guess_array = pmf_to_array(guess)
+    slip_array = pmf_to_array(slip)
+    for score in (1, 0, 1, 1, 0):
+        data['score'] = score
+        guess = update_pmf(guess, data, get_guess_pmf_likelihood)
+        slip = update_pmf(slip, data, get_slip_pmf_likelihood)
+        guess_array = update_pmf_array(guess_array,
+                                       get_guess_pmf_array_likelihood(
+                                           score, 0.6, 0.08))
+        slip_array = update_pmf_array(slip_array,
+                                      get_slip_pmf_array_likelihood(
+                                          score, 0.6, 0.25))
+    assert np.allclose(guess_array, pmf_to_array(guess))
+    assert np.allclose(slip_array, pmf_to_array(slip))
+
+
+def test_batch_likelihood():
+    """
+    Expect a batch of likelihoods to match one-by-one likelihoods.
+    """
+
+    batch = get_guess_pmf_array_likelihood([1, 0], [0.2, 0.9], [0.1, 0.3])
+    assert batch.shape == (2, 19)
+    assert np.allclose(batch[1],
+                       get_guess_pmf_array_likelihood(0, 0.9, 0.3))
+
+
+def test_array_to_pmf():
+    """
+    Expect to convert back and forth between array and dict PMFs.
+    """
+
+    hypotheses = dict_pmf(0.1)
+    assert array_to_pmf(pmf_to_array(hypotheses)) == hypotheses
@@ -0,0 +1,110 @@
+from modules.sequencer.progress import create_progress, apply_unit_status, \
+    apply_due_reviews, get_units_signature, update_progress, \
+    delete_all_progress, save_progress, load_progress
+from framework.redis import redis
+from models.unit import Unit
+
+
+def create_units():
+    return [
+        Unit({'entity_id': 'a', 'require_ids': []}),
+        Unit({'entity_id': 'b', 'require_ids': ['a']}),
+        Unit({'entity_id': 'c', 'require_ids': ['b']}),
+    ]
+
+
+def test_create_progress():
+    """
+    Expect to bucket the units in priority order, with counts.
+    """
+
+    units = create_units()
+    progress = create_progress(units, {
+        'a': 'learn',
+        'b': 'learn',
+        'c': 'done',
+    }, {'c': 100, 'a': 200})
+    assert progress['buckets']['learn'] == ['a', 'b']
+    assert progress['buckets']['done'] == ['c']
+    assert progress['counts'] == {
+        'diagnose': 0, 'learn': 2, 'review': 0, 'done': 1,
+    }
+    assert progress['dues'] == {'c': 100}
+    assert progress['signature'] == get_units_signature(units)
+
+
+def test_apply_unit_status():
+    """
+    Expect to move only the one unit, and keep its review due time.
+    """
+
+    units = create_units()
+    progress = create_progress(units, {
+        'a': 'learn',
+        'b': 'learn',
+        'c': 'diagnose',
+    }, {})
+    apply_unit_status(progress, units, 'a', 'done', 100)
+    assert progress['buckets']['learn'] == ['b']
+    assert progress['buckets']['done'] == ['a']
+    assert progress['counts']['learn'] == 1
+    assert progress['counts']['done'] == 1
+    assert progress['dues'] == {'a': 100}
+    apply_unit_status(progress, units, 'z', 'done', 100)
+    assert 'z' not in progress['statuses']
+
+
+def test_apply_due_reviews():
+    """
+    Expect to move the done units that came due into review.
+    """
+
+    units = create_units()
+    progress = create_progress(units, {
+        'a': 'done',
+        'b': 'done',
+        'c': 'learn',
+    }, {'a': 100, 'b': 300})
+    assert apply_due_reviews(progress, units, now=200) == ['a']
+    assert progress['buckets']['review'] == ['a']
+    assert progress['buckets']['done'] == ['b']
+    assert progress['dues'] == {'b': 300}
+
+
+def test_update_progress():
+    """
+    Expect to start over when another request saves the snapshot between
+    loading and saving, so neither update is lost.
+    """
+
+    save_progress('user', 'set', {'units': []})
+    calls = []
+
+    def update(progress):
+        calls.append(1)
+        if len(calls) == 1:
+            save_progress('user', 'set', {'units': ['a']})
+        progress['units'].append('b')
+
+    update_progress('user', 'set', update)
+    assert len(calls) == 2
+    assert load_progress('user', 'set') == {'units': ['a', 'b']}
+
+    update_progress('user', 'missing', update)
+    assert load_progress('user', 'missing') is None
+    redis.delete('set_progress_user_set')
+
+
+def test_delete_all_progress():
+    """
+    Expect to delete every snapshot, and nothing else.
+    """
+
+    save_progress('user', 'a', {})
+    save_progress('user', 'b', {})
+    redis.set('set_progress', 1)
+    delete_all_progress(batch_size=1)
+    assert load_progress('user', 'a') is None
+    assert load_progress('user', 'b') is None
+    assert redis.get('set_progress') == b'1'
+    redis.delete('set_progress')
@@ -0,0 +1,53 @@
+import numpy as np
+from modules.sequencer.reporting import collect_learner_states, \
+    get_state_arrays, get_current_learned, get_done, get_mastery_histogram
+from modules.sequencer.params import init_learned
+
+
+def test_collect_learner_states():
+    """
+    Expect to keep the latest response of each learner in each unit,
+    across batches.
+    """
+
+    batches = [[
+        {'user_id': 'a', 'unit_id': 'u', 'learned': 0.5, 'created': 2},
+        {'user_id': 'a', 'unit_id': 'u', 'learned': 0.3, 'created': 1},
+    ], [
+        {'user_id': 'a', 'unit_id': 'u', 'learned': 0.7, 'created': 3},
+        {'user_id': 'b', 'unit_id': 'v', 'learned': 0.2, 'created': 1},
+    ]]
+    assert collect_learner_states(batches) == {
+        'u': {'a': (0.7, 3)},
+        'v': {'b': (0.2, 1)},
+    }
+
+
+def test_get_state_arrays():
+    """
+    Expect learners without a response to start at the initial learned.
+    """
+
+    learned, created = get_state_arrays({'a': (0.7, 3)}, ['a', 'b'])
+    assert learned.tolist() == [0.7, init_learned]
+    assert created[0] == 3
+    assert np.isnan(created[1])
+
+
+def test_mastery_histogram():
+    """
+    Expect to count the learners per tenth of learned, and the done.
+    """
+
+    learned, created = get_state_arrays({
+        'a': (0.995, 100),
+        'b': (0.55, 100),
+        'c': (0.05, 100),
+    }, ['a', 'b', 'c', 'd'])
+    current = get_current_learned(learned, created, now=100)
+    done = get_done(learned, created, now=100)
+    histogram = get_mastery_histogram(current, done)
+    assert histogram['num_learners'] == 4
+    assert histogram['num_done'] == 1
+    assert histogram['counts'] == [1, 0, 0, 0, 1, 1, 0, 0, 0, 1]
+    assert len(histogram['bins']) == 11
@@ -0,0 +1,117 @@
+from modules.sequencer.session import SequencerSession
+from modules.sequencer.params import init_learned
+from database.card_parameters import get_card_parameters_values
+from modules.sequencer.card_chooser import get_learned_bucket
+from models.cards.choice_card import ChoiceCard
+
+
+def create_session():
+    """
+    Create a session with the learner's state already loaded,
+    so it doesn't need to read from the database.
+    """
+
+    session = SequencerSession(None, {'id': 'user'})
+    session.latest_responses['unit'] = None
+    session.card_values['card'] = get_card_parameters_values({})
+    return session
+
+
+def create_card():
+    return ChoiceCard({
+        'entity_id': 'card',
+        'unit_id': 'unit',
+        'kind': 'choice',
+        'options': [{
+            'value': '42',
+            'correct': True,
+            'feedback': 'Yay!',
+        }, {
+            'value': 'love',
+            'correct': False,
+            'feedback': 'Boo!',
+        }],
+    })
+
+
+def test_respond():
+    """
+    Expect to carry the learned value forward in memory,
+    and hold the writes until the session flushes.
+    """
+
+    session = create_session()
+    card = create_card()
+    a = session.respond(card, '42')
+    b = session.respond(card, '42')
+    assert a['feedback'] == 'Yay!'
+    assert a['response']['learned'] > init_learned
+    assert b['response']['learned'] > a['response']['learned']
+    assert session.get_latest_response('unit')['learned'] == \
+        b['response']['learned']
+    assert [update['learned'] for update in session.card_updates] == \
+        [init_learned, a['response']['learned']]
+    assert len(session.new_responses) == 2
+
+
+def test_respond_many():
+    """
+    Expect to respond to many cards in order,
+    or to return errors naming each invalid response.
+    """
+
+    session = create_session()
+    card = create_card()
+    results = session.respond_many([card, card], ['42', 'love'])
+    assert [result['feedback'] for result in results] == ['Yay!', 'Boo!']
+    assert results[1]['response']['learned'] < \
+        results[0]['response']['learned']
+
+    session = create_session()
+    results = session.respond_many([card, card], ['42', 'Waffles'])
+    assert results['errors'][0]['name'] == 'responses.1'
+    assert session.new_responses == []
+
+
+def test_judge():
+    """
+    Expect to judge a unit with the responses not yet flushed.
+    """
+
+    session = create_session()
+    assert session.judge({'entity_id': 'unit'}) == 'learn'
+    for _ in range(20):
+        session.respond(create_card(), '42')
+    assert session.judge({'entity_id': 'unit'}) == 'done'
+
+
+def test_set_learning_context():
+    """
+    Expect to hold the learning context until the session flushes.
+    """
+
+    session = create_session()
+    session.set_learning_context(card=None, next={'method': 'GET'})
+    session.set_learning_context(unit=None)
+    assert session.learning_context == {
+        'card': None,
+        'unit': None,
+        'next': {'method': 'GET'},
+    }
+
+
+def test_choose_card_precomputed():
+    """
+    Expect to use the precomputed card for the learner's learned bucket.
+    """
+
+    session = create_session()
+    session.respond(create_card(), '42')
+    learned = session.get_latest_response('unit')['learned']
+    precomputed = {
+        get_learned_bucket(learned): {
+            'entity_id': 'next', 'unit_id': 'unit', 'kind': 'video',
+        },
+    }
+    card = session.choose_card({'entity_id': 'unit'}, precomputed)
+    assert card['entity_id'] == 'next'
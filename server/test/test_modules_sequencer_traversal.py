@@ -3,10 +3,12 @@ import pytest
 xfail = pytest.mark.xfail
 
 from modules.sequencer.traversal import traverse, \
-    match_unit_dependents, order_units_by_need, judge
+    match_unit_dependents, order_units_by_need, judge, judge_response, \
+    judge_due
 from models.unit import Unit
 from models.set import Set
 import rethinkdb as r
+from datetime import datetime, timedelta, timezone
 from database.user import get_user
 
 
@@ -183,3 +185,35 @@ def test_order(db_conn, units_table):
     assert entity_ids[1] in ('subtract', 'multiply')
     assert entity_ids[2] in ('subtract', 'multiply')
     assert entity_ids[3] == 'divide'
+
+
+def test_judge_response():
+    """
+    Expect to judge a unit given only the latest response.
+    """
+
+    now = datetime(2016, 1, 1)
+    assert judge_response({
+        'learned': 0.5, 'created': now,
+    }, now.timestamp()) == 'learn'
+    assert judge_response({
+        'learned': 0.995, 'created': now,
+    }, now.timestamp()) == 'done'
+    assert judge_response({
+        'learned': 0.995, 'created': now - timedelta(days=365),
+    }, now.timestamp()) == 'review'
+
+    # Responses from the database are in UTC, whatever the local time zone
+    created = datetime(2016, 1, 1, tzinfo=timezone.utc)
+    assert judge_response({
+        'learned': 0.995, 'created': created,
+    }, created.timestamp() + 60) == 'done'
+
+
+def test_judge_due():
+    """
+    Expect to judge a learned unit by when it needs review.
+    """
+
+    assert judge_due(200, 100) == 'done'
+    assert judge_due(100, 200) == 'review'
@@ -0,0 +1,61 @@
+import numpy as np
+from modules.sequencer.pmf import init_pmf
+from modules.sequencer.pmf_array import pmf_to_array, init_pmf_array_around
+from modules.sequencer.update import update, update_array, \
+    update_distributions
+
+
+def dict_pmf(init):
+    return init_pmf({
+        h: 1 - (init - h) ** 2
+        for h in [h / 20 for h in range(1, 20)]
+    })
+
+
+def test_update():
+    """
+    Expect to update learned, guess, and slip given a response.
+    """
+
+    result = update(1, 60, 0.4, dict_pmf(0.3), dict_pmf(0.1))
+    assert result['learned'] > 0.4
+    assert len(result['guess_distribution']) == 19
+    assert len(result['slip_distribution']) == 19
+
+
+def test_update_array():
+    """
+    Expect the array update to match the dict update.
+    """
+
+    guess, slip = dict_pmf(0.3), dict_pmf(0.1)
+    guess_array, slip_array = pmf_to_array(guess), pmf_to_array(slip)
+    learned = learned_array = 0.4
+    for score in (0, 1, 1, 0, 1):
+        a = update(score, 30, learned, guess, slip)
+        b = update_array(score, 30, learned_array, guess_array, slip_array)
+        learned, guess, slip = (a['learned'], a['guess_distribution'],
+                                a['slip_distribution'])
+        learned_array, guess_array, slip_array = (
+            b['learned'], b['guess_distribution'], b['slip_distribution'])
+    assert np.isclose(learned, learned_array)
+    assert np.allclose(pmf_to_array(guess), guess_array)
+    assert np.allclose(pmf_to_array(slip), slip_array)
+
+
+def test_update_distributions():
+    """
+    Expect to update many cards at once, as if one at a time.
+    """
+
+    guesses = np.array([init_pmf_array_around(g) for g in (0.1, 0.3, 0.5)])
+    slips = np.array([init_pmf_array_around(s) for s in (0.1, 0.2, 0.05)])
+    scores, learneds = [1, 0, 1], [0.2, 0.5, 0.9]
+    batch = update_distributions(scores, learneds, guesses, slips)
+    for i in range(3):
+        one = update_distributions(scores[i], learneds[i],
+                                   guesses[i], slips[i])
+        assert np.allclose(batch['guess_distribution'][i],
+                           one['guess_distribution'])
+        assert np.allclose(batch['slip_distribution'][i],
+                           one['slip_distribution'])
@@ -0,0 +1,55 @@
+import numpy as np
+from datetime import datetime, timezone
+from replay_responses import replay_cards_shard, get_response_key, \
+    backfill_card_learners
+from framework.redis import redis
+from modules.sequencer.update import update_distributions
+from modules.sequencer.pmf_array import init_pmf_array_around
+from modules.sequencer.params import init_guess, init_slip
+
+
+def test_replay_cards_shard():
+    """
+    Expect to replay each card's observations in order,
+    from the initial distributions.
+    """
+
+    shard = {
+        'a': [(1, 0.4), (0, 0.6), (1, 0.7)],
+        'b': [(0, 0.4)],
+    }
+    results = replay_cards_shard(shard)
+    guess = init_pmf_array_around(init_guess)
+    slip = init_pmf_array_around(init_slip)
+    for score, learned in shard['a']:
+        updates = update_distributions(score, learned, guess, slip)
+        guess = updates['guess_distribution']
+        slip = updates['slip_distribution']
+    assert np.allclose(results['a'][0], guess)
+    assert np.allclose(results['a'][1], slip)
+    assert len(results['b'][0]) == len(guess)
+
+
+def test_get_response_key():
+    """
+    Expect the checkpoint key to hold created, in ISO 8601, and the ID,
+    so responses created at the same time still resume in order.
+    """
+
+    created = datetime(2016, 5, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+    key = get_response_key({'created': created, 'id': 'A'})
+    assert key == ['2016-05-01T12:30:15.123000+00:00', 'A']
+
+
+def test_backfill_card_learners():
+    """
+    Expect to add the learners to each card's HyperLogLog,
+    keeping the learners already counted.
+    """
+
+    redis.delete('card_learners_a', 'card_learners_b')
+    redis.pfadd('card_learners_a', 'u1')
+    counts = backfill_card_learners({'a': {'u1', 'u2'}, 'b': {'u3'}},
+                                    chunk_size=1)
+    assert counts == {'a': 2, 'b': 1}
+    redis.delete('card_learners_a', 'card_learners_b')
@@ -112,6 +112,19 @@ def test_get_card_404(db_conn):
     assert code == 404
 
 
+def test_get_card_versions_skip(db_conn):
+    """
+    Expect to fail to page card versions by `skip`. (400)
+    """
+
+    code, response = routes.card.get_card_versions_route({
+        'db_conn': db_conn,
+        'params': {'skip': 10},
+    }, 'abcd')
+    assert code == 400
+    assert response['errors'][0]['name'] == 'skip'
+
+
 def test_learn_card(db_conn, session, cards_table):
     """
     Expect to get a card for learn mode. (200)
@@ -381,6 +394,145 @@ def test_respond_card_400b(db_conn, session, cards_table):
     redis.delete('learning_context_abcd1234')
 
 
+def test_respond_cards(db_conn, units_table, cards_table,
+                       cards_parameters_table,
+                       responses_table, session):
+    """
+    Expect to respond to a list of cards, in order. (200)
+    """
+
+    cards_table.insert([{
+        'entity_id': card_id,
+        'unit_id': 'vbnm7890',
+        'created': r.now(),
+        'modified': r.now(),
+        'status': 'accepted',
+        'kind': 'choice',
+        'name': 'Meaning of Life',
+        'body': 'What is the meaning of life?',
+        'options': [{
+            'value': '42',
+            'correct': True,
+            'feedback': 'Yay!',
+        }, {
+            'value': 'love',
+            'correct': False,
+            'feedback': 'Boo!',
+        }],
+        'order': 'set',
+        'max_options_to_show': 4,
+    } for card_id in ('tyui4567', 'qwer1234')]).run(db_conn)
+
+    units_table.insert({
+        'entity_id': 'vbnm7890',
+        'created': r.now(),
+    }).run(db_conn)
+
+    redis.set('learning_context_abcd1234', json.dumps({
+        'set': {'entity_id': 'jkl;1234'},
+        'card': {'entity_id': 'tyui4567'},
+    }))
+
+    request = {
+        'params': {'responses': [
+            {'card_id': 'tyui4567', 'response': '42'},
+            {'card_id': 'qwer1234', 'response': 'love'},
+            {'card_id': 'tyui4567', 'response': '42'},
+        ]},
+        'cookies': {'session_id': session},
+        'db_conn': db_conn,
+    }
+    code, response = routes.card.respond_to_cards_route(request)
+
+    assert code == 200
+    assert response['feedback'] == ['Yay!', 'Boo!', 'Yay!']
+    assert [r['card_id'] for r in response['responses']] == \
+        ['tyui4567', 'qwer1234', 'tyui4567']
+    assert responses_table.count().run(db_conn) == 3
+    assert 'next' in response
+    redis.delete('learning_context_abcd1234')
+
+
+def test_respond_cards_401(db_conn):
+    """
+    Expect to require log in to respond to cards. (401)
+    """
+
+    code, response = routes.card.respond_to_cards_route({
+        'params': {'responses': []},
+        'db_conn': db_conn,
+    })
+    assert code == 401
+
+
+def test_respond_cards_400(db_conn, session, cards_table):
+    """
+    Expect the first card responded to to be the current one,
+    and every response to make sense. (400)
+    """
+
+    cards_table.insert({
+        'entity_id': 'tyui4567',
+        'unit_id': 'vbnm7890',
+        'created': r.now(),
+        'modified': r.now(),
+        'status': 'accepted',
+        'kind': 'choice',
+        'name': 'Meaning of Life',
+        'body': 'What is the meaning of life?',
+        'options': [{
+            'value': '42',
+            'correct': True,
+            'feedback': 'Yay!',
+        }],
+        'order': 'set',
+        'max_options_to_show': 4,
+    }).run(db_conn)
+
+    redis.set('learning_context_abcd1234', json.dumps({
+        'set': {'entity_id': 'jkl;1234'},
+        'card': {'entity_id': 'gfds3456'},
+    }))
+    request = {
+        'params': {'responses': [
+            {'card_id': 'tyui4567', 'response': '42'},
+        ]},
+        'cookies': {'session_id': session},
+        'db_conn': db_conn,
+    }
+    code, response = routes.card.respond_to_cards_route(request)
+    assert code == 400
+
+    redis.set('learning_context_abcd1234', json.dumps({
+        'set': {'entity_id': 'jkl;1234'},
+        'card': {'entity_id': 'tyui4567'},
+    }))
+    request['params']['responses'].append(
+        {'card_id': 'tyui4567', 'response': 'Waffles'})
+    code, response = routes.card.respond_to_cards_route(request)
+    assert code == 400
+    assert response['errors'][0]['name'] == 'responses.1'
+    redis.delete('learning_context_abcd1234')
+
+
+def test_respond_cards_400_items(db_conn, session):
+    """
+    Expect each response to be a dict, and `created` a number. (400)
+    """
+
+    code, response = routes.card.respond_to_cards_route({
+        'params': {'responses': [
+            'tyui4567',
+            {'card_id': 'tyui4567', 'response': '42', 'created': 'now'},
+        ]},
+        'cookies': {'session_id': session},
+        'db_conn': db_conn,
+    })
+    assert code == 400
+    assert [error['name'] for error in response['errors']] == [
+        'responses.0', 'responses.1.created']
+
+
 @xfail
 def test_respond_card_diag():
     """